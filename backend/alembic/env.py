@@ -8,7 +8,9 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import Base
-from app.models import User, Beach, Campaign, Task, SatLayer, BeachDailyRisk, Alert
+from app.models import User, Beach, Campaign, Task, SatLayer, BeachDailyRisk, Alert, BackfillRun, Job, DailyRiskSummary
+from app.models import BeachRiskWeekly, BeachRiskMonthly, BeachCurrentState, BeachRiskForecast
+from app.models import BeachRiskTrend
 
 config = context.config
 
@@ -0,0 +1,35 @@
+"""Add unique (beach_id, date) constraint on beach daily risks
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-02-01
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep only the newest row per (beach_id, date) before adding the constraint
+    op.execute("""
+        DELETE FROM beach_daily_risks a
+        USING beach_daily_risks b
+        WHERE a.beach_id = b.beach_id
+          AND a.date = b.date
+          AND a.id < b.id
+    """)
+    op.create_unique_constraint(
+        'uq_beach_daily_risks_beach_id_date',
+        'beach_daily_risks',
+        ['beach_id', 'date']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_beach_daily_risks_beach_id_date', 'beach_daily_risks', type_='unique')
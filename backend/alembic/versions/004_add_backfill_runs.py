@@ -0,0 +1,41 @@
+"""Add backfill run checkpoints
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-02-05
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'backfill_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('chunk_days', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), default='pending'),
+        sa.Column('chunks_total', sa.Integer(), nullable=False, default=0),
+        sa.Column('chunks_done', sa.Integer(), nullable=False, default=0),
+        sa.Column('last_completed_date', sa.Date(), nullable=True),
+        sa.Column('rows_written', sa.Integer(), nullable=False, default=0),
+        sa.Column('alerts_created', sa.Integer(), nullable=False, default=0),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), onupdate=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_backfill_runs_id', 'backfill_runs', ['id'])
+    op.create_index('ix_backfill_runs_status', 'backfill_runs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_table('backfill_runs')
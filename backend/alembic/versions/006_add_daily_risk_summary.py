@@ -0,0 +1,46 @@
+"""Add daily risk summary
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-02-15
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_risk_summary',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('total_beaches', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('no_risk', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('low_risk', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('medium_risk', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('high_risk', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('date')
+    )
+    
+    # Populate from existing history
+    op.execute("""
+        INSERT INTO daily_risk_summary (date, total_beaches, no_risk, low_risk, medium_risk, high_risk)
+        SELECT date,
+               count(*),
+               count(*) FILTER (WHERE risk_level = 0),
+               count(*) FILTER (WHERE risk_level = 1),
+               count(*) FILTER (WHERE risk_level = 2),
+               count(*) FILTER (WHERE risk_level = 3)
+        FROM beach_daily_risks
+        GROUP BY date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('daily_risk_summary')
@@ -0,0 +1,53 @@
+"""Composite and partial indexes for risk and alert access paths
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-02-20
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (beach_id, date range) is served by uq_beach_daily_risks_beach_id_date,
+    # which also makes the single-column beach_id index redundant.
+    op.drop_index('ix_beach_daily_risks_beach_id', table_name='beach_daily_risks')
+    
+    # (date, risk_level >= n) for high-risk lookups and per-date counts
+    op.drop_index('ix_beach_daily_risks_date', table_name='beach_daily_risks')
+    op.create_index(
+        'ix_beach_daily_risks_date_risk_level',
+        'beach_daily_risks',
+        ['date', 'risk_level']
+    )
+    
+    # Active alerts, newest first, and the active alert count
+    op.create_index(
+        'ix_alerts_active_date_created',
+        'alerts',
+        [sa.text('date_created DESC')],
+        postgresql_where=sa.text('is_active')
+    )
+    
+    # Preloading beaches with an active alert of a given type during ingestion
+    op.create_index(
+        'ix_alerts_active_type_beach',
+        'alerts',
+        ['alert_type', 'beach_id'],
+        postgresql_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_active_type_beach', table_name='alerts')
+    op.drop_index('ix_alerts_active_date_created', table_name='alerts')
+    op.drop_index('ix_beach_daily_risks_date_risk_level', table_name='beach_daily_risks')
+    op.create_index('ix_beach_daily_risks_date', 'beach_daily_risks', ['date'])
+    op.create_index('ix_beach_daily_risks_beach_id', 'beach_daily_risks', ['beach_id'])
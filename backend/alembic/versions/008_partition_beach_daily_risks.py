@@ -0,0 +1,120 @@
+"""Partition beach_daily_risks by month on date
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-02-27
+
+"""
+from datetime import date
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created ahead of the current month; later months are added
+# by the risk_partition_maintenance job and on demand by the write paths
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, beach_id, date, risk_level, source, raw_value, confidence, created_at"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # Move the existing table aside, freeing its constraint and index names
+    op.execute("ALTER TABLE beach_daily_risks RENAME TO beach_daily_risks_unpartitioned")
+    op.execute(
+        "ALTER TABLE beach_daily_risks_unpartitioned "
+        "RENAME CONSTRAINT beach_daily_risks_pkey TO beach_daily_risks_unpartitioned_pkey"
+    )
+    op.execute(
+        "ALTER TABLE beach_daily_risks_unpartitioned "
+        "RENAME CONSTRAINT uq_beach_daily_risks_beach_id_date TO uq_beach_daily_risks_unpartitioned_beach_id_date"
+    )
+    op.drop_index('ix_beach_daily_risks_id', table_name='beach_daily_risks_unpartitioned')
+    op.drop_index('ix_beach_daily_risks_date_risk_level', table_name='beach_daily_risks_unpartitioned')
+
+    # The partition key must be part of every unique constraint, so the
+    # primary key becomes (id, date); ids keep coming from the old sequence
+    op.execute("""
+        CREATE TABLE beach_daily_risks (
+            id integer NOT NULL DEFAULT nextval('beach_daily_risks_id_seq'::regclass),
+            beach_id integer NOT NULL REFERENCES beaches (id),
+            date date NOT NULL,
+            risk_level integer NOT NULL,
+            source varchar,
+            raw_value numeric(10, 4),
+            confidence numeric(3, 2),
+            created_at timestamp with time zone DEFAULT now(),
+            CONSTRAINT beach_daily_risks_pkey PRIMARY KEY (id, date),
+            CONSTRAINT uq_beach_daily_risks_beach_id_date UNIQUE (beach_id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.execute("ALTER SEQUENCE beach_daily_risks_id_seq OWNED BY beach_daily_risks.id")
+    op.create_index(
+        'ix_beach_daily_risks_date_risk_level',
+        'beach_daily_risks',
+        ['date', 'risk_level']
+    )
+
+    bind = op.get_bind()
+    oldest, newest = bind.execute(sa.text(
+        "SELECT min(date), max(date) FROM beach_daily_risks_unpartitioned"
+    )).one()
+    current = date.today().replace(day=1)
+    month = min(oldest or current, current).replace(day=1)
+    last = max(newest or current, _add_months(current, MONTHS_AHEAD)).replace(day=1)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE beach_daily_risks_p{month.year:04d}_{month.month:02d} "
+            f"PARTITION OF beach_daily_risks "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(f"INSERT INTO beach_daily_risks ({COLUMNS}) SELECT {COLUMNS} FROM beach_daily_risks_unpartitioned")
+    op.drop_table('beach_daily_risks_unpartitioned')
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE TABLE beach_daily_risks_unpartitioned (
+            id integer NOT NULL DEFAULT nextval('beach_daily_risks_id_seq'::regclass),
+            beach_id integer NOT NULL REFERENCES beaches (id),
+            date date NOT NULL,
+            risk_level integer NOT NULL,
+            source varchar,
+            raw_value numeric(10, 4),
+            confidence numeric(3, 2),
+            created_at timestamp with time zone DEFAULT now(),
+            CONSTRAINT beach_daily_risks_unpartitioned_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_beach_daily_risks_unpartitioned_beach_id_date UNIQUE (beach_id, date)
+        )
+    """)
+    op.execute(f"INSERT INTO beach_daily_risks_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM beach_daily_risks")
+    op.execute("ALTER SEQUENCE beach_daily_risks_id_seq OWNED BY beach_daily_risks_unpartitioned.id")
+    # Drops every partition with it
+    op.drop_table('beach_daily_risks')
+
+    op.execute("ALTER TABLE beach_daily_risks_unpartitioned RENAME TO beach_daily_risks")
+    op.execute(
+        "ALTER TABLE beach_daily_risks "
+        "RENAME CONSTRAINT beach_daily_risks_unpartitioned_pkey TO beach_daily_risks_pkey"
+    )
+    op.execute(
+        "ALTER TABLE beach_daily_risks "
+        "RENAME CONSTRAINT uq_beach_daily_risks_unpartitioned_beach_id_date TO uq_beach_daily_risks_beach_id_date"
+    )
+    op.create_index('ix_beach_daily_risks_id', 'beach_daily_risks', ['id'])
+    op.create_index(
+        'ix_beach_daily_risks_date_risk_level',
+        'beach_daily_risks',
+        ['date', 'risk_level']
+    )
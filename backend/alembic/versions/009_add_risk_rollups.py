@@ -0,0 +1,57 @@
+"""Add weekly and monthly risk rollups
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-03-05
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> date_trunc unit (weeks start on Monday)
+ROLLUPS = {
+    'beach_risk_weekly': 'week',
+    'beach_risk_monthly': 'month',
+}
+
+
+def upgrade() -> None:
+    for table, unit in ROLLUPS.items():
+        op.create_table(
+            table,
+            sa.Column('beach_id', sa.Integer(), sa.ForeignKey('beaches.id'), nullable=False),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('days', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('max_risk_level', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('mean_risk_level', sa.Numeric(4, 2), nullable=True),
+            sa.Column('mean_raw_value', sa.Numeric(10, 4), nullable=True),
+            sa.Column('high_risk_days', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.PrimaryKeyConstraint('beach_id', 'period_start')
+        )
+        
+        # Populate from existing history
+        op.execute(f"""
+            INSERT INTO {table} (beach_id, period_start, days, max_risk_level, mean_risk_level,
+                                 mean_raw_value, high_risk_days)
+            SELECT beach_id,
+                   date_trunc('{unit}', date)::date,
+                   count(*),
+                   max(risk_level),
+                   round(avg(risk_level), 2),
+                   round(avg(raw_value), 4),
+                   count(*) FILTER (WHERE risk_level >= 3)
+            FROM beach_daily_risks
+            GROUP BY 1, 2
+        """)
+
+
+def downgrade() -> None:
+    for table in reversed(list(ROLLUPS)):
+        op.drop_table(table)
@@ -0,0 +1,57 @@
+"""(sort key, id) indexes for keyset pagination
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-03-12
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Each list endpoint seeks to (sort key, id) > cursor; these replace the
+    # single-column sort key indexes where one existed
+    op.drop_index('ix_beaches_name', table_name='beaches')
+    op.create_index('ix_beaches_name_id', 'beaches', ['name', 'id'])
+    
+    op.create_index('ix_tasks_scheduled_date_id', 'tasks', ['scheduled_date', 'id'])
+    op.create_index('ix_campaigns_start_date_id', 'campaigns', ['start_date', 'id'])
+    
+    op.drop_index('ix_sat_layers_date', table_name='sat_layers')
+    op.create_index('ix_sat_layers_date_id', 'sat_layers', ['date', 'id'])
+    
+    # Alerts are listed newest first; both indexes are scanned backwards
+    op.drop_index('ix_alerts_date_created', table_name='alerts')
+    op.create_index('ix_alerts_date_created_id', 'alerts', ['date_created', 'id'])
+    op.drop_index('ix_alerts_active_date_created', table_name='alerts')
+    op.create_index(
+        'ix_alerts_active_date_created',
+        'alerts',
+        ['date_created', 'id'],
+        postgresql_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_active_date_created', table_name='alerts')
+    op.create_index(
+        'ix_alerts_active_date_created',
+        'alerts',
+        [sa.text('date_created DESC')],
+        postgresql_where=sa.text('is_active')
+    )
+    op.drop_index('ix_alerts_date_created_id', table_name='alerts')
+    op.create_index('ix_alerts_date_created', 'alerts', ['date_created'])
+    op.drop_index('ix_sat_layers_date_id', table_name='sat_layers')
+    op.create_index('ix_sat_layers_date', 'sat_layers', ['date'])
+    op.drop_index('ix_campaigns_start_date_id', table_name='campaigns')
+    op.drop_index('ix_tasks_scheduled_date_id', table_name='tasks')
+    op.drop_index('ix_beaches_name_id', table_name='beaches')
+    op.create_index('ix_beaches_name', 'beaches', ['name'])
@@ -0,0 +1,49 @@
+"""Add beach_current_state snapshot
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-03-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'beach_current_state',
+        sa.Column('beach_id', sa.Integer(), sa.ForeignKey('beaches.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=True),
+        sa.Column('risk_level', sa.Integer(), nullable=True),
+        sa.Column('raw_value', sa.Numeric(10, 4), nullable=True),
+        sa.Column('confidence', sa.Numeric(3, 2), nullable=True),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.Column('active_alerts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('beach_id')
+    )
+    op.create_index('ix_beach_current_state_risk_level', 'beach_current_state', ['risk_level'])
+    
+    # Populate from existing history: latest risk row and active alerts per beach
+    op.execute("""
+        INSERT INTO beach_current_state (beach_id, date, risk_level, raw_value, confidence, source)
+        SELECT DISTINCT ON (beach_id) beach_id, date, risk_level, raw_value, confidence, source
+        FROM beach_daily_risks
+        ORDER BY beach_id, date DESC
+    """)
+    op.execute("""
+        INSERT INTO beach_current_state (beach_id, active_alerts)
+        SELECT beach_id, count(*) FROM alerts WHERE is_active GROUP BY beach_id
+        ON CONFLICT (beach_id) DO UPDATE SET active_alerts = excluded.active_alerts
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_beach_current_state_risk_level', table_name='beach_current_state')
+    op.drop_table('beach_current_state')
@@ -0,0 +1,42 @@
+"""Add beach_risk_forecasts for drift forecasts
+
+Revision ID: 012
+Revises: 011
+Create Date: 2024-03-26
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'beach_risk_forecasts',
+        sa.Column('issued_on', sa.Date(), nullable=False),
+        sa.Column('horizon', sa.Integer(), nullable=False),
+        sa.Column('beach_id', sa.Integer(), sa.ForeignKey('beaches.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('risk_level', sa.Integer(), nullable=False),
+        sa.Column('raw_value', sa.Numeric(10, 4), nullable=True),
+        sa.Column('confidence', sa.Numeric(3, 2), nullable=True),
+        sa.Column('particle_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('issued_on', 'horizon', 'beach_id')
+    )
+    op.create_index(
+        'ix_beach_risk_forecasts_beach_id_issued_on',
+        'beach_risk_forecasts',
+        ['beach_id', 'issued_on']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_beach_risk_forecasts_beach_id_issued_on', table_name='beach_risk_forecasts')
+    op.drop_table('beach_risk_forecasts')
@@ -0,0 +1,52 @@
+"""Add beach_risk_trends rolling statistics
+
+Revision ID: 013
+Revises: 012
+Create Date: 2024-04-02
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SLOPE_7_SQL = (
+    "CASE WHEN n_7 >= 2 THEN round((n_7 * sum_xy_7 - sum_x_7 * sum_7)::numeric"
+    " / nullif(n_7 * sum_xx_7 - sum_x_7 * sum_x_7, 0), 4) END"
+)
+
+
+def upgrade() -> None:
+    # Filled by the next ingestion, or at once with: python -m app.cli rebuild-current-state
+    op.create_table(
+        'beach_risk_trends',
+        sa.Column('beach_id', sa.Integer(), sa.ForeignKey('beaches.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('risk_level', sa.Integer(), nullable=False),
+        sa.Column('streak_days', sa.Integer(), nullable=False),
+        sa.Column('prev_streak_days', sa.Integer(), nullable=False),
+        sa.Column('n_7', sa.Integer(), nullable=False),
+        sa.Column('sum_7', sa.Integer(), nullable=False),
+        sa.Column('sum_x_7', sa.BigInteger(), nullable=False),
+        sa.Column('sum_xx_7', sa.BigInteger(), nullable=False),
+        sa.Column('sum_xy_7', sa.BigInteger(), nullable=False),
+        sa.Column('n_30', sa.Integer(), nullable=False),
+        sa.Column('sum_30', sa.Integer(), nullable=False),
+        sa.Column('avg_7', sa.Numeric(4, 2), sa.Computed("round(sum_7::numeric / nullif(n_7, 0), 2)")),
+        sa.Column('avg_30', sa.Numeric(4, 2), sa.Computed("round(sum_30::numeric / nullif(n_30, 0), 2)")),
+        sa.Column('slope_7', sa.Numeric(6, 4), sa.Computed(SLOPE_7_SQL)),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('beach_id')
+    )
+    op.create_index('ix_beach_risk_trends_streak_days', 'beach_risk_trends', ['streak_days'])
+    op.create_index('ix_beach_risk_trends_slope_7', 'beach_risk_trends', ['slope_7'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_beach_risk_trends_slope_7', table_name='beach_risk_trends')
+    op.drop_index('ix_beach_risk_trends_streak_days', table_name='beach_risk_trends')
+    op.drop_table('beach_risk_trends')
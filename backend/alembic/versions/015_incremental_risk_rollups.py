@@ -0,0 +1,68 @@
+"""Add incremental state to the risk rollups
+
+Revision ID: 015
+Revises: 014
+Create Date: 2024-04-16
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> date_trunc unit (weeks start on Monday)
+ROLLUPS = {
+    'beach_risk_weekly': 'week',
+    'beach_risk_monthly': 'month',
+}
+
+
+def upgrade() -> None:
+    for table, unit in ROLLUPS.items():
+        op.add_column(table, sa.Column('sum_risk_level', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('sum_raw_value', sa.Numeric(14, 4), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('raw_days', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('last_date', sa.Date(), nullable=True))
+        op.add_column(table, sa.Column('last_risk_level', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column('last_raw_value', sa.Numeric(10, 4), nullable=True))
+        op.add_column(table, sa.Column('prev_max_risk_level', sa.Integer(), nullable=True))
+
+        # Fill the new state from history
+        op.execute(f"""
+            UPDATE {table} t SET
+                sum_risk_level = s.sum_risk_level,
+                sum_raw_value = s.sum_raw_value,
+                raw_days = s.raw_days,
+                last_date = s.last_date,
+                last_risk_level = s.last_risk_level,
+                last_raw_value = s.last_raw_value,
+                prev_max_risk_level = s.prev_max_risk_level
+            FROM (
+                SELECT beach_id, period_start,
+                       sum(risk_level) AS sum_risk_level,
+                       coalesce(sum(raw_value), 0) AS sum_raw_value,
+                       count(raw_value) AS raw_days,
+                       max(date) AS last_date,
+                       max(risk_level) FILTER (WHERE latest = 1) AS last_risk_level,
+                       max(raw_value) FILTER (WHERE latest = 1) AS last_raw_value,
+                       max(risk_level) FILTER (WHERE latest > 1) AS prev_max_risk_level
+                FROM (
+                    SELECT beach_id, date_trunc('{unit}', date)::date AS period_start, date, risk_level, raw_value,
+                           row_number() OVER (PARTITION BY beach_id, date_trunc('{unit}', date) ORDER BY date DESC) AS latest
+                    FROM beach_daily_risks
+                ) r
+                GROUP BY 1, 2
+            ) s
+            WHERE t.beach_id = s.beach_id AND t.period_start = s.period_start
+        """)
+
+
+def downgrade() -> None:
+    for table in ROLLUPS:
+        for column in ('prev_max_risk_level', 'last_raw_value', 'last_risk_level', 'last_date',
+                       'raw_days', 'sum_raw_value', 'sum_risk_level'):
+            op.drop_column(table, column)
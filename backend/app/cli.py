@@ -0,0 +1,143 @@
+"""
+Management commands.
+
+    python -m app.cli import-risk observations.csv
+    python -m app.cli import-risk observations.ndjson --source NOAA_SIR
+    python -m app.cli maintain-partitions --retention-months 24
+    python -m app.cli --allow-unshared-cache rebuild-current-state
+    python -m app.cli forecast --particles 1000000 --horizon-days 7
+
+Every command writes data the API caches. The API only notices writes from
+another process through a shared cache backend, so commands refuse to run
+unless CACHE_URL points at one (redis://...). Pass --allow-unshared-cache
+when no API process is running, or its cache is disabled; otherwise it may
+serve stale results, and 304s, for up to CACHE_TTL_SECONDS.
+"""
+import argparse
+import json
+import sys
+from datetime import date
+from .database import SessionLocal
+from .services.risk_import import import_risk_lines, IMPORT_BATCH_SIZE, IMPORT_FORMATS
+from .services.partitions import maintain_risk_partitions, RETENTION_ACTIONS
+from .services.current_state import rebuild_current_state
+from .services.risk_trends import rebuild_risk_trends
+from .services.cache import mark_changed, query_cache
+from .services.drift_forecast import run_drift_forecast
+
+
+def _import_risk(args: argparse.Namespace) -> int:
+    import_format = args.format
+    if not import_format:
+        import_format = "ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8", newline="") as f:
+            stats = import_risk_lines(
+                db,
+                (line.rstrip("\r\n") for line in f),
+                import_format,
+                source=args.source,
+                batch_size=args.batch_size
+            )
+    finally:
+        db.close()
+
+    print(json.dumps(stats, indent=2))
+    return 0 if stats["rows_loaded"] or not stats["rows_read"] else 1
+
+
+def _maintain_partitions(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        result = maintain_risk_partitions(
+            db,
+            months_ahead=args.months_ahead,
+            retention_months=args.retention_months,
+            retention_action=args.retention_action
+        )
+    finally:
+        db.close()
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def _rebuild_current_state(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        rows = rebuild_current_state(db)
+        trend_rows = rebuild_risk_trends(db)
+        mark_changed(db, "risk", "alerts")
+        db.commit()
+    finally:
+        db.close()
+
+    print(json.dumps({"beach_current_state_rows": rows, "beach_risk_trends_rows": trend_rows}, indent=2))
+    return 0
+
+
+def _forecast(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        result = run_drift_forecast(
+            db,
+            issued_on=args.issued_on,
+            horizon_days=args.horizon_days,
+            particles=args.particles,
+            field_layer_id=args.field_layer_id,
+            seed_layer_id=args.seed_layer_id
+        )
+    finally:
+        db.close()
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_risk = commands.add_parser("import-risk", help="Stream a CSV/NDJSON file of observations into beach_daily_risks")
+    import_risk.add_argument("path")
+    import_risk.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults from the file extension")
+    import_risk.add_argument("--source", default="IMPORT", help="Source for rows that do not set one")
+    import_risk.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    import_risk.set_defaults(func=_import_risk)
+
+    maintain = commands.add_parser("maintain-partitions", help="Create upcoming beach_daily_risks partitions and retire old ones")
+    maintain.add_argument("--months-ahead", type=int, help="Defaults to RISK_PARTITION_MONTHS_AHEAD")
+    maintain.add_argument("--retention-months", type=int, help="Defaults to RISK_RETENTION_MONTHS; 0 keeps all")
+    maintain.add_argument("--retention-action", choices=RETENTION_ACTIONS, help="Defaults to RISK_RETENTION_ACTION")
+    maintain.set_defaults(func=_maintain_partitions)
+
+    rebuild = commands.add_parser("rebuild-current-state", help="Recompute beach_current_state and beach_risk_trends from risk history and alerts")
+    rebuild.set_defaults(func=_rebuild_current_state)
+
+    forecast = commands.add_parser("forecast", help="Run a drift forecast and store it in beach_risk_forecasts")
+    forecast.add_argument("--issued-on", type=date.fromisoformat, help="Defaults to today")
+    forecast.add_argument("--horizon-days", type=int, help="Defaults to FORECAST_HORIZON_DAYS")
+    forecast.add_argument("--particles", type=int, help="Defaults to FORECAST_PARTICLES")
+    forecast.add_argument("--field-layer-id", type=int, help="drift_field layer; defaults to the newest")
+    forecast.add_argument("--seed-layer-id", type=int, help="density_map layer; defaults to the newest")
+    forecast.set_defaults(func=_forecast)
+
+    parser.add_argument(
+        "--allow-unshared-cache",
+        action="store_true",
+        help="Run even though CACHE_URL is not a shared backend the API would see changes through"
+    )
+
+    args = parser.parse_args(argv)
+    if not query_cache.shared and not args.allow_unshared_cache:
+        parser.error(
+            "CACHE_URL must point at a shared cache backend (redis://...) so the API sees this "
+            "command's changes; pass --allow-unshared-cache if no API process is running"
+        )
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
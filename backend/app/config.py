@@ -14,6 +14,73 @@ class Settings(BaseSettings):
     
     # OpenAI
     OPENAI_API_KEY: str = ""
+    OPENAI_BASE_URL: str = ""  # e.g. http://localhost:8099/v1 for scripts/mock_openai_server.py
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    AI_MAX_CONCURRENCY: int = 8  # completions in flight; also the connection pool size
+    AI_QUEUE_TIMEOUT: float = 5.0  # seconds to wait for a free slot
+    AI_REQUEST_TIMEOUT: float = 30.0  # seconds per completion
+    AI_CONNECT_TIMEOUT: float = 5.0
+    
+    # AI provider and its failure handling
+    AI_PROVIDER: str = "openai"  # "openai", or "local" for the deterministic stand-in
+    AI_RATE_LIMIT_PER_MINUTE: int = 0  # client-side limit on model calls; 0 = unlimited
+    AI_RATE_LIMIT_BURST: int = 10
+    AI_RETRY_ATTEMPTS: int = 2  # retries for rate limits, timeouts and 5xx, within AI_REQUEST_TIMEOUT
+    AI_RETRY_BASE_DELAY: float = 0.5  # seconds, doubled per retry with full jitter
+    AI_RETRY_MAX_DELAY: float = 8.0
+    AI_BREAKER_FAILURES: int = 5  # consecutive provider failures that open the circuit breaker
+    AI_BREAKER_RESET_SECONDS: float = 30.0  # how long it stays open before a trial call
+    AI_LOCAL_LATENCY: float = 0.0  # local provider: seconds before each reply
+    AI_LOCAL_TOKEN_DELAY: float = 0.0  # local provider: seconds between streamed words
+    AI_LOCAL_FAILURE_RATE: float = 0.0  # local provider: fraction of calls that fail
+    
+    # AI prompt context
+    AI_CONTEXT_TOKEN_BUDGET: int = 800  # approximate tokens of risk data per prompt
+    AI_CONTEXT_MAX_ITEMS: int = 100  # ranked candidates per section kept in the precomputed context
+    
+    # AI response cache
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 256
+    AI_CACHE_TTL_SECONDS: int = 900
+    AI_CACHE_SEMANTIC: bool = False  # also answer near-duplicate questions from the cache
+    AI_CACHE_SIMILARITY: float = 0.9  # cosine similarity a near-duplicate needs
+    
+    # Backfill
+    BACKFILL_CHUNK_DAYS: int = 30
+    BACKFILL_WORKERS: int = 0  # 0 = one per CPU
+    
+    # Satellite rasters (relative SatLayer paths are resolved here)
+    SAT_DATA_DIR: str = "/data/sat"  # layer files must live under this directory
+    
+    # beach_daily_risks monthly partitions
+    RISK_PARTITION_MONTHS_AHEAD: int = 3
+    RISK_RETENTION_MONTHS: int = 0  # 0 = keep all history
+    RISK_RETENTION_ACTION: str = "detach"  # "detach" keeps old partitions as <table>_archived_YYYY_MM tables, "drop" deletes them
+    
+    # Drift forecast
+    FORECAST_PARTICLES: int = 1_000_000
+    FORECAST_HORIZON_DAYS: int = 7
+    FORECAST_STEP_HOURS: float = 3.0
+    FORECAST_CAPTURE_KM: float = 2.0  # particles this close to a beach strand there
+    FORECAST_WINDAGE: float = 0.01  # fraction of 10 m wind speed added to the current
+    FORECAST_DIFFUSIVITY: float = 10.0  # m^2/s, random-walk spread
+    
+    # Trend analytics and the alerts they raise
+    PERSISTENT_RISK_LEVEL: int = 2  # days at or above this level extend a streak
+    PERSISTENT_RISK_DAYS: int = 5  # streak length that raises PERSISTENT_RISK
+    RISING_TREND_SLOPE: float = 0.25  # risk levels per day over 7 days that raises RISING_TREND
+    RISING_TREND_MIN_DAYS: int = 5  # days of data the 7-day slope needs
+    
+    # Background jobs
+    JOB_WORKERS: int = 2
+    JOB_HEARTBEAT_SECONDS: int = 15  # how often a process marks its running jobs alive
+    JOB_STALE_SECONDS: int = 120  # running jobs silent this long are failed as abandoned
+    
+    # Query cache
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_URL: str = ""  # redis://... to share across processes, "local" for the in-process stand-in
+    CACHE_TTL_SECONDS: int = 3600  # lifetime of cached entries, local and shared
     
     # App
     APP_NAME: str = "Sargassum MVP API"
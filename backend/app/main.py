@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
+from .database import init_db, SessionLocal
+from .middleware import ConditionalGetMiddleware
 from .routers import (
     auth_router,
     beaches_router, 
@@ -8,12 +9,22 @@ from .routers import (
     tasks_router,
     ai_router,
     risk_router,
-    sat_layers_router
+    sat_layers_router,
+    jobs_router,
+    dashboard_router,
+    map_router
 )
+from .services.jobs import start_job_runner, stop_job_runner
+from .services.ai_client import start_ai_client, stop_ai_client
+from .services.spatial_index import beach_index
+from .services.partitions import ensure_future_partitions
 
 app = FastAPI(title="Sargassum MVP API")
 
-# Configure CORS
+# Answer conditional GETs for unchanged data before routing
+app.add_middleware(ConditionalGetMiddleware)
+
+# Configure CORS (added last so it also wraps 304 responses)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,8 +35,24 @@ app.add_middleware(
 
 @app.on_event("startup")
 def startup_event():
-    """Initialize database on startup."""
+    """Initialize database, risk partitions, spatial index, background job runner and AI client on startup."""
     init_db()
+    db = SessionLocal()
+    try:
+        ensure_future_partitions(db)
+        db.commit()
+        beach_index.rebuild(db)
+    finally:
+        db.close()
+    start_job_runner()
+    start_ai_client()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background job runner and close the AI client's connections."""
+    stop_job_runner()
+    await stop_ai_client()
 
 
 @app.get("/")
@@ -41,3 +68,6 @@ app.include_router(tasks_router, prefix="/api")
 app.include_router(ai_router, prefix="/api")
 app.include_router(risk_router, prefix="/api")
 app.include_router(sat_layers_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(dashboard_router, prefix="/api")
+app.include_router(map_router, prefix="/api")
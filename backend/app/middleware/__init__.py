@@ -1,3 +1,4 @@
 from .auth import get_current_user, get_current_active_user
+from .conditional import ConditionalGetMiddleware
 
-__all__ = ["get_current_user", "get_current_active_user"]
+__all__ = ["get_current_user", "get_current_active_user", "ConditionalGetMiddleware"]
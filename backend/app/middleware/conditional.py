@@ -0,0 +1,119 @@
+import hashlib
+import time
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from ..services.cache import query_cache
+
+# Data families each read-only API resource is built from, by path prefix
+RESOURCE_FAMILIES = (
+    ("/api/beaches", ("beaches", "risk")),  # beach detail carries the risk trend
+    ("/api/risk/", ("risk", "alerts", "beaches")),
+    ("/api/alerts", ("alerts", "beaches")),
+    ("/api/tasks", ("tasks",)),
+    ("/api/campaigns", ("campaigns",)),
+    ("/api/dashboard", ("risk", "alerts", "beaches", "tasks", "campaigns")),
+    ("/api/map/", ("risk", "beaches")),
+)
+
+
+def families_for_path(path: str) -> Optional[Tuple[str, ...]]:
+    for prefix, families in RESOURCE_FAMILIES:
+        if path == prefix.rstrip("/") or path.startswith(prefix.rstrip("/") + "/"):
+            return families
+    return None
+
+
+def compute_validators(families: Tuple[str, ...], cache=query_cache) -> Tuple[str, float]:
+    """
+    Return (etag, last_modified) for resources built from the given families.
+    Today's date is folded in because many endpoints default to it.
+    """
+    versions = cache.versions(families)
+    modified = cache.last_modified(families)
+    today = date.today()
+    # A new day changes every "defaults to today" response
+    modified = max(modified, time.mktime(today.timetuple()))
+    digest = hashlib.sha1(f"{families}:{versions}:{modified}:{today}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"', modified
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since: str, last_modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole-second precision
+    return int(last_modified) <= since
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds ETag and Last-Modified headers to GET responses for resources in
+    RESOURCE_FAMILIES and answers If-None-Match / If-Modified-Since with
+    304 before the request reaches a route, so unchanged data costs no
+    database work. Validators come from the query cache's per-family
+    versions, which every committed write bumps. With a shared cache
+    backend those are network calls, so they run in the threadpool rather
+    than blocking the event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        families = families_for_path(scope["path"])
+        if not families:
+            await self.app(scope, receive, send)
+            return
+
+        if query_cache.backend is not None:
+            etag, last_modified = await run_in_threadpool(compute_validators, families)
+        else:
+            etag, last_modified = compute_validators(families)
+        validator_headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            "Cache-Control": "no-cache"
+        }
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        if_modified_since = request_headers.get("if-modified-since")
+        # If-None-Match takes precedence when both are sent
+        if (if_none_match and etag_matches(if_none_match, etag)) or (
+            not if_none_match and if_modified_since and not_modified_since(if_modified_since, last_modified)
+        ):
+            response = Response(status_code=304, headers=validator_headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                for name, value in validator_headers.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -5,5 +5,14 @@ from .task import Task
 from .sat_layer import SatLayer
 from .beach_daily_risk import BeachDailyRisk
 from .alert import Alert
+from .backfill_run import BackfillRun
+from .job import Job
+from .daily_risk_summary import DailyRiskSummary
+from .beach_risk_rollup import BeachRiskWeekly, BeachRiskMonthly
+from .beach_current_state import BeachCurrentState
+from .beach_risk_forecast import BeachRiskForecast
+from .beach_risk_trend import BeachRiskTrend
 
-__all__ = ["User", "Beach", "Campaign", "Task", "SatLayer", "BeachDailyRisk", "Alert"]
+__all__ = ["User", "Beach", "Campaign", "Task", "SatLayer", "BeachDailyRisk", "Alert", "BackfillRun", "Job",
+           "DailyRiskSummary", "BeachRiskWeekly", "BeachRiskMonthly", "BeachCurrentState",
+           "BeachRiskForecast", "BeachRiskTrend"]
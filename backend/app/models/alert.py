@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -6,10 +6,15 @@ from ..database import Base
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_date_created_id", "date_created", "id"),
+        Index("ix_alerts_active_date_created", "date_created", "id", postgresql_where=text("is_active")),
+        Index("ix_alerts_active_type_beach", "alert_type", "beach_id", postgresql_where=text("is_active")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     beach_id = Column(Integer, ForeignKey("beaches.id"), nullable=False, index=True)
-    date_created = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    date_created = Column(DateTime(timezone=True), server_default=func.now())
     alert_type = Column(String, nullable=False)  # e.g. "HIGH_RISK", "PERSISTENT_RISK"
     severity = Column(Integer, nullable=False, default=1)  # 1-3
     message = Column(Text, nullable=True)
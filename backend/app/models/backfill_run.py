@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class BackfillRun(Base):
+    __tablename__ = "backfill_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    chunk_days = Column(Integer, nullable=False)
+    status = Column(String, default="pending", index=True)  # pending, running, completed, failed
+    chunks_total = Column(Integer, nullable=False, default=0)
+    chunks_done = Column(Integer, nullable=False, default=0)
+    last_completed_date = Column(Date, nullable=True)  # checkpoint: end date of the last committed chunk
+    rows_written = Column(Integer, nullable=False, default=0)
+    alerts_created = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
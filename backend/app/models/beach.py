@@ -1,13 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
 
 class Beach(Base):
     __tablename__ = "beaches"
+    __table_args__ = (
+        Index("ix_beaches_name_id", "name", "id"),  # keyset pagination
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False, index=True)
+    name = Column(String, nullable=False)
     island = Column(String, nullable=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Date, Numeric, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class BeachCurrentState(Base):
+    """
+    Latest known risk and active alert count per beach, kept in step with
+    beach_daily_risks and alerts by the write paths.
+    """
+    __tablename__ = "beach_current_state"
+    __table_args__ = (
+        Index("ix_beach_current_state_risk_level", "risk_level"),
+    )
+
+    beach_id = Column(Integer, ForeignKey("beaches.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, nullable=True)  # date of the latest risk row, NULL before any
+    risk_level = Column(Integer, nullable=True)
+    raw_value = Column(Numeric(10, 4), nullable=True)
+    confidence = Column(Numeric(3, 2), nullable=True)
+    source = Column(String, nullable=True)
+    active_alerts = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Date, Numeric, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -6,10 +6,17 @@ from ..database import Base
 
 class BeachDailyRisk(Base):
     __tablename__ = "beach_daily_risks"
+    __table_args__ = (
+        UniqueConstraint("beach_id", "date", name="uq_beach_daily_risks_beach_id_date"),
+        Index("ix_beach_daily_risks_date_risk_level", "date", "risk_level"),
+        # Monthly partitions are managed by services/partitions.py
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    beach_id = Column(Integer, ForeignKey("beaches.id"), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    # The partition key has to be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    beach_id = Column(Integer, ForeignKey("beaches.id"), nullable=False)
+    date = Column(Date, primary_key=True)
     risk_level = Column(Integer, nullable=False, default=0)  # 0=none, 1=low, 2=medium, 3=high
     source = Column(String, nullable=True)  # e.g. "NOAA_SIR"
     raw_value = Column(Numeric(10, 4), nullable=True)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, Numeric, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class BeachRiskForecast(Base):
+    """
+    Drift forecast of risk for a beach, horizon days after the issue date.
+    Kept apart from beach_daily_risks so forecasts never overwrite or get
+    counted as observations.
+    """
+    __tablename__ = "beach_risk_forecasts"
+    __table_args__ = (
+        Index("ix_beach_risk_forecasts_beach_id_issued_on", "beach_id", "issued_on"),
+    )
+
+    issued_on = Column(Date, primary_key=True)
+    horizon = Column(Integer, primary_key=True)  # days ahead, 1..FORECAST_HORIZON_DAYS
+    beach_id = Column(Integer, ForeignKey("beaches.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, nullable=False)  # issued_on + horizon
+    risk_level = Column(Integer, nullable=False)
+    raw_value = Column(Numeric(10, 4), nullable=True)
+    confidence = Column(Numeric(3, 2), nullable=True)
+    particle_count = Column(Integer, nullable=False, default=0)  # particles reaching the beach that day
+    source = Column(String, nullable=False)  # FORECAST_D+<horizon>
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, Date, Numeric, ForeignKey, DateTime
+from sqlalchemy.orm import declared_attr
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class RiskRollupMixin:
+    """
+    Per-beach aggregate of beach_daily_risks over a calendar period,
+    maintained by services/risk_aggregates.py.
+    """
+
+    @declared_attr
+    def beach_id(cls):
+        return Column(Integer, ForeignKey("beaches.id"), primary_key=True)
+
+    period_start = Column(Date, primary_key=True)
+    days = Column(Integer, nullable=False, default=0)  # days with data in the period
+    max_risk_level = Column(Integer, nullable=False, default=0)
+    mean_risk_level = Column(Numeric(4, 2), nullable=True)
+    mean_raw_value = Column(Numeric(10, 4), nullable=True)
+    high_risk_days = Column(Integer, nullable=False, default=0)
+    # State for folding in one more day: running sums, and the latest day's
+    # values with the maximum before it, so re-ingesting that day swaps it
+    sum_risk_level = Column(Integer, nullable=False, default=0)
+    sum_raw_value = Column(Numeric(14, 4), nullable=False, default=0)
+    raw_days = Column(Integer, nullable=False, default=0)  # days with a raw_value
+    last_date = Column(Date, nullable=True)
+    last_risk_level = Column(Integer, nullable=True)
+    last_raw_value = Column(Numeric(10, 4), nullable=True)
+    prev_max_risk_level = Column(Integer, nullable=True)  # highest level before last_date
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class BeachRiskWeekly(RiskRollupMixin, Base):
+    __tablename__ = "beach_risk_weekly"  # periods start on Monday
+
+
+class BeachRiskMonthly(RiskRollupMixin, Base):
+    __tablename__ = "beach_risk_monthly"
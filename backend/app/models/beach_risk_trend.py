@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, Numeric, ForeignKey, DateTime, Index, Computed
+from sqlalchemy.sql import func
+from ..database import Base
+
+# Least-squares slope of risk_level against day number over the 7-day window
+SLOPE_7_SQL = (
+    "CASE WHEN n_7 >= 2 THEN round((n_7 * sum_xy_7 - sum_x_7 * sum_7)::numeric"
+    " / nullif(n_7 * sum_xx_7 - sum_x_7 * sum_x_7, 0), 4) END"
+)
+
+
+class BeachRiskTrend(Base):
+    """
+    Rolling risk statistics per beach up to its latest risk day: the current
+    streak at or above PERSISTENT_RISK_LEVEL and running sums over the last
+    7 and 30 days, from which Postgres derives the averages and slope.
+    Advanced one day at a time by services.risk_trends.
+    """
+    __tablename__ = "beach_risk_trends"
+    __table_args__ = (
+        Index("ix_beach_risk_trends_streak_days", "streak_days"),
+        Index("ix_beach_risk_trends_slope_7", "slope_7"),
+    )
+
+    beach_id = Column(Integer, ForeignKey("beaches.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, nullable=False)  # last day folded in
+    risk_level = Column(Integer, nullable=False)
+    streak_days = Column(Integer, nullable=False, default=0)  # consecutive days >= PERSISTENT_RISK_LEVEL
+    prev_streak_days = Column(Integer, nullable=False, default=0)  # the streak up to the day before, for re-ingestion
+    # Days present, sum of levels and, for the slope, sums of x, x^2 and x * level
+    # with x the day number since 2000-01-01
+    n_7 = Column(Integer, nullable=False, default=0)
+    sum_7 = Column(Integer, nullable=False, default=0)
+    sum_x_7 = Column(BigInteger, nullable=False, default=0)
+    sum_xx_7 = Column(BigInteger, nullable=False, default=0)
+    sum_xy_7 = Column(BigInteger, nullable=False, default=0)
+    n_30 = Column(Integer, nullable=False, default=0)
+    sum_30 = Column(Integer, nullable=False, default=0)
+    avg_7 = Column(Numeric(4, 2), Computed("round(sum_7::numeric / nullif(n_7, 0), 2)"))
+    avg_30 = Column(Numeric(4, 2), Computed("round(sum_30::numeric / nullif(n_30, 0), 2)"))
+    slope_7 = Column(Numeric(6, 4), Computed(SLOPE_7_SQL))  # risk levels per day
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Date, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class DailyRiskSummary(Base):
+    __tablename__ = "daily_risk_summary"
+
+    date = Column(Date, primary_key=True)
+    total_beaches = Column(Integer, nullable=False, default=0)
+    no_risk = Column(Integer, nullable=False, default=0)
+    low_risk = Column(Integer, nullable=False, default=0)
+    medium_risk = Column(Integer, nullable=False, default=0)
+    high_risk = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
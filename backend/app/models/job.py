@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, JSON
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String, nullable=False, index=True)  # e.g. "simulate_ingestion", "backfill"
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, succeeded, failed
+    params = Column(JSON, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)  # 0-1
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    worker_id = Column(String, nullable=True)  # process running the job
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # refreshed while it runs
+
+    @property
+    def duration_seconds(self):
+        if not self.started_at:
+            return None
+        end = self.finished_at
+        if end is None:
+            end = datetime.now(timezone.utc)
+        return round((end - self.started_at).total_seconds(), 3)
@@ -1,14 +1,17 @@
-from sqlalchemy import Column, Integer, String, Date, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Date, Text, DateTime, JSON, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
 
 class SatLayer(Base):
     __tablename__ = "sat_layers"
+    __table_args__ = (
+        Index("ix_sat_layers_date_id", "date", "id"),  # keyset pagination
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source = Column(String, nullable=False, index=True)  # e.g. "NOAA_SIR", "USF_SAWS"
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, nullable=False)
     description = Column(Text, nullable=True)
     data_type = Column(String, nullable=True)  # e.g. "risk_raster", "density_map"
     url_or_path = Column(Text, nullable=True)
@@ -5,8 +5,12 @@ from .tasks import router as tasks_router
 from .ai import router as ai_router
 from .risk import router as risk_router
 from .sat_layers import router as sat_layers_router
+from .jobs import router as jobs_router
+from .dashboard import router as dashboard_router
+from .map import router as map_router
 
 __all__ = [
     "auth_router", "beaches_router", "campaigns_router", 
-    "tasks_router", "ai_router", "risk_router", "sat_layers_router"
+    "tasks_router", "ai_router", "risk_router", "sat_layers_router",
+    "jobs_router", "dashboard_router", "map_router"
 ]
@@ -1,19 +1,79 @@
-from fastapi import APIRouter, Depends
+import json
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from ..schemas.ai import ChatRequest, ChatResponse
-from ..services.ai import AIService
+from ..schemas.ai import AIProviderStatus, ChatRequest, ChatResponse, ResponseCacheStats
+from ..services.ai import AIService, response_cache
+from ..services.ai_client import ai_status
 from ..database import get_db
 
 router = APIRouter(tags=["AI Assistant"])
 
 
+async def sse_events(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Frame reply pieces as server-sent events: one `data: {"delta": ...}`
+    event per piece, then `event: done`.
+    """
+    async for delta in chunks:
+        yield f"data: {json.dumps({'delta': delta})}\n\n"
+    yield "event: done\ndata: {}\n\n"
+
+
+async def stream_chat_response(message: str, db: Session) -> StreamingResponse:
+    chunks = await AIService.stream_response(message=message, db=db)
+    return StreamingResponse(
+        sse_events(chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/ai/chat", response_model=ChatResponse)
-def chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(
+    request: ChatRequest,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     AI Chat endpoint.
     Accepts user messages and returns AI-generated responses.
-    Uses OpenAI if OPENAI_API_KEY is set, otherwise returns a stub.
+    Uses the AI_PROVIDER model when available, otherwise a rule-based reply or stub.
     Includes real-time risk data context for risk-related questions.
+    Sending `Accept: text/event-stream` streams the reply as /ai/chat/stream does.
     """
-    response = AIService.generate_response(message=request.message, db=db)
+    if accept and "text/event-stream" in accept:
+        return await stream_chat_response(request.message, db)
+    response = await AIService.generate_response(message=request.message, db=db)
     return ChatResponse(assistant=response)
+
+
+@router.post("/ai/chat/stream")
+async def chat_stream(request: ChatRequest, db: Session = Depends(get_db)):
+    """
+    Streaming AI chat.
+    Returns server-sent events carrying the reply as it is generated:
+    `data: {"delta": "..."}` for each piece, then `event: done`.
+    Stub and fallback replies arrive the same way.
+    """
+    return await stream_chat_response(request.message, db)
+
+
+@router.get("/ai/cache/stats", response_model=ResponseCacheStats)
+def cache_stats():
+    """
+    Reply cache counters: hit rate, and the model time saved by serving
+    cached replies (each hit counts the latency of the call that made it).
+    """
+    return response_cache.stats()
+
+
+@router.get("/ai/status", response_model=AIProviderStatus)
+def provider_status():
+    """
+    The model provider in use and the state of its circuit breaker, rate
+    limiter and concurrency limit. While the breaker is open chat answers
+    come from the rule-based fallback.
+    """
+    return ai_status()
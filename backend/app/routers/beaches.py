@@ -1,25 +1,85 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..schemas.beach import BeachCreate, BeachUpdate, BeachRead
+from ..schemas.beach import BeachCreate, BeachUpdate, BeachRead, BeachDetail, NearbyBeach
+from ..schemas.beach_risk import RiskTrend
+from ..schemas.pagination import Page
 from ..models.beach import Beach
+from ..services.spatial_index import beach_index, parse_bbox
+from ..services.pagination import keyset_paginate, CursorError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..services.risk_helpers import get_beach_trend
 
 router = APIRouter(tags=["Beaches"])
 
 
-@router.get("/beaches", response_model=List[BeachRead])
-def get_beaches(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    beaches = db.query(Beach).offset(skip).limit(limit).all()
-    return beaches
+@router.get("/beaches", response_model=Page[BeachRead])
+def get_beaches(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    island: Optional[str] = Query(None),
+    min_tourism_importance: Optional[int] = Query(None, ge=0, le=5),
+    db: Session = Depends(get_db)
+):
+    """
+    List beaches by name, one page at a time.
+    Pass next_cursor back as cursor for the following page.
+    """
+    query = db.query(Beach)
+    if bbox:
+        try:
+            min_lon, min_lat, max_lon, max_lat = parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        beach_index.ensure_loaded(db)
+        ids = beach_index.within_bbox(min_lon, min_lat, max_lon, max_lat)
+        if not ids:
+            return Page(items=[])
+        query = query.filter(Beach.id.in_(ids))
+    if island:
+        query = query.filter(Beach.island == island)
+    if min_tourism_importance is not None:
+        query = query.filter(Beach.tourism_importance >= min_tourism_importance)
+    
+    try:
+        beaches, next_cursor = keyset_paginate(query, Beach.name, Beach.id, limit=limit, cursor=cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Page(items=beaches, next_cursor=next_cursor)
+
+
+@router.get("/beaches/nearby", response_model=List[NearbyBeach])
+def get_nearby_beaches(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=500),
+    limit: int = Query(50, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Get beaches within radius_km of a point, nearest first.
+    """
+    beach_index.ensure_loaded(db)
+    matches = beach_index.nearby(lat, lon, radius_km, limit=limit)
+    if not matches:
+        return []
+    
+    beaches = {b.id: b for b in db.query(Beach).filter(Beach.id.in_([m[0] for m in matches])).all()}
+    return [
+        NearbyBeach.model_validate(beaches[beach_id]).model_copy(update={"distance_km": round(distance, 3)})
+        for beach_id, distance in matches
+        if beach_id in beaches
+    ]
 
 
-@router.get("/beaches/{beach_id}", response_model=BeachRead)
+@router.get("/beaches/{beach_id}", response_model=BeachDetail)
 def get_beach(beach_id: int, db: Session = Depends(get_db)):
     beach = db.query(Beach).filter(Beach.id == beach_id).first()
     if not beach:
         raise HTTPException(status_code=404, detail="Beach not found")
-    return beach
+    trend = get_beach_trend(db, beach_id)
+    return BeachDetail.model_validate(beach).model_copy(update={"trend": RiskTrend(**trend) if trend else None})
 
 
 @router.post("/beaches", response_model=BeachRead, status_code=status.HTTP_201_CREATED)
@@ -28,6 +88,7 @@ def create_beach(beach: BeachCreate, db: Session = Depends(get_db)):
     db.add(db_beach)
     db.commit()
     db.refresh(db_beach)
+    beach_index.upsert(db_beach.id, db_beach.latitude, db_beach.longitude)
     return db_beach
 
 
@@ -43,6 +104,7 @@ def update_beach(beach_id: int, beach: BeachUpdate, db: Session = Depends(get_db
     
     db.commit()
     db.refresh(db_beach)
+    beach_index.upsert(db_beach.id, db_beach.latitude, db_beach.longitude)
     return db_beach
 
 
@@ -54,4 +116,5 @@ def delete_beach(beach_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_beach)
     db.commit()
+    beach_index.remove(beach_id)
     return None
@@ -1,17 +1,43 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..schemas.campaign import CampaignCreate, CampaignUpdate, CampaignRead
+from ..schemas.pagination import Page
 from ..models.campaign import Campaign
+from ..services.pagination import keyset_paginate, CursorError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(tags=["Campaigns"])
 
 
-@router.get("/campaigns", response_model=List[CampaignRead])
-def get_campaigns(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    campaigns = db.query(Campaign).offset(skip).limit(limit).all()
-    return campaigns
+@router.get("/campaigns", response_model=Page[CampaignRead])
+def get_campaigns(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[str] = Query(None, description="planned, active or completed"),
+    active_on: Optional[date] = Query(None, description="Campaigns running on this day"),
+    db: Session = Depends(get_db)
+):
+    """
+    List campaigns by start date (undated last), one page at a time.
+    Pass next_cursor back as cursor for the following page.
+    """
+    query = db.query(Campaign)
+    if status:
+        query = query.filter(Campaign.status == status)
+    if active_on:
+        query = query.filter(
+            Campaign.start_date <= active_on,
+            or_(Campaign.end_date.is_(None), Campaign.end_date >= active_on)
+        )
+    
+    try:
+        campaigns, next_cursor = keyset_paginate(query, Campaign.start_date, Campaign.id, limit=limit, cursor=cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Page(items=campaigns, next_cursor=next_cursor)
 
 
 @router.get("/campaigns/{campaign_id}", response_model=CampaignRead)
@@ -0,0 +1,23 @@
+from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..services.dashboard import get_dashboard
+
+router = APIRouter(tags=["Dashboard"])
+
+
+@router.get("/dashboard")
+def dashboard(
+    target_date: Optional[date] = Query(None, description="Defaults to today"),
+    priority_limit: int = Query(5, ge=0, le=50, description="High-risk beaches to list"),
+    alert_limit: int = Query(5, ge=0, le=50, description="Active alerts to list"),
+    beach_limit: int = Query(8, ge=0, le=100, description="Beaches to list"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get every dashboard KPI in one payload, computed in a single database
+    round-trip and cached until risk, alert, beach, task or campaign data changes.
+    """
+    return get_dashboard(db, target_date, priority_limit, alert_limit, beach_limit)
@@ -0,0 +1,43 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from ..database import get_db
+from ..schemas.job import JobRead, JobList
+from ..models.job import Job
+
+router = APIRouter(tags=["Jobs"])
+
+
+@router.get("/jobs", response_model=JobList)
+def list_jobs(
+    limit: int = Query(20, le=100),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    job_type: Optional[str] = Query(None, description="Filter by job type"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get recent background jobs, newest first.
+    """
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    
+    jobs = query.order_by(desc(Job.id)).limit(limit).all()
+    return {
+        "count": len(jobs),
+        "jobs": jobs
+    }
+
+
+@router.get("/jobs/{job_id}", response_model=JobRead)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Get state, progress and duration of a background job.
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
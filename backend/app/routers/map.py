@@ -0,0 +1,34 @@
+from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..services.map_layer import get_map_features, MAX_ZOOM
+from ..services.spatial_index import parse_bbox
+
+router = APIRouter(tags=["Map"])
+
+
+@router.get("/map/beaches.geojson")
+def get_beaches_geojson(
+    target_date: Optional[date] = Query(None, alias="date", description="Risk date, defaults to each beach's latest"),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(MAX_ZOOM, ge=0, le=MAX_ZOOM, description="Map zoom; low zooms return clusters"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get beaches with their current risk level, or their level on a date, as
+    a GeoJSON FeatureCollection.
+    At low zoom nearby beaches are merged into cluster features carrying
+    point_count, max_risk_level and the zoom at which they split.
+    """
+    bounds = None
+    if bbox:
+        try:
+            bounds = parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    collection = get_map_features(db, target_date, zoom, bounds)
+    return JSONResponse(collection, media_type="application/geo+json")
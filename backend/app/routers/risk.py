@@ -1,55 +1,177 @@
 from typing import List, Optional
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from ..database import get_db, Base, engine
-from ..schemas.beach_risk import BeachRiskHistory, RiskDataPoint, HighRiskBeach
+from ..database import get_db, Base, engine, SessionLocal
+from ..schemas.beach_risk import BeachRiskHistory, RiskDataPoint, HighRiskBeach, RiskTrend
 from ..schemas.alert import AlertRead
+from ..schemas.job import JobQueued
 from ..services.risk_helpers import (
     get_high_risk_beaches_for_date,
     get_beach_risk_timeseries,
-    get_recent_alerts,
-    get_risk_summary
+    get_risk_timeseries_columns,
+    get_alerts_page,
+    get_risk_summary,
+    get_forecast_high_risk_beaches,
+    get_forecast_risk_summary,
+    get_beach_forecast,
+    get_beach_trend,
+    get_risk_trends,
+    pick_resolution,
+    period_count,
+    TIMESERIES_FIELDS
+)
+from ..services.jobs import enqueue_job
+from ..services.pagination import CursorError
+from ..services.partitions import list_risk_partitions, ensure_future_partitions, RETENTION_ACTIONS
+from ..services.risk_import import (
+    RiskImporter, RowParser, RiskImportError, aiter_lines, IMPORT_BATCH_SIZE
 )
-from ..services.risk_ingestion import update_beach_risk_for_date, simulate_historical_data
 
 router = APIRouter(tags=["Risk"])
 
+# Bounds on a single /risk/timeseries request
+MAX_TIMESERIES_BEACHES = 500
+MAX_TIMESERIES_POINTS = 400
+
+# Longest forecast horizon a request may ask for or run
+MAX_FORECAST_HORIZON = 14
+
+
+def parse_id_list(value: str) -> List[int]:
+    """
+    Parse a comma-separated list of ids, dropping duplicates but keeping order.
+    """
+    try:
+        ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise ValueError("beach_ids must be a comma-separated list of integers")
+    return list(dict.fromkeys(ids))
+
 
 @router.get("/risk/beach/{beach_id}", response_model=BeachRiskHistory)
 def get_beach_risk_history(
     beach_id: int,
     start_date: Optional[date] = Query(None, description="Start date for history"),
     end_date: Optional[date] = Query(None, description="End date for history"),
+    resolution: str = Query("auto", description="auto, daily, weekly or monthly"),
+    horizon: int = Query(0, ge=0, le=MAX_FORECAST_HORIZON, description="Also return this many forecast days"),
     db: Session = Depends(get_db)
 ):
     """
     Get risk history for a specific beach.
     Defaults to last 14 days if no dates provided.
+    resolution=auto picks daily, weekly or monthly points from the span.
+    With horizon > 0 the latest drift forecast is added as daily points.
+    trend holds the beach's streak, moving averages and 7-day slope.
     """
     if not end_date:
         end_date = date.today()
     if not start_date:
         start_date = end_date - timedelta(days=14)
+    try:
+        resolution = pick_resolution(start_date, end_date, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    data = get_beach_risk_timeseries(db, beach_id, start_date, end_date, resolution)
     
-    data = get_beach_risk_timeseries(db, beach_id, start_date, end_date)
+    forecast = get_beach_forecast(db, beach_id, horizon) if horizon else None
+    trend = get_beach_trend(db, beach_id)
     
     return BeachRiskHistory(
         beach_id=beach_id,
-        data=[RiskDataPoint(**d) for d in data]
+        resolution=resolution,
+        data=[RiskDataPoint(**d) for d in data],
+        forecast=[RiskDataPoint(**d) for d in forecast] if forecast is not None else None,
+        trend=RiskTrend(**trend) if trend else None
     )
 
 
+@router.get("/risk/timeseries")
+def get_risk_timeseries(
+    beach_ids: str = Query(..., description="Comma-separated beach ids"),
+    start: Optional[date] = Query(None, description="First day (defaults to 14 days before end)"),
+    end: Optional[date] = Query(None, description="Last day (defaults to today)"),
+    include: Optional[str] = Query(
+        None,
+        description="Extra series: raw_value,confidence (daily) or raw_value,mean_risk_level,high_risk_days (rollups)"
+    ),
+    resolution: str = Query("auto", description="auto, daily, weekly or monthly"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get risk history for several beaches in one request.
+    Returns a shared dates array and, per beach, a risk_level array aligned
+    with it (null for periods without data), plus the extra series requested
+    via include. resolution=auto picks daily, weekly or monthly periods from
+    the span; rollup periods report the maximum risk_level and mean raw_value.
+    """
+    try:
+        ids = parse_id_list(beach_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not ids:
+        raise HTTPException(status_code=400, detail="beach_ids is required")
+    if len(ids) > MAX_TIMESERIES_BEACHES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TIMESERIES_BEACHES} beach_ids per request")
+    
+    if not end:
+        end = date.today()
+    if not start:
+        start = end - timedelta(days=14)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    try:
+        resolution = pick_resolution(start, end, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if period_count(start, end, resolution) > MAX_TIMESERIES_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_TIMESERIES_POINTS} {resolution} points per request; use a coarser resolution"
+        )
+    
+    fields = [f.strip() for f in include.split(",") if f.strip()] if include else []
+    unknown = set(fields) - set(TIMESERIES_FIELDS[resolution])
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include field(s) for {resolution} resolution: {', '.join(sorted(unknown))}"
+        )
+    
+    # Already plain JSON types; skip per-value encoding of the arrays
+    return JSONResponse(get_risk_timeseries_columns(db, ids, start, end, fields, resolution))
+
+
 @router.get("/risk/high")
 def get_high_risk_beaches(
     target_date: Optional[date] = Query(None, description="Date to check (defaults to today)"),
     min_risk_level: int = Query(2, description="Minimum risk level (0-3)"),
+    horizon: int = Query(0, ge=0, le=MAX_FORECAST_HORIZON, description="Days ahead, from the latest drift forecast"),
     db: Session = Depends(get_db)
 ):
     """
     Get beaches with risk level >= threshold for a given date.
+    With horizon > 0, beaches forecast at that risk horizon days after the
+    latest drift forecast was issued.
     """
+    if horizon:
+        if target_date:
+            raise HTTPException(status_code=400, detail="Pass either target_date or horizon, not both")
+        forecast = get_forecast_high_risk_beaches(db, horizon, min_risk_level)
+        return {
+            "date": forecast["date"],
+            "issued_on": forecast["issued_on"],
+            "horizon": horizon,
+            "min_risk_level": min_risk_level,
+            "count": len(forecast["beaches"]),
+            "beaches": forecast["beaches"]
+        }
+    
     if not target_date:
         target_date = date.today()
     
@@ -66,69 +188,237 @@ def get_high_risk_beaches(
 @router.get("/risk/summary")
 def get_risk_overview(
     target_date: Optional[date] = Query(None),
+    horizon: int = Query(0, ge=0, le=MAX_FORECAST_HORIZON, description="Days ahead, from the latest drift forecast"),
     db: Session = Depends(get_db)
 ):
     """
     Get summary of risk levels across all beaches.
     """
+    if horizon:
+        if target_date:
+            raise HTTPException(status_code=400, detail="Pass either target_date or horizon, not both")
+        return get_forecast_risk_summary(db, horizon)
     return get_risk_summary(db, target_date)
 
 
+@router.get("/risk/trends")
+def get_risk_trend_list(
+    persistent_only: bool = Query(False, description="Only beaches with a PERSISTENT_RISK-length streak"),
+    rising_only: bool = Query(False, description="Only beaches whose 7-day slope counts as rising"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Get per-beach streaks, 7- and 30-day moving averages and 7-day slopes,
+    steepest rise first.
+    """
+    beaches = get_risk_trends(db, persistent_only, rising_only, limit)
+    return {
+        "count": len(beaches),
+        "beaches": beaches
+    }
+
+
 @router.get("/alerts")
 def list_alerts(
-    limit: int = Query(20, le=100),
+    limit: int = Query(20, ge=1, le=100),
     active_only: bool = Query(True),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    alert_type: Optional[str] = Query(None, description="e.g. HIGH_RISK"),
+    beach_id: Optional[int] = Query(None),
+    created_from: Optional[date] = Query(None, description="Created on or after this day"),
+    created_to: Optional[date] = Query(None, description="Created on or before this day"),
     db: Session = Depends(get_db)
 ):
     """
-    Get recent alerts.
+    Get alerts, newest first, one page at a time.
+    Pass next_cursor back as cursor for the following page.
     """
-    alerts = get_recent_alerts(db, limit, active_only)
+    try:
+        page = get_alerts_page(db, limit, active_only, cursor, alert_type, beach_id, created_from, created_to)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
-        "count": len(alerts),
-        "alerts": alerts
+        "count": len(page["alerts"]),
+        "alerts": page["alerts"],
+        "next_cursor": page["next_cursor"]
     }
 
 
-@router.post("/risk/simulate-ingestion")
+@router.post("/risk/simulate-ingestion", response_model=JobQueued, status_code=status.HTTP_202_ACCEPTED)
 def simulate_risk_ingestion(
-    days: int = Query(14, le=30, description="Number of days to simulate"),
+    days: int = Query(14, ge=1, le=3650, description="Number of days to simulate"),
+    bulk: bool = Query(False, description="Use the chunked, resumable backfill engine"),
     db: Session = Depends(get_db)
 ):
     """
     DEV ONLY: Generate synthetic risk data for testing.
     Simulates satellite data ingestion for the past N days.
     Also creates sample beaches if none exist.
+    More than 30 days requires bulk=true.
+    Runs as a background job; poll GET /jobs/{job_id} for the result.
     """
+    if not bulk and days > 30:
+        raise HTTPException(status_code=400, detail="Simulating more than 30 days requires bulk=true")
+    
     try:
         # Ensure tables exist
         Base.metadata.create_all(bind=engine)
         
-        result = simulate_historical_data(db, days)
-        return {
-            "status": "success",
-            "message": f"Simulated {days} days of risk data",
-            **result
-        }
+        job = enqueue_job(db, "simulate_ingestion", {"days": days, "bulk": bulk})
+        return JobQueued(status=job.status, job_id=job.id, job_type=job.job_type)
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to simulate data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue simulation: {str(e)}")
 
 
-@router.post("/risk/update-today")
-def update_today_risk(db: Session = Depends(get_db)):
+@router.post("/risk/backfill", response_model=JobQueued, status_code=status.HTTP_202_ACCEPTED)
+def backfill_risk(
+    start_date: date = Query(..., description="First day to backfill"),
+    end_date: Optional[date] = Query(None, description="Last day to backfill (defaults to today)"),
+    chunk_days: Optional[int] = Query(None, ge=1, le=366, description="Days per chunk/transaction"),
+    db: Session = Depends(get_db)
+):
+    """
+    DEV ONLY: Backfill synthetic risk data for a date range.
+    Re-running the same range resumes an interrupted backfill.
+    Runs as a background job; poll GET /jobs/{job_id} for progress.
+    """
+    if not end_date:
+        end_date = date.today()
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    
+    job = enqueue_job(db, "backfill", {
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "chunk_days": chunk_days
+    })
+    return JobQueued(status=job.status, job_id=job.id, job_type=job.job_type)
+
+
+@router.post("/risk/forecast", response_model=JobQueued, status_code=status.HTTP_202_ACCEPTED)
+def run_forecast(
+    horizon_days: Optional[int] = Query(None, ge=1, le=MAX_FORECAST_HORIZON, description="Days to forecast (defaults to settings)"),
+    particles: Optional[int] = Query(None, ge=1000, le=20_000_000, description="Particles to advect (defaults to settings)"),
+    field_layer_id: Optional[int] = Query(None, description="drift_field layer (defaults to the newest)"),
+    seed_layer_id: Optional[int] = Query(None, description="density_map layer to seed from (defaults to the newest)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Run a drift forecast issued today, replacing today's earlier forecast.
+    Results are served with horizon on /risk/high, /risk/summary and
+    /risk/beach/{id}.
+    Runs as a background job; poll GET /jobs/{job_id} for the result.
+    """
+    job = enqueue_job(db, "drift_forecast", {
+        "horizon_days": horizon_days,
+        "particles": particles,
+        "field_layer_id": field_layer_id,
+        "seed_layer_id": seed_layer_id
+    })
+    return JobQueued(status=job.status, job_id=job.id, job_type=job.job_type)
+
+
+@router.post("/risk/update-today", response_model=JobQueued, status_code=status.HTTP_202_ACCEPTED)
+def update_today_risk(
+    bulk: bool = Query(False, description="Use the set-based bulk upsert path"),
+    db: Session = Depends(get_db)
+):
     """
     DEV ONLY: Update risk data for today.
+    Runs as a background job; poll GET /jobs/{job_id} for the result.
     """
+    job = enqueue_job(db, "update_today", {"bulk": bulk})
+    return JobQueued(status=job.status, job_id=job.id, job_type=job.job_type)
+
+
+def _load_lines(importer: RiskImporter, parser: RowParser, lines: List[str]) -> None:
+    rows = parser.parse_lines(lines)
+    if rows:
+        importer.load_batch(rows)
+
+
+@router.post("/risk/import")
+async def import_risk_observations(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (defaults from Content-Type)"),
+    source: str = Query("IMPORT", description="Source for rows that do not set one"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=100, le=50000)
+):
+    """
+    Stream a CSV or NDJSON body of observations into daily risk.
+    Each row needs beach_id (or latitude/longitude), date and raw_value;
+    confidence, risk_level and source are optional.
+    The body is read incrementally and every full batch of lines is parsed
+    and loaded, off the event loop, before more is read, so memory stays
+    flat and slow loads push back on the client.
+    """
+    if not format:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if ("ndjson" in content_type or "jsonl" in content_type) else "csv"
+    try:
+        parser = RowParser(format)
+    except RiskImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    db = SessionLocal()
     try:
-        result = update_beach_risk_for_date(db, date.today())
+        importer = await run_in_threadpool(RiskImporter, db, source)
+        lines = []
+        async for line in aiter_lines(request.stream()):
+            lines.append(line)
+            if len(lines) >= batch_size:
+                await run_in_threadpool(_load_lines, importer, parser, lines)
+                lines = []
+        if lines:
+            await run_in_threadpool(_load_lines, importer, parser, lines)
         return {
             "status": "success",
-            **result
+            **importer.finish()
         }
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 text")
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to update: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to import: {str(e)}")
+    finally:
+        db.close()
+
+
+@router.get("/risk/partitions")
+def get_risk_partitions(db: Session = Depends(get_db)):
+    """
+    List the monthly partitions of beach_daily_risks.
+    """
+    partitions = list_risk_partitions(db)
+    return {
+        "count": len(partitions),
+        "partitions": partitions
+    }
+
+
+@router.post("/risk/partitions/maintain", response_model=JobQueued, status_code=status.HTTP_202_ACCEPTED)
+def maintain_partitions(
+    months_ahead: Optional[int] = Query(None, ge=0, le=24, description="Months to create ahead (defaults to settings)"),
+    retention_months: Optional[int] = Query(None, ge=0, description="Months of history to keep; 0 keeps all"),
+    retention_action: Optional[str] = Query(None, description="detach or drop partitions past retention"),
+    db: Session = Depends(get_db)
+):
+    """
+    Create upcoming risk partitions and retire those past retention.
+    Runs as a background job; poll GET /jobs/{job_id} for the result.
+    """
+    if retention_action and retention_action not in RETENTION_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"retention_action must be one of {', '.join(RETENTION_ACTIONS)}")
+    
+    job = enqueue_job(db, "risk_partition_maintenance", {
+        "months_ahead": months_ahead,
+        "retention_months": retention_months,
+        "retention_action": retention_action
+    })
+    return JobQueued(status=job.status, job_id=job.id, job_type=job.job_type)
 
 
 @router.post("/risk/init-tables")
@@ -138,6 +428,8 @@ def init_tables(db: Session = Depends(get_db)):
     """
     try:
         Base.metadata.create_all(bind=engine)
+        ensure_future_partitions(db)
+        db.commit()
         return {"status": "success", "message": "Tables created"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create tables: {str(e)}")
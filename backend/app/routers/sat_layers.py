@@ -1,22 +1,74 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..schemas.sat_layer import SatLayerRead
+from ..schemas.sat_layer import SatLayerCreate, SatLayerRead
+from ..schemas.pagination import Page
+from ..schemas.job import JobQueued
 from ..models.sat_layer import SatLayer
+from ..services.jobs import enqueue_job
+from ..services.pagination import keyset_paginate, CursorError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(tags=["Satellite Layers"])
 
 
-@router.get("/sat-layers", response_model=List[SatLayerRead])
+@router.get("/sat-layers", response_model=Page[SatLayerRead])
 def get_sat_layers(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    source: Optional[str] = Query(None, description="e.g. NOAA_SIR"),
+    data_type: Optional[str] = Query(None, description="e.g. risk_raster"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
     db: Session = Depends(get_db)
 ):
     """
-    Get list of available satellite layers.
+    Get list of available satellite layers, newest first, one page at a time.
+    Pass next_cursor back as cursor for the following page.
     """
-    layers = db.query(SatLayer).order_by(SatLayer.date.desc()).offset(skip).limit(limit).all()
-    return layers
+    query = db.query(SatLayer)
+    if source:
+        query = query.filter(SatLayer.source == source)
+    if data_type:
+        query = query.filter(SatLayer.data_type == data_type)
+    if date_from:
+        query = query.filter(SatLayer.date >= date_from)
+    if date_to:
+        query = query.filter(SatLayer.date <= date_to)
+    
+    try:
+        layers, next_cursor = keyset_paginate(
+            query, SatLayer.date, SatLayer.id, limit=limit, cursor=cursor, descending=True
+        )
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Page(items=layers, next_cursor=next_cursor)
 
+
+@router.post("/sat-layers", response_model=SatLayerRead, status_code=status.HTTP_201_CREATED)
+def create_sat_layer(layer: SatLayerCreate, db: Session = Depends(get_db)):
+    """
+    Register a satellite layer, e.g. a local risk_raster file.
+    """
+    db_layer = SatLayer(**layer.model_dump())
+    db.add(db_layer)
+    db.commit()
+    db.refresh(db_layer)
+    return db_layer
+
+
+@router.post("/sat-layers/{layer_id}/ingest", response_model=JobQueued, status_code=status.HTTP_202_ACCEPTED)
+def ingest_layer(layer_id: int, db: Session = Depends(get_db)):
+    """
+    Sample a risk_raster layer at every beach and store the values as
+    daily risk for the layer's date. Runs as a background job.
+    """
+    layer = db.query(SatLayer).filter(SatLayer.id == layer_id).first()
+    if not layer:
+        raise HTTPException(status_code=404, detail="Satellite layer not found")
+    if layer.data_type != "risk_raster":
+        raise HTTPException(status_code=400, detail="Only risk_raster layers can be ingested")
+    
+    job = enqueue_job(db, "sat_layer_ingest", {"layer_id": layer_id})
+    return JobQueued(status=job.status, job_id=job.id, job_type=job.job_type)
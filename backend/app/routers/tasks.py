@@ -1,17 +1,48 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..schemas.task import TaskCreate, TaskUpdate, TaskRead
+from ..schemas.pagination import Page
 from ..models.task import Task
+from ..services.pagination import keyset_paginate, CursorError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(tags=["Tasks"])
 
 
-@router.get("/tasks", response_model=List[TaskRead])
-def get_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    tasks = db.query(Task).offset(skip).limit(limit).all()
-    return tasks
+@router.get("/tasks", response_model=Page[TaskRead])
+def get_tasks(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[str] = Query(None, description="planned, in_progress or completed"),
+    campaign_id: Optional[int] = Query(None),
+    beach_id: Optional[int] = Query(None),
+    scheduled_from: Optional[date] = Query(None),
+    scheduled_to: Optional[date] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    List tasks by scheduled date (unscheduled last), one page at a time.
+    Pass next_cursor back as cursor for the following page.
+    """
+    query = db.query(Task)
+    if status:
+        query = query.filter(Task.status == status)
+    if campaign_id is not None:
+        query = query.filter(Task.campaign_id == campaign_id)
+    if beach_id is not None:
+        query = query.filter(Task.beach_id == beach_id)
+    if scheduled_from:
+        query = query.filter(Task.scheduled_date >= scheduled_from)
+    if scheduled_to:
+        query = query.filter(Task.scheduled_date <= scheduled_to)
+    
+    try:
+        tasks, next_cursor = keyset_paginate(query, Task.scheduled_date, Task.id, limit=limit, cursor=cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Page(items=tasks, next_cursor=next_cursor)
 
 
 @router.get("/tasks/{task_id}", response_model=TaskRead)
@@ -1,23 +1,27 @@
 from .user import UserBase, UserCreate, UserRead, Token, TokenData
-from .beach import BeachBase, BeachCreate, BeachRead, BeachUpdate
+from .beach import BeachBase, BeachCreate, BeachRead, BeachUpdate, NearbyBeach
 from .campaign import CampaignBase, CampaignCreate, CampaignRead, CampaignUpdate
 from .task import TaskBase, TaskCreate, TaskRead, TaskUpdate
-from .ai import ChatRequest, ChatResponse
+from .ai import ChatRequest, ChatResponse, AIProviderStatus, ResponseCacheStats
 from .sat_layer import SatLayerBase, SatLayerCreate, SatLayerRead
 from .beach_risk import (
     BeachDailyRiskBase, BeachDailyRiskCreate, BeachDailyRiskRead,
     RiskDataPoint, BeachRiskHistory, HighRiskBeach
 )
 from .alert import AlertBase, AlertCreate, AlertRead
+from .job import JobRead, JobList, JobQueued
+from .pagination import Page
 
 __all__ = [
     "UserBase", "UserCreate", "UserRead", "Token", "TokenData",
-    "BeachBase", "BeachCreate", "BeachRead", "BeachUpdate",
+    "BeachBase", "BeachCreate", "BeachRead", "BeachUpdate", "NearbyBeach",
     "CampaignBase", "CampaignCreate", "CampaignRead", "CampaignUpdate",
     "TaskBase", "TaskCreate", "TaskRead", "TaskUpdate",
-    "ChatRequest", "ChatResponse",
+    "ChatRequest", "ChatResponse", "AIProviderStatus", "ResponseCacheStats",
     "SatLayerBase", "SatLayerCreate", "SatLayerRead",
     "BeachDailyRiskBase", "BeachDailyRiskCreate", "BeachDailyRiskRead",
     "RiskDataPoint", "BeachRiskHistory", "HighRiskBeach",
-    "AlertBase", "AlertCreate", "AlertRead"
+    "AlertBase", "AlertCreate", "AlertRead",
+    "JobRead", "JobList", "JobQueued",
+    "Page"
 ]
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 
@@ -7,3 +8,25 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     assistant: str
+
+
+class AIProviderStatus(BaseModel):
+    provider: Optional[str] = None
+    breaker_state: str
+    consecutive_failures: int
+    times_opened: int
+    rate_limit_tokens: Optional[float] = None
+    in_flight: int
+
+
+class ResponseCacheStats(BaseModel):
+    enabled: bool
+    semantic: bool
+    entries: int
+    max_entries: int
+    hits: int
+    semantic_hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+    avg_miss_latency_seconds: Optional[float] = None
+    latency_saved_seconds: float
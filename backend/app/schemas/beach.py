@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
+from .beach_risk import RiskTrend
 
 
 class BeachBase(BaseModel):
@@ -31,3 +32,11 @@ class BeachRead(BeachBase):
 
     class Config:
         from_attributes = True
+
+
+class BeachDetail(BeachRead):
+    trend: Optional[RiskTrend] = None
+
+
+class NearbyBeach(BeachRead):
+    distance_km: Optional[float] = None
@@ -26,14 +26,36 @@ class BeachDailyRiskRead(BeachDailyRiskBase):
 
 
 class RiskDataPoint(BaseModel):
-    date: date
-    risk_level: int
+    date: date  # period start for weekly/monthly points
+    risk_level: int  # highest level in the period for weekly/monthly points
     source: Optional[str] = None
+    # Weekly/monthly rollups only
+    mean_risk_level: Optional[float] = None
+    mean_raw_value: Optional[float] = None
+    high_risk_days: Optional[int] = None
+    days: Optional[int] = None
+    # Drift forecast points only
+    horizon: Optional[int] = None
+    confidence: Optional[float] = None
+
+
+class RiskTrend(BaseModel):
+    date: date  # latest risk day folded in
+    risk_level: int
+    streak_days: int  # consecutive days at or above PERSISTENT_RISK_LEVEL
+    avg_7: Optional[float] = None
+    avg_30: Optional[float] = None
+    slope_7: Optional[float] = None  # risk levels per day
+    persistent: bool = False
+    rising: bool = False
 
 
 class BeachRiskHistory(BaseModel):
     beach_id: int
+    resolution: str = "daily"
     data: List[RiskDataPoint]
+    forecast: Optional[List[RiskDataPoint]] = None  # with horizon > 0
+    trend: Optional[RiskTrend] = None
 
 
 class HighRiskBeach(BaseModel):
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any, List
+
+
+class JobRead(BaseModel):
+    id: int
+    job_type: str
+    status: str  # queued, running, succeeded, failed
+    params: Optional[Any] = None
+    progress: float
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    worker_id: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobList(BaseModel):
+    count: int
+    jobs: List[JobRead]
+
+
+class JobQueued(BaseModel):
+    status: str
+    job_id: int
+    job_type: str
@@ -1,16 +1,35 @@
 from .auth import AuthService
 from .ai import AIService
-from .risk_ingestion import update_beach_risk_for_date, simulate_historical_data
+from .risk_ingestion import (
+    update_beach_risk_for_date,
+    bulk_update_beach_risk_for_date,
+    simulate_historical_data
+)
+from .risk_scoring import score_risk_batch, score_risk_grid
+from .backfill import run_backfill
+from .spatial_index import beach_index
+from .raster_sampling import ingest_sat_layer
+from .jobs import enqueue_job, register_job
 from .risk_helpers import (
     get_high_risk_beaches_for_date,
     get_beach_risk_timeseries,
-    get_recent_alerts,
-    get_risk_summary
+    get_risk_timeseries_columns,
+    pick_resolution,
+    get_risk_summary,
+    get_beach_trend,
+    get_risk_trends
 )
+from .dashboard import get_dashboard
+from .drift_forecast import run_drift_forecast
+from .risk_trends import refresh_risk_trends, rebuild_risk_trends
 
 __all__ = [
     "AuthService", "AIService",
-    "update_beach_risk_for_date", "simulate_historical_data",
-    "get_high_risk_beaches_for_date", "get_beach_risk_timeseries",
-    "get_recent_alerts", "get_risk_summary"
+    "update_beach_risk_for_date", "bulk_update_beach_risk_for_date",
+    "simulate_historical_data", "score_risk_batch", "score_risk_grid",
+    "run_backfill", "beach_index", "ingest_sat_layer", "enqueue_job", "register_job",
+    "get_high_risk_beaches_for_date", "get_beach_risk_timeseries", "get_risk_timeseries_columns",
+    "pick_resolution", "get_risk_summary", "get_dashboard",
+    "run_drift_forecast", "get_beach_trend", "get_risk_trends",
+    "refresh_risk_trends", "rebuild_risk_trends"
 ]
@@ -1,163 +1,397 @@
-from datetime import date, timedelta
-from typing import Optional
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date
+from typing import AsyncIterator, List, Optional, Tuple
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import httpx
-import json
 
 from ..config import settings
-from .risk_helpers import (
-    get_high_risk_beaches_for_date,
-    get_beach_risk_timeseries,
-    get_recent_alerts,
-    get_risk_summary
+from .cache import query_cache
+from .ai_client import AIUnavailable, ai_available, complete_chat, get_ai_client, stream_chat
+from .ai_context import CONTEXT_FAMILIES, build_prompt_context, get_risk_context_snapshot
+
+
+RISK_KEYWORDS = ['risk', 'alert', 'high', 'danger', 'priority', 'urgent',
+                 'sargassum level', 'which beach', 'worst', 'critical']
+
+SYSTEM_PROMPT = """You are an assistant helping Vincy GreenRoots plan sargassum operations. 
+You help with beach cleanup scheduling, campaign management, task coordination, and provide advice on sargassum management best practices.
+
+When discussing risk levels:
+- Level 0 = No risk
+- Level 1 = Low risk  
+- Level 2 = Medium risk (requires monitoring)
+- Level 3 = High risk (requires immediate attention)
+
+Always prioritize high-risk beaches for cleanup operations.
+"""
+
+
+# Words folded together before cached replies are looked up
+QUESTION_SYNONYMS = {
+    "beaches": "beach", "shore": "beach", "shores": "beach", "coast": "beach", "coastline": "beach",
+    "worst": "highest", "riskiest": "highest", "dirtiest": "highest",
+    "seaweed": "sargassum", "sargasso": "sargassum", "algae": "sargassum",
+    "danger": "risk", "dangerous": "risk", "risky": "risk",
+    "now": "today", "currently": "today", "tonight": "today",
+    "cleanups": "cleanup", "clean-up": "cleanup",
+}
+FILLER_WORDS = {"a", "an", "the", "is", "are", "please", "right", "s"}
+
+EMBEDDING_DIM = 512
+
+
+def normalize_question(message: str) -> str:
+    """
+    Fold case, punctuation, whitespace, filler words and synonyms so that
+    trivially different phrasings of a question share a cache entry.
+    """
+    words = re.sub(r"[^a-z0-9\- ]+", " ", message.lower().replace("'", " ")).split()
+    words = [QUESTION_SYNONYMS.get(word, word) for word in words]
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+def embed_question(normalized: str) -> np.ndarray:
+    """
+    Unit vector of hashed word, word-pair and character-trigram features.
+    Deterministic and local, so similarity lookups cost no model call.
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    words = normalized.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    for feature in features:
+        h = zlib.crc32(feature.encode())
+        vector[h % EMBEDDING_DIM] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of assistant replies with a TTL.
+    
+    Entries are keyed on the normalized question and a hash of the risk
+    context the model saw, and remember the context-family versions they
+    were made at: once any data in the context changes they are dropped
+    on their next lookup. With semantic lookups on, a miss falls back to
+    the most similar cached question under the same context, scanning a
+    vector index kept alongside the LRU.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: int = 900, enabled: bool = True,
+                 semantic: bool = False, similarity: float = 0.9):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.semantic = semantic
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        # key -> (reply, versions, expires, latency, vector)
+        self._entries: OrderedDict = OrderedDict()
+        self._index_keys: List[Tuple[str, str]] = []
+        self._index: Optional[np.ndarray] = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+        self._miss_latency = 0.0
+        self._stored = 0
+    
+    @staticmethod
+    def key_for(message: str, context: str) -> Tuple[str, str]:
+        return normalize_question(message), hashlib.sha1(context.encode()).hexdigest()
+    
+    def _live(self, key, entry, versions, now) -> bool:
+        if entry[1] == versions and entry[2] > now:
+            return True
+        del self._entries[key]
+        self._index = None
+        return False
+    
+    def get(self, key: Tuple[str, str], versions: Tuple[int, ...]) -> Optional[str]:
+        """
+        The reply cached for key at these context versions, or None.
+        Counts the lookup in the stats.
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._live(key, entry, versions, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.latency_saved += entry[3]
+                return entry[0]
+            if self.semantic:
+                match = self._nearest(key, versions, now)
+                if match is not None:
+                    entry = self._entries[match]
+                    self._entries.move_to_end(match)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    self.latency_saved += entry[3]
+                    return entry[0]
+            self.misses += 1
+            return None
+    
+    def _nearest(self, key, versions, now) -> Optional[Tuple[str, str]]:
+        if self._index is None:
+            self._index_keys = list(self._entries)
+            self._index = (np.stack([self._entries[k][4] for k in self._index_keys])
+                           if self._index_keys else np.zeros((0, EMBEDDING_DIM), dtype=np.float32))
+        if not len(self._index_keys):
+            return None
+        scores = self._index @ embed_question(key[0])
+        for i in np.argsort(scores)[::-1]:
+            if scores[i] < self.similarity:
+                return None
+            candidate = self._index_keys[i]
+            entry = self._entries.get(candidate)
+            if candidate[1] == key[1] and entry is not None and self._live(candidate, entry, versions, now):
+                return candidate
+        return None
+    
+    def set(self, key: Tuple[str, str], versions: Tuple[int, ...], reply: str, latency: float) -> None:
+        """
+        Store a reply made at these context versions that took latency
+        seconds to generate.
+        """
+        if not self.enabled:
+            return
+        vector = embed_question(key[0]) if self.semantic else None
+        with self._lock:
+            self._entries[key] = (reply, versions, time.monotonic() + self.ttl_seconds, latency, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._index = None
+            self._stored += 1
+            self._miss_latency += latency
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index = None
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "semantic": self.semantic,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "avg_miss_latency_seconds": round(self._miss_latency / self._stored, 3) if self._stored else None,
+            "latency_saved_seconds": round(self.latency_saved, 3)
+        }
+
+
+# Process-wide reply cache, configured from settings
+response_cache = ResponseCache(
+    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+    enabled=settings.AI_CACHE_ENABLED,
+    semantic=settings.AI_CACHE_SEMANTIC,
+    similarity=settings.AI_CACHE_SIMILARITY
 )
 
 
+class ChatPlan:
+    """
+    What a reply needs, gathered before any model call: the completion
+    messages (None when there is no model to ask), the rule-based text to
+    answer with if the model cannot, and the reply cache key and hit.
+    """
+    
+    def __init__(self, messages: Optional[List[dict]] = None, fallback: Optional[str] = None):
+        self.messages = messages
+        self.fallback = fallback
+        self.cache_key: Optional[Tuple[str, str]] = None
+        self.versions: Tuple[int, ...] = ()
+        self.cached_reply: Optional[str] = None
+
+
 class AIService:
     """
-    AI Service for OpenAI integration with risk data context.
+    AI Service for chat model integration with risk data context.
     """
     
     @staticmethod
     def get_risk_context(db: Session) -> str:
         """
-        Build context string with current risk data for the AI.
+        Get the risk context for the AI, or a note if it cannot be built.
+        Built from the precomputed snapshot and fitted to AI_CONTEXT_TOKEN_BUDGET.
         """
         try:
-            # Get today's risk summary
-            summary = get_risk_summary(db, date.today())
-            
-            # Get high risk beaches
-            high_risk = get_high_risk_beaches_for_date(db, date.today(), min_risk_level=2)
-            
-            # Get recent alerts
-            alerts = get_recent_alerts(db, limit=10)
-            
-            context = f"""
-CURRENT SARGASSUM RISK DATA (as of {date.today()}):
-
-Risk Summary:
-- Total monitored beaches: {summary.get('total_beaches', 0)}
-- High risk beaches: {summary.get('high_risk', 0)}
-- Medium risk beaches: {summary.get('medium_risk', 0)}
-- Low risk beaches: {summary.get('low_risk', 0)}
-- Active alerts: {summary.get('active_alerts', 0)}
-
-High/Medium Risk Beaches Today:
-"""
-            if high_risk:
-                for b in high_risk[:10]:
-                    risk_label = "HIGH" if b['risk_level'] == 3 else "MEDIUM"
-                    context += f"- {b['beach_name']}: {risk_label} risk\n"
-            else:
-                context += "- No high/medium risk beaches detected today\n"
-            
-            context += "\nRecent Alerts:\n"
-            if alerts:
-                for a in alerts[:5]:
-                    context += f"- [{a['alert_type']}] {a['beach_name']}: {a['message']}\n"
-            else:
-                context += "- No active alerts\n"
-            
-            return context
+            snapshot = get_risk_context_snapshot(db)
+            return build_prompt_context(snapshot, settings.AI_CONTEXT_TOKEN_BUDGET)
         except Exception as e:
             return f"\n[Unable to fetch current risk data: {str(e)}]\n"
     
     @staticmethod
-    def generate_response(message: str, db: Optional[Session] = None) -> str:
+    def risk_status_response(db: Session) -> str:
         """
-        Generate AI response using OpenAI if API key is available.
-        Includes risk data context for risk-related questions.
+        Rule-based risk status, used when the AI model is not available.
+        """
+        snapshot = get_risk_context_snapshot(db)
+        summary = snapshot["summary"] or {}
+        
+        response = "AI services are temporarily unavailable. Here's the current risk status:\n\n"
+        response += f"📊 **Risk Summary for {summary.get('date') or date.today()}:**\n"
+        response += f"- High risk beaches: {summary.get('high_risk', 0)}\n"
+        response += f"- Medium risk beaches: {summary.get('medium_risk', 0)}\n"
+        response += f"- Active alerts: {summary.get('active_alerts', 0)}\n\n"
+        
+        if snapshot["beaches"]:
+            response += "**Priority Beaches:**\n"
+            for b in snapshot["beaches"][:5]:
+                level = "🔴 HIGH" if b['risk_level'] == 3 else "🟠 MEDIUM"
+                response += f"- {b['beach_name']}: {level}\n"
+        
+        return response
+    
+    @staticmethod
+    def is_risk_related(message: str) -> bool:
+        return any(kw in message.lower() for kw in RISK_KEYWORDS)
+    
+    @staticmethod
+    def prepare_chat(message: str, db: Optional[Session], with_model: bool) -> ChatPlan:
+        """
+        Gather everything a reply needs from the database up front,
+        including a cached reply to the same question if there is one.
         """
-        # Check if question is risk-related
-        risk_keywords = ['risk', 'alert', 'high', 'danger', 'priority', 'urgent', 
-                        'sargassum level', 'which beach', 'worst', 'critical']
-        is_risk_related = any(kw in message.lower() for kw in risk_keywords)
+        is_risk_related = AIService.is_risk_related(message)
+        plan = ChatPlan()
+        
+        if db and is_risk_related:
+            try:
+                plan.fallback = AIService.risk_status_response(db)
+            except Exception:
+                pass
+        
+        if not with_model:
+            return plan
+        
+        # Versions are read before the context is built, as in the query
+        # cache, so a reply is never stored under versions newer than its data
+        plan.versions = query_cache.versions(CONTEXT_FAMILIES)
         
         # Build context if we have DB access and question is risk-related
         risk_context = ""
         if db and is_risk_related:
             risk_context = AIService.get_risk_context(db)
         
-        if not settings.OPENAI_API_KEY:
+        plan.cache_key = response_cache.key_for(message, risk_context)
+        plan.cached_reply = response_cache.get(plan.cache_key, plan.versions)
+        
+        system_prompt = SYSTEM_PROMPT
+        if risk_context:
+            system_prompt += f"\n{risk_context}"
+        
+        plan.messages = [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": message
+            }
+        ]
+        return plan
+    
+    @staticmethod
+    async def _prepare(message: str, db: Optional[Session]) -> ChatPlan:
+        if get_ai_client() is None:
+            if settings.AI_PROVIDER == "openai" and settings.OPENAI_API_KEY:
+                return ChatPlan(fallback="OpenAI library is not installed. Please install it with: pip install openai")
             # Provide rule-based response when no API key
-            if is_risk_related and db:
-                try:
-                    summary = get_risk_summary(db, date.today())
-                    high_risk = get_high_risk_beaches_for_date(db, date.today(), min_risk_level=2)
-                    
-                    response = "AI services are temporarily unavailable. Here's the current risk status:\n\n"
-                    response += f"📊 **Risk Summary for {date.today()}:**\n"
-                    response += f"- High risk beaches: {summary.get('high_risk', 0)}\n"
-                    response += f"- Medium risk beaches: {summary.get('medium_risk', 0)}\n"
-                    response += f"- Active alerts: {summary.get('active_alerts', 0)}\n\n"
-                    
-                    if high_risk:
-                        response += "**Priority Beaches:**\n"
-                        for b in high_risk[:5]:
-                            level = "🔴 HIGH" if b['risk_level'] == 3 else "🟠 MEDIUM"
-                            response += f"- {b['beach_name']}: {level}\n"
-                    
-                    return response
-                except:
-                    pass
-            
-            return "This is a stub AI response because OPENAI_API_KEY is not set."
+            plan = await run_in_threadpool(AIService.prepare_chat, message, db, False)
+            plan.fallback = plan.fallback or "This is a stub AI response because OPENAI_API_KEY is not set."
+            return plan
+        
+        plan = await run_in_threadpool(AIService.prepare_chat, message, db, True)
+        if plan.cached_reply is None and not ai_available():
+            # The circuit breaker is open: answer from the rule-based path at once
+            plan.messages = None
+            plan.fallback = plan.fallback or "AI services are temporarily unavailable. Please try again later."
+        return plan
+    
+    @staticmethod
+    def error_response(error: Exception, fallback: Optional[str]) -> str:
+        """
+        The reply to give when the completion failed.
+        """
+        if isinstance(error, AIUnavailable):
+            return fallback or f"AI services are temporarily unavailable ({error}). Please try again later."
+        return f"Error calling the AI provider: {error}"
+    
+    @staticmethod
+    async def generate_response(message: str, db: Optional[Session] = None) -> str:
+        """
+        Generate AI response using the configured provider, if any.
+        Includes risk data context for risk-related questions.
+        Database work runs in the threadpool; the completion runs on the
+        shared async client, so waiting on it holds no worker thread.
+        Replies are served from response_cache while the question and the
+        risk data stay the same.
+        """
+        plan = await AIService._prepare(message, db)
+        if plan.messages is None:
+            return plan.fallback
+        if plan.cached_reply is not None:
+            return plan.cached_reply
         
+        started = time.perf_counter()
         try:
-            from openai import OpenAI
-            
-            # Create client without proxy settings
-            http_client = httpx.Client()
-            client = OpenAI(
-                api_key=settings.OPENAI_API_KEY,
-                http_client=http_client
-            )
-            
-            system_prompt = """You are an assistant helping Vincy GreenRoots plan sargassum operations. 
-You help with beach cleanup scheduling, campaign management, task coordination, and provide advice on sargassum management best practices.
-
-When discussing risk levels:
-- Level 0 = No risk
-- Level 1 = Low risk  
-- Level 2 = Medium risk (requires monitoring)
-- Level 3 = High risk (requires immediate attention)
-
-Always prioritize high-risk beaches for cleanup operations.
-"""
-            
-            if risk_context:
-                system_prompt += f"\n{risk_context}"
-            
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": message
-                    }
-                ],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content
-            
-        except ImportError:
-            return "OpenAI library is not installed. Please install it with: pip install openai"
+            reply = await complete_chat(plan.messages)
+        except Exception as e:
+            return AIService.error_response(e, plan.fallback)
+        response_cache.set(plan.cache_key, plan.versions, reply, time.perf_counter() - started)
+        return reply
+    
+    @staticmethod
+    async def stream_response(message: str, db: Optional[Session] = None) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of generate_response.
+        All database work is done before this returns, so the iterator can
+        outlive the request's session. It yields the reply in pieces as the
+        model produces them; stub, fallback and cached replies come through
+        the same iterator as a single piece.
+        """
+        plan = await AIService._prepare(message, db)
+        return AIService._stream_reply(plan)
+    
+    @staticmethod
+    async def _stream_reply(plan: ChatPlan) -> AsyncIterator[str]:
+        if plan.messages is None:
+            yield plan.fallback
+            return
+        if plan.cached_reply is not None:
+            yield plan.cached_reply
+            return
+        
+        started = time.perf_counter()
+        pieces = []
+        try:
+            async for delta in stream_chat(plan.messages):
+                pieces.append(delta)
+                yield delta
         except Exception as e:
-            error_msg = str(e)
-            if "quota" in error_msg.lower() or "rate" in error_msg.lower():
-                # Fallback for quota errors
-                if db and is_risk_related:
-                    try:
-                        summary = get_risk_summary(db, date.today())
-                        return f"AI services are temporarily unavailable due to rate limits. Current risk summary: {summary.get('high_risk', 0)} high-risk beaches, {summary.get('active_alerts', 0)} active alerts."
-                    except:
-                        pass
-                return "AI services are temporarily unavailable. Please try again later."
-            return f"Error calling OpenAI API: {error_msg}"
+            # Keep whatever was already sent and append the fallback after it
+            reply = AIService.error_response(e, plan.fallback)
+            yield f"\n\n{reply}" if pieces else reply
+            return
+        response_cache.set(plan.cache_key, plan.versions, "".join(pieces), time.perf_counter() - started)
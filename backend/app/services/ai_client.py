@@ -0,0 +1,326 @@
+"""
+Shared chat model client for the AI assistant.
+
+One provider (see llm_providers) is created at startup and reused by every
+chat request. Each call goes through, in order:
+
+- the circuit breaker: after AI_BREAKER_FAILURES consecutive provider
+  outages it opens for AI_BREAKER_RESET_SECONDS and calls fail at once with
+  AICircuitOpen; then a single trial call decides whether it closes again
+- a token bucket allowing AI_RATE_LIMIT_PER_MINUTE calls (bursts up to
+  AI_RATE_LIMIT_BURST), so we slow ourselves down before the provider does
+- a semaphore bounding calls in flight to AI_MAX_CONCURRENCY
+
+Retryable provider errors (rate limits, timeouts, 5xx) are retried up to
+AI_RETRY_ATTEMPTS times with full-jitter exponential backoff, honouring
+Retry-After. Waiting for a token or slot is capped at AI_QUEUE_TIMEOUT and
+everything, retries included, must finish within AI_REQUEST_TIMEOUT, so a
+provider incident costs a request at most that long and, once the breaker
+opens, nothing at all.
+
+Point OPENAI_BASE_URL at scripts/mock_openai_server.py, or set
+AI_PROVIDER=local, to exercise the whole path without the real API.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, List, Optional
+from ..config import settings
+from .llm_providers import (
+    AIBusy,
+    AICircuitOpen,
+    AIProviderError,
+    AIUnavailable,
+    create_provider
+)
+
+logger = logging.getLogger(__name__)
+
+_provider = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second up to `capacity`.
+    Used from the event loop only, so it needs no lock.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait: float) -> None:
+        """
+        Take a token, waiting for one if needed. Raises AIBusy instead if
+        it would take longer than max_wait seconds.
+        """
+        if self.rate <= 0:
+            return
+        self._refill()
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if wait > max_wait:
+            raise AIBusy("AI request rate limit reached")
+        # Reserve the token now so concurrent waiters queue behind each other
+        self.tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+
+    def available(self) -> Optional[float]:
+        if self.rate <= 0:
+            return None
+        self._refill()
+        return round(self.tokens, 2)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive outages and stays open for
+    `reset_seconds`. Then it is half-open: one trial call is let through,
+    and its outcome closes the breaker or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def available(self) -> bool:
+        """
+        Whether a call made now could be let through.
+        """
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def acquire(self) -> None:
+        """
+        Let one call through or raise AICircuitOpen. In the half-open state
+        the call becomes the trial; every call must end in record_success,
+        record_failure or release.
+        """
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return
+        retry_in = max(self.reset_seconds - (time.monotonic() - self.opened_at), 0)
+        raise AICircuitOpen(f"AI provider calls are paused for {retry_in:.0f}s after repeated failures")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.times_opened += 1
+            self.opened_at = time.monotonic()
+            logger.warning("AI circuit breaker opened after %d consecutive failures", self.failures)
+        self.trial_in_flight = False
+
+    def release(self) -> None:
+        """
+        End a call whose outcome says nothing about the provider's health.
+        """
+        self.trial_in_flight = False
+
+
+rate_limiter = TokenBucket(settings.AI_RATE_LIMIT_PER_MINUTE / 60, settings.AI_RATE_LIMIT_BURST)
+breaker = CircuitBreaker(settings.AI_BREAKER_FAILURES, settings.AI_BREAKER_RESET_SECONDS)
+
+
+def start_ai_client() -> None:
+    """
+    Create the provider. A no-op when AI_PROVIDER cannot be used here.
+    """
+    global _provider, _semaphore
+    if _provider is not None:
+        return
+    _provider = create_provider(settings.AI_PROVIDER)
+    if _provider is not None:
+        _semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+
+
+async def stop_ai_client() -> None:
+    """
+    Close the provider and its connections.
+    """
+    global _provider, _semaphore
+    if _provider is not None:
+        await _provider.close()
+    _provider = None
+    _semaphore = None
+
+
+def get_ai_client():
+    """
+    The provider, created on first use outside the app (scripts, tests).
+    None when AI_PROVIDER cannot be used here.
+    """
+    if _provider is None:
+        start_ai_client()
+    return _provider
+
+
+def ai_available() -> bool:
+    """
+    Whether a model call could be made now: a provider exists and the
+    circuit breaker would let the call through.
+    """
+    return get_ai_client() is not None and breaker.available()
+
+
+def ai_status() -> dict:
+    provider = get_ai_client()
+    return {
+        "provider": provider.name if provider is not None else None,
+        "breaker_state": breaker.state,
+        "consecutive_failures": breaker.failures,
+        "times_opened": breaker.times_opened,
+        "rate_limit_tokens": rate_limiter.available(),
+        "in_flight": settings.AI_MAX_CONCURRENCY - _semaphore._value if _semaphore is not None else 0
+    }
+
+
+def _remaining(deadline: float) -> float:
+    return max(deadline - asyncio.get_running_loop().time(), 0)
+
+
+async def _acquire_slot(deadline: float) -> None:
+    await rate_limiter.acquire(min(settings.AI_QUEUE_TIMEOUT, _remaining(deadline)))
+    try:
+        await asyncio.wait_for(_semaphore.acquire(), timeout=min(settings.AI_QUEUE_TIMEOUT, _remaining(deadline)))
+    except asyncio.TimeoutError:
+        raise AIBusy("Too many AI requests in flight")
+
+
+def _backoff(error: AIProviderError, attempt: int, deadline: float) -> Optional[float]:
+    """
+    Seconds to wait before retrying after error, or None to give up.
+    """
+    if not error.retryable or attempt >= settings.AI_RETRY_ATTEMPTS:
+        return None
+    delay = random.uniform(0, min(settings.AI_RETRY_MAX_DELAY, settings.AI_RETRY_BASE_DELAY * 2 ** attempt))
+    if error.retry_after is not None:
+        delay = max(delay, error.retry_after)
+    return delay if delay < _remaining(deadline) else None
+
+
+def _record(error: AIProviderError) -> None:
+    if error.outage:
+        breaker.record_failure()
+    else:
+        breaker.release()
+
+
+def _require_provider():
+    provider = get_ai_client()
+    if provider is None:
+        raise AIUnavailable("No AI provider is configured")
+    return provider
+
+
+async def complete_chat(messages: List[dict], max_tokens: int = 1000, temperature: float = 0.7) -> str:
+    """
+    Run one chat completion under the breaker, rate limit and concurrency
+    limit, retrying retryable provider errors. Raises AIUnavailable (or a
+    subclass) when no reply can be had within AI_REQUEST_TIMEOUT.
+    """
+    provider = _require_provider()
+    deadline = asyncio.get_running_loop().time() + settings.AI_REQUEST_TIMEOUT
+    attempt = 0
+    while True:
+        breaker.acquire()
+        try:
+            await _acquire_slot(deadline)
+            try:
+                reply = await asyncio.wait_for(
+                    provider.complete(messages, max_tokens, temperature), timeout=_remaining(deadline)
+                )
+            except asyncio.TimeoutError:
+                raise AIProviderError("The AI request timed out", retryable=True)
+            finally:
+                _semaphore.release()
+        except AIProviderError as e:
+            _record(e)
+            delay = _backoff(e, attempt, deadline)
+            if delay is None:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return reply
+
+
+async def _next_piece(pieces: AsyncIterator[str], deadline: float) -> str:
+    try:
+        return await asyncio.wait_for(pieces.__anext__(), timeout=_remaining(deadline))
+    except asyncio.TimeoutError:
+        raise AIProviderError("The AI request timed out", retryable=True)
+
+
+async def stream_chat(messages: List[dict], max_tokens: int = 1000, temperature: float = 0.7) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of complete_chat, yielding reply pieces as they
+    arrive. Errors before the first piece are retried like complete_chat's;
+    after that they are raised to the consumer. The concurrency slot is held
+    until the stream ends or the consumer stops reading.
+    """
+    provider = _require_provider()
+    deadline = asyncio.get_running_loop().time() + settings.AI_REQUEST_TIMEOUT
+    attempt = 0
+    while True:
+        breaker.acquire()
+        started = False
+        try:
+            await _acquire_slot(deadline)
+            pieces = provider.stream(messages, max_tokens, temperature).__aiter__()
+            try:
+                while True:
+                    try:
+                        piece = await _next_piece(pieces, deadline)
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield piece
+            finally:
+                await pieces.aclose()
+                _semaphore.release()
+        except AIProviderError as e:
+            _record(e)
+            delay = None if started else _backoff(e, attempt, deadline)
+            if delay is None:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return
@@ -0,0 +1,223 @@
+"""
+Risk context for the AI assistant.
+
+get_risk_context_snapshot reads everything the assistant may mention
+(risk summary, high/medium risk beaches with their streaks, active alerts,
+rising trends and open campaigns) in one statement and caches it per
+version of the data families it reads. Ingestion calls
+precompute_risk_context right after it commits, so chat requests find the
+snapshot already built and do no database work for context.
+
+build_prompt_context then fits the snapshot into a token budget: every
+section gets its heading, and lines are taken from the sections in turn,
+highest ranked first, until the budget is spent. Headings say how many
+items were left out, so the model knows the lists are partial.
+"""
+import logging
+from datetime import date
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..config import settings
+from .cache import cached
+
+logger = logging.getLogger(__name__)
+
+# Families the snapshot is built from; a new version of any of them makes
+# the snapshot, and replies built on it, stale
+CONTEXT_FAMILIES = ("risk", "alerts", "beaches", "tasks", "campaigns")
+
+RISK_CONTEXT_SQL = text("""
+    WITH levels AS (
+        SELECT count(risk_level) AS total_beaches,
+               count(*) FILTER (WHERE risk_level = 0) AS no_risk,
+               count(*) FILTER (WHERE risk_level = 1) AS low_risk,
+               count(*) FILTER (WHERE risk_level = 2) AS medium_risk,
+               count(*) FILTER (WHERE risk_level = 3) AS high_risk,
+               coalesce(sum(active_alerts), 0) AS active_alerts,
+               max(date) AS date
+        FROM beach_current_state
+    ),
+    priority AS (
+        SELECT b.name AS beach_name, s.risk_level, t.streak_days
+        FROM beach_current_state s
+        JOIN beaches b ON b.id = s.beach_id
+        LEFT JOIN beach_risk_trends t ON t.beach_id = s.beach_id
+        WHERE s.risk_level >= 2
+        ORDER BY s.risk_level DESC, t.streak_days DESC NULLS LAST,
+                 b.tourism_importance DESC NULLS LAST, b.name
+        LIMIT :max_items
+    ),
+    recent_alerts AS (
+        SELECT b.name AS beach_name, a.alert_type, a.severity, a.message
+        FROM alerts a
+        JOIN beaches b ON b.id = a.beach_id
+        WHERE a.is_active
+        ORDER BY a.date_created DESC, a.id DESC
+        LIMIT :max_items
+    ),
+    rising AS (
+        SELECT b.name AS beach_name, t.slope_7, t.avg_7
+        FROM beach_risk_trends t
+        JOIN beaches b ON b.id = t.beach_id
+        WHERE t.slope_7 >= :rising_slope AND t.n_7 >= :rising_min_days
+        ORDER BY t.slope_7 DESC, t.beach_id
+        LIMIT :max_items
+    ),
+    open_campaigns AS (
+        SELECT c.name, coalesce(c.status, 'planned') AS status, c.start_date, c.end_date,
+               count(t.id) AS tasks,
+               count(t.id) FILTER (WHERE t.status = 'completed') AS completed,
+               count(t.id) FILTER (
+                   WHERE t.status IS DISTINCT FROM 'completed' AND t.scheduled_date < :today
+               ) AS overdue
+        FROM campaigns c
+        LEFT JOIN tasks t ON t.campaign_id = c.id
+        WHERE c.status IS DISTINCT FROM 'completed'
+        GROUP BY c.id
+        ORDER BY c.status = 'active' DESC, c.start_date NULLS LAST, c.id
+        LIMIT :max_items
+    )
+    SELECT
+        (SELECT row_to_json(levels) FROM levels) AS summary,
+        (SELECT coalesce(json_agg(priority), '[]') FROM priority) AS beaches,
+        (SELECT coalesce(json_agg(recent_alerts), '[]') FROM recent_alerts) AS alerts,
+        (SELECT coalesce(json_agg(rising), '[]') FROM rising) AS rising,
+        (SELECT count(*) FROM beach_risk_trends
+         WHERE slope_7 >= :rising_slope AND n_7 >= :rising_min_days) AS rising_count,
+        (SELECT coalesce(json_agg(open_campaigns), '[]') FROM open_campaigns) AS campaigns,
+        (SELECT count(*) FROM campaigns WHERE status IS DISTINCT FROM 'completed') AS campaign_count
+""")
+
+
+@cached(*CONTEXT_FAMILIES)
+def get_risk_context_snapshot(db: Session) -> dict:
+    """
+    Everything the assistant's risk context is built from, in one
+    statement. Each list is ranked and holds at most AI_CONTEXT_MAX_ITEMS
+    entries; the counts are totals.
+    """
+    row = db.execute(RISK_CONTEXT_SQL, {
+        "max_items": settings.AI_CONTEXT_MAX_ITEMS,
+        "rising_slope": settings.RISING_TREND_SLOPE,
+        "rising_min_days": settings.RISING_TREND_MIN_DAYS,
+        "today": date.today()
+    }).mappings().one()
+
+    summary = row["summary"]
+    # Most severe first; the query already returned them newest first
+    alerts = sorted(row["alerts"], key=lambda a: -(a["severity"] or 0))
+    return {
+        "summary": summary,
+        "beaches": row["beaches"],
+        "alerts": alerts,
+        "rising": row["rising"],
+        "rising_count": row["rising_count"],
+        "campaigns": row["campaigns"],
+        "campaign_count": row["campaign_count"]
+    }
+
+
+def precompute_risk_context(db: Session) -> None:
+    """
+    Build the snapshot for freshly committed data, so the next chat request
+    finds it cached. Ingestion calls this after its final commit; a failure
+    is logged rather than failing the ingestion.
+    """
+    try:
+        get_risk_context_snapshot(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Could not precompute the AI risk context")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count: about four characters per token for English text.
+    """
+    return len(text) // 4 + 1
+
+
+def _beach_line(beach: dict) -> str:
+    risk_label = "HIGH" if beach["risk_level"] >= 3 else "MEDIUM"
+    line = f"- {beach['beach_name']}: {risk_label} risk"
+    if beach["streak_days"] and beach["streak_days"] > 1:
+        line += f" for {beach['streak_days']} days"
+    return line + "\n"
+
+
+def _alert_line(alert: dict) -> str:
+    return f"- [{alert['alert_type']}] {alert['beach_name']}: {alert['message']}\n"
+
+
+def _rising_line(trend: dict) -> str:
+    return (f"- {trend['beach_name']}: up {trend['slope_7']:.2f} levels/day over 7 days "
+            f"(7-day average {trend['avg_7']:.1f})\n")
+
+
+def _campaign_line(campaign: dict) -> str:
+    dates = f"{campaign['start_date'] or '?'} to {campaign['end_date'] or '?'}"
+    return (f"- {campaign['name']} ({campaign['status']}, {dates}): "
+            f"{campaign['completed']}/{campaign['tasks']} tasks done, {campaign['overdue']} overdue\n")
+
+
+def _heading(title: str, shown: int, total: int) -> str:
+    if shown < total:
+        return f"\n{title} (top {shown} of {total}):\n"
+    return f"\n{title}:\n"
+
+
+def build_prompt_context(snapshot: dict, token_budget: int) -> str:
+    """
+    Render the snapshot as prompt text of about token_budget tokens at most.
+    The summary always goes in; beaches, alerts, rising trends and campaigns
+    then take turns adding their next-ranked line while it still fits.
+    """
+    summary = snapshot["summary"] or {}
+    header = f"""
+CURRENT SARGASSUM RISK DATA (as of {summary.get('date') or date.today()}):
+
+Risk Summary:
+- Total monitored beaches: {summary.get('total_beaches', 0)}
+- High risk beaches: {summary.get('high_risk', 0)}
+- Medium risk beaches: {summary.get('medium_risk', 0)}
+- Low risk beaches: {summary.get('low_risk', 0)}
+- Active alerts: {summary.get('active_alerts', 0)}
+"""
+    # (title, candidate lines, total items, text when there are none)
+    sections: List[Tuple[str, List[str], int, str]] = [
+        ("High/Medium Risk Beaches (latest data)", [_beach_line(b) for b in snapshot["beaches"]],
+         summary.get("high_risk", 0) + summary.get("medium_risk", 0),
+         "- No high/medium risk beaches detected\n"),
+        ("Active Alerts", [_alert_line(a) for a in snapshot["alerts"]],
+         summary.get("active_alerts", 0), "- No active alerts\n"),
+        ("Rising Risk Trends", [_rising_line(t) for t in snapshot["rising"]],
+         snapshot["rising_count"], "- No beaches with a rising trend\n"),
+        ("Open Campaigns", [_campaign_line(c) for c in snapshot["campaigns"]],
+         snapshot["campaign_count"], "- No open campaigns\n"),
+    ]
+
+    # Headings (at their longest) and empty-section notes are paid for up front
+    used = estimate_tokens(header)
+    for title, lines, total, empty in sections:
+        used += estimate_tokens(_heading(title, 0, total) + ("" if lines else empty))
+
+    shown = [0] * len(sections)
+    full = [not lines for _, lines, _, _ in sections]
+    while not all(full):
+        for i, (_, lines, _, _) in enumerate(sections):
+            if full[i]:
+                continue
+            cost = estimate_tokens(lines[shown[i]])
+            if used + cost > token_budget:
+                full[i] = True
+                continue
+            used += cost
+            shown[i] += 1
+            full[i] = shown[i] == len(lines)
+
+    context = header
+    for (title, lines, total, empty), n in zip(sections, shown):
+        context += _heading(title, n, max(total, n))
+        context += "".join(lines[:n]) if lines else empty
+    return context
@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.beach import Beach
+from ..models.backfill_run import BackfillRun
+from .risk_scoring import score_risk_grid, SYNTHETIC_SOURCE
+from .risk_ingestion import write_scored_rows, get_active_alert_beach_ids
+from .ai_context import precompute_risk_context
+
+
+def split_date_range(start_date: date, end_date: date, chunk_days: int) -> List[Tuple[date, date]]:
+    """
+    Split an inclusive date range into consecutive (chunk_start, chunk_end) pairs.
+    """
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _score_chunk(beach_ids: np.ndarray, chunk_start: date, chunk_end: date) -> Dict[str, np.ndarray]:
+    """
+    Score every beach for every day of a chunk. Runs in a worker process.
+    """
+    days = np.arange(np.datetime64(chunk_start, "D"), np.datetime64(chunk_end, "D") + 1)
+    return score_risk_grid(beach_ids, days)
+
+
+def get_or_create_backfill_run(db: Session, start_date: date, end_date: date, chunk_days: int) -> BackfillRun:
+    """
+    Return the unfinished run for this range and chunk size, or start a new one.
+    """
+    run = db.query(BackfillRun).filter(
+        BackfillRun.start_date == start_date,
+        BackfillRun.end_date == end_date,
+        BackfillRun.chunk_days == chunk_days,
+        BackfillRun.status != "completed"
+    ).order_by(BackfillRun.id.desc()).first()
+
+    if not run:
+        run = BackfillRun(
+            start_date=start_date,
+            end_date=end_date,
+            chunk_days=chunk_days,
+            status="pending",
+            chunks_total=len(split_date_range(start_date, end_date, chunk_days)),
+            chunks_done=0,
+            rows_written=0,
+            alerts_created=0
+        )
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+    return run
+
+
+def run_backfill(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    chunk_days: Optional[int] = None,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Backfill synthetic risk data for an inclusive date range.
+
+    The range is split into chunks of chunk_days. Chunks are scored on a
+    process pool (workers=1 scores inline) while the current process writes
+    each finished chunk in its own transaction together with the checkpoint
+    on its BackfillRun. Calling again with the same range resumes after the
+    last committed chunk. progress, if given, is called with
+    (chunks_done, chunks_total) after every committed chunk.
+    """
+    started = time.perf_counter()
+    chunk_days = chunk_days or settings.BACKFILL_CHUNK_DAYS
+    workers = workers or settings.BACKFILL_WORKERS or os.cpu_count() or 1
+
+    run = get_or_create_backfill_run(db, start_date, end_date, chunk_days)
+    chunks = split_date_range(start_date, end_date, chunk_days)
+    if run.last_completed_date:
+        chunks = [c for c in chunks if c[0] > run.last_completed_date]
+    chunks_skipped = run.chunks_total - len(chunks)
+
+    beaches = db.query(Beach.id, Beach.name).all()
+    beach_names = {beach_id: name for beach_id, name in beaches}
+    beach_ids = np.fromiter(beach_names.keys(), dtype=np.int64, count=len(beach_names))
+    active_beach_ids = get_active_alert_beach_ids(db)
+
+    run.status = "running"
+    run.error = None
+    db.commit()
+
+    def write_chunk(chunk_end: date, scores: Dict[str, np.ndarray]) -> None:
+        written, alerts_created = write_scored_rows(
+            db, scores["beach_id"], scores["date"], scores, SYNTHETIC_SOURCE,
+            beach_names, active_beach_ids
+        )
+        run.chunks_done += 1
+        run.last_completed_date = chunk_end
+        run.rows_written += written
+        run.alerts_created += alerts_created
+        db.commit()
+        if progress:
+            progress(run.chunks_done, run.chunks_total)
+
+    try:
+        if workers <= 1 or len(chunks) <= 1:
+            for chunk_start, chunk_end in chunks:
+                write_chunk(chunk_end, _score_chunk(beach_ids, chunk_start, chunk_end))
+        else:
+            # Keep a bounded number of chunks in flight so scored results
+            # never pile up faster than they can be written
+            pending = deque()
+            remaining = iter(chunks)
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                for chunk_start, chunk_end in remaining:
+                    pending.append((chunk_end, pool.submit(_score_chunk, beach_ids, chunk_start, chunk_end)))
+                    if len(pending) >= workers * 2:
+                        break
+                while pending:
+                    chunk_end, future = pending.popleft()
+                    scores = future.result()
+                    next_chunk = next(remaining, None)
+                    if next_chunk:
+                        pending.append((next_chunk[1], pool.submit(_score_chunk, beach_ids, *next_chunk)))
+                    write_chunk(chunk_end, scores)
+    except Exception as e:
+        db.rollback()
+        run.status = "failed"
+        run.error = str(e)
+        db.commit()
+        raise
+
+    run.status = "completed"
+    db.commit()
+    precompute_risk_context(db)
+
+    return {
+        "run_id": run.id,
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "chunk_days": chunk_days,
+        "chunks_total": run.chunks_total,
+        "chunks_done": run.chunks_done,
+        "chunks_skipped": chunks_skipped,
+        "total_records_created": run.rows_written,
+        "total_alerts_created": run.alerts_created,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
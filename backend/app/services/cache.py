@@ -0,0 +1,336 @@
+"""
+Versioned read-through cache for query results.
+
+Every cached value is stored under a key that embeds the current version of
+each data family (CACHE_FAMILIES) it was derived from. Writers never delete
+entries: they mark the families they touched on their session and the
+versions are bumped once the transaction commits, so readers simply stop
+finding the old keys and the LRU ages them out. Each family also records
+when it last changed, for HTTP validators.
+
+Entries live in a bounded in-process LRU and expire after CACHE_TTL_SECONDS.
+With CACHE_URL set, versions and values are also kept in a shared backend so
+several API processes see the same versions; "local" selects an in-process
+stand-in with the same interface. Without a shared backend, versions are per
+process: writes made by another process (e.g. app.cli) are not seen until
+entries expire, and validators never change for them, so the CLI requires a
+shared backend.
+"""
+import functools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.alert import Alert
+from ..models.beach import Beach
+from ..models.campaign import Campaign
+from ..models.task import Task
+
+CACHE_FAMILIES = ("risk", "alerts", "beaches", "tasks", "campaigns")
+
+# ORM classes whose flushed changes bump a family automatically;
+# Core statements must call mark_changed themselves
+MODEL_FAMILIES = {Alert: "alerts", Beach: "beaches", Task: "tasks", Campaign: "campaigns"}
+
+_MISSING = object()
+
+
+class LocalBackend:
+    """
+    In-process stand-in for a shared key/value store (Redis semantics for
+    get, set with TTL, setnx, mget and incr). Lets the shared code path run without
+    a server, e.g. in development.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key)
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._live(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def setnx(self, key: str, value: bytes) -> None:
+        with self._lock:
+            if self._live(key) is None:
+                self._data[key] = (value, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._data[key] = (str(value).encode(), None)
+            return value
+
+
+class RedisBackend:
+    """
+    Shared backend on a Redis server. Needs the optional redis package.
+    """
+
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL points at Redis but the redis package is not installed")
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self._client.mget(keys)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        self._client.set(key, value, ex=ttl)
+
+    def setnx(self, key: str, value: bytes) -> None:
+        self._client.set(key, value, nx=True)
+
+    def incr(self, key: str) -> int:
+        return self._client.incr(key)
+
+
+def create_backend(url: str):
+    """
+    Build the shared backend for CACHE_URL, or None for in-process only.
+    """
+    if not url:
+        return None
+    if url == "local":
+        return LocalBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
+
+
+class LRUCache:
+    """
+    Thread-safe LRU bounded by entry count. With ttl_seconds, entries also
+    expire that long after they were set.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return _MISSING
+            value, expires = item
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class VersionedCache:
+    """
+    Read-through cache keyed on data-family versions.
+    """
+
+    def __init__(self, max_entries: int = 1024, backend=None, ttl_seconds: int = 3600, enabled: bool = True):
+        self.enabled = enabled
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.local = LRUCache(max_entries, ttl_seconds)
+        self._lock = threading.Lock()
+        self._versions = {family: 0 for family in CACHE_FAMILIES}
+        # Nothing is known to have changed before this process started
+        self._modified = {family: time.time() for family in CACHE_FAMILIES}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self) -> bool:
+        """
+        Whether versions are shared with other processes.
+        """
+        return self.backend is not None and self.backend.shared
+
+    def versions(self, families: Iterable[str]) -> Tuple[int, ...]:
+        families = list(families)
+        if self.backend is not None:
+            values = self.backend.mget([f"version:{family}" for family in families])
+            return tuple(int(value or 0) for value in values)
+        return tuple(self._versions[family] for family in families)
+
+    def last_modified(self, families: Iterable[str]) -> float:
+        """
+        Unix time of the latest change to any of the families.
+        """
+        families = list(families)
+        if self.backend is None:
+            return max(self._modified[family] for family in families)
+        keys = [f"modified:{family}" for family in families]
+        values = self.backend.mget(keys)
+        for key, value in zip(keys, values):
+            if value is None:
+                # First process to look pins the baseline for everyone
+                self.backend.setnx(key, str(self._modified[key.split(":", 1)[1]]).encode())
+        if None in values:
+            values = self.backend.mget(keys)
+        return max(float(value) for value in values)
+
+    def bump(self, *families: str) -> None:
+        """
+        Move the given families to a new version, orphaning their entries.
+        """
+        now = time.time()
+        for family in families:
+            if self.backend is not None:
+                self.backend.incr(f"version:{family}")
+                self.backend.set(f"modified:{family}", str(now).encode())
+            else:
+                with self._lock:
+                    self._versions[family] += 1
+                    self._modified[family] = now
+
+    def get_or_compute(self, key: str, families: Iterable[str], compute: Callable[[], object]):
+        """
+        Return the cached value for key at the current versions of families,
+        computing and storing it on a miss. Versions are read before computing,
+        so a write committing mid-compute can only leave a newer value under
+        an older key, never the reverse.
+        """
+        if not self.enabled:
+            return compute()
+
+        families = tuple(families)
+        versioned_key = f"{key}@{','.join(f'{f}{v}' for f, v in zip(families, self.versions(families)))}"
+
+        value = self.local.get(versioned_key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        if self.backend is not None:
+            stored = self.backend.get(versioned_key)
+            if stored is not None:
+                value = pickle.loads(stored)
+                self.local.set(versioned_key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        value = compute()
+        self.local.set(versioned_key, value)
+        if self.backend is not None:
+            self.backend.set(versioned_key, pickle.dumps(value), self.ttl_seconds)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "versions": dict(zip(CACHE_FAMILIES, self.versions(CACHE_FAMILIES)))
+        }
+
+
+# Process-wide cache, configured from settings
+query_cache = VersionedCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    backend=create_backend(settings.CACHE_URL),
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+    enabled=settings.CACHE_ENABLED
+)
+
+
+def mark_changed(db: Session, *families: str) -> None:
+    """
+    Record that the session's transaction changes these families.
+    Their versions are bumped after it commits and forgotten on rollback.
+    """
+    db.info.setdefault("changed_families", set()).update(families)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_models(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        family = MODEL_FAMILIES.get(type(obj))
+        if family:
+            mark_changed(session, family)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_families(session):
+    families = session.info.pop("changed_families", None)
+    if families:
+        query_cache.bump(*families)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_families(session):
+    session.info.pop("changed_families", None)
+
+
+def cached(*families: str):
+    """
+    Cache a query helper taking (db, *args) per argument values, current
+    date and the versions of the given families. Callers share the returned
+    object, so it must be treated as read-only.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(db: Session, *args, **kwargs):
+            # Today is part of the key so "defaults to today" helpers roll over at midnight
+            key = f"{name}:{args!r}:{sorted(kwargs.items())!r}:{date.today()}"
+            return query_cache.get_or_compute(key, families, lambda: func(db, *args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
@@ -0,0 +1,107 @@
+"""
+beach_current_state: the latest risk and active alert count of each beach.
+
+Risk columns move forward in refresh_current_state, which
+refresh_risk_aggregates runs for every risk write. Active alert counts are
+recounted just before commit for every beach whose alerts the transaction
+touched: ORM Alert changes are picked up from the flush, Core statements call
+mark_alerts_changed. Both happen in the writer's transaction, so the snapshot
+commits or rolls back with the data it summarises.
+"""
+from datetime import date
+from typing import Iterable
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from ..models.alert import Alert
+
+
+def refresh_current_state(db: Session, start_date: date, end_date: date) -> None:
+    """
+    Advance the snapshot to each beach's newest risk row in
+    [start_date, end_date]; beaches whose snapshot is already newer keep it.
+    Does not commit.
+    """
+    db.execute(text("""
+        INSERT INTO beach_current_state (beach_id, date, risk_level, raw_value, confidence, source, updated_at)
+        SELECT DISTINCT ON (beach_id) beach_id, date, risk_level, raw_value, confidence, source, now()
+        FROM beach_daily_risks
+        WHERE date BETWEEN :start_date AND :end_date
+        ORDER BY beach_id, date DESC
+        ON CONFLICT (beach_id) DO UPDATE SET
+            date = excluded.date,
+            risk_level = excluded.risk_level,
+            raw_value = excluded.raw_value,
+            confidence = excluded.confidence,
+            source = excluded.source,
+            updated_at = excluded.updated_at
+        WHERE beach_current_state.date IS NULL OR beach_current_state.date <= excluded.date
+    """), {"start_date": start_date, "end_date": end_date})
+
+
+def refresh_active_alert_counts(db: Session, beach_ids: Iterable[int]) -> None:
+    """
+    Recount active alerts for the given beaches. Does not commit.
+    """
+    db.execute(text("""
+        INSERT INTO beach_current_state (beach_id, active_alerts, updated_at)
+        SELECT b.id, count(a.id), now()
+        FROM beaches b
+        LEFT JOIN alerts a ON a.beach_id = b.id AND a.is_active
+        WHERE b.id = ANY(:beach_ids)
+        GROUP BY b.id
+        ON CONFLICT (beach_id) DO UPDATE SET
+            active_alerts = excluded.active_alerts,
+            updated_at = excluded.updated_at
+    """), {"beach_ids": sorted(beach_ids)})
+
+
+def rebuild_current_state(db: Session) -> int:
+    """
+    Recompute the whole snapshot from beach_daily_risks and alerts, e.g.
+    after loading data with raw SQL. Returns the number of rows. Does not commit.
+    """
+    db.execute(text("DELETE FROM beach_current_state"))
+    db.execute(text("""
+        INSERT INTO beach_current_state (beach_id, date, risk_level, raw_value, confidence, source)
+        SELECT DISTINCT ON (beach_id) beach_id, date, risk_level, raw_value, confidence, source
+        FROM beach_daily_risks
+        ORDER BY beach_id, date DESC
+    """))
+    db.execute(text("""
+        INSERT INTO beach_current_state (beach_id, active_alerts)
+        SELECT beach_id, count(*) FROM alerts WHERE is_active GROUP BY beach_id
+        ON CONFLICT (beach_id) DO UPDATE SET active_alerts = excluded.active_alerts
+    """))
+    return db.execute(text("SELECT count(*) FROM beach_current_state")).scalar()
+
+
+def mark_alerts_changed(db: Session, beach_ids: Iterable[int]) -> None:
+    """
+    Record that the session's transaction changed these beaches' alerts.
+    Their counts are recounted before it commits.
+    """
+    db.info.setdefault("alert_beach_ids", set()).update(beach_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_alerts(session, flush_context):
+    beach_ids = {
+        obj.beach_id for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, Alert) and obj.beach_id is not None
+    }
+    if beach_ids:
+        mark_alerts_changed(session, beach_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _recount_changed_alerts(session):
+    # Flush first: commit only flushes after before_commit hooks have run
+    session.flush()
+    beach_ids = session.info.pop("alert_beach_ids", None)
+    if beach_ids:
+        refresh_active_alert_counts(session, beach_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_alerts(session):
+    session.info.pop("alert_beach_ids", None)
@@ -0,0 +1,159 @@
+"""
+Dashboard KPIs in one database round-trip.
+
+Everything the dashboard page shows is computed by a single statement of
+CTEs that returns one row of JSON columns, and the result is cached per
+version of every data family it reads. Current risk and alert counts come
+from beach_current_state.
+"""
+from datetime import date
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .cache import cached
+
+# Risk CTEs for the latest known state of every beach (the default)
+CURRENT_RISK_CTES = """
+    WITH levels AS (
+        SELECT count(risk_level) AS total_beaches,
+               count(*) FILTER (WHERE risk_level = 0) AS no_risk,
+               count(*) FILTER (WHERE risk_level = 1) AS low_risk,
+               count(*) FILTER (WHERE risk_level = 2) AS medium_risk,
+               count(*) FILTER (WHERE risk_level = 3) AS high_risk
+        FROM beach_current_state
+    ),
+    priority AS (
+        SELECT s.beach_id, b.name AS beach_name, s.risk_level, s.source, s.date
+        FROM beach_current_state s
+        JOIN beaches b ON b.id = s.beach_id
+        WHERE s.risk_level >= :min_risk_level
+        ORDER BY s.risk_level DESC, b.tourism_importance DESC NULLS LAST, b.name
+        LIMIT :priority_limit
+    ),
+"""
+
+# Risk CTEs for one past or explicit date
+DATED_RISK_CTES = """
+    WITH stored AS (
+        SELECT total_beaches, no_risk, low_risk, medium_risk, high_risk
+        FROM daily_risk_summary
+        WHERE date = :target_date
+    ),
+    counted AS (
+        -- Only scans beach_daily_risks for dates ingestion did not summarise
+        SELECT count(*) AS total_beaches,
+               count(*) FILTER (WHERE risk_level = 0) AS no_risk,
+               count(*) FILTER (WHERE risk_level = 1) AS low_risk,
+               count(*) FILTER (WHERE risk_level = 2) AS medium_risk,
+               count(*) FILTER (WHERE risk_level = 3) AS high_risk
+        FROM beach_daily_risks
+        WHERE date = :target_date AND NOT EXISTS (SELECT 1 FROM stored)
+    ),
+    levels AS (
+        SELECT * FROM stored
+        UNION ALL
+        SELECT * FROM counted WHERE NOT EXISTS (SELECT 1 FROM stored)
+    ),
+    priority AS (
+        SELECT r.beach_id, b.name AS beach_name, r.risk_level, r.source, r.date
+        FROM beach_daily_risks r
+        JOIN beaches b ON b.id = r.beach_id
+        WHERE r.date = :target_date AND r.risk_level >= :min_risk_level
+        ORDER BY r.risk_level DESC, b.tourism_importance DESC NULLS LAST, b.name
+        LIMIT :priority_limit
+    ),
+"""
+
+COMMON_SQL = """
+    recent_alerts AS (
+        SELECT a.id, a.beach_id, b.name AS beach_name, a.alert_type, a.severity,
+               a.message, a.date_created
+        FROM alerts a
+        JOIN beaches b ON b.id = a.beach_id
+        WHERE a.is_active
+        ORDER BY a.date_created DESC, a.id DESC
+        LIMIT :alert_limit
+    ),
+    beach_list AS (
+        SELECT id, name, island, tourism_importance
+        FROM beaches
+        ORDER BY name, id
+        LIMIT :beach_limit
+    ),
+    task_counts AS (
+        SELECT coalesce(status, 'planned') AS status, count(*) AS n,
+               count(*) FILTER (WHERE scheduled_date = :today) AS due,
+               count(*) FILTER (WHERE scheduled_date < :today) AS late
+        FROM tasks
+        GROUP BY 1
+    ),
+    campaign_counts AS (
+        SELECT coalesce(status, 'planned') AS status, count(*) AS n,
+               count(*) FILTER (
+                   WHERE start_date <= :today AND (end_date IS NULL OR end_date >= :today)
+               ) AS running
+        FROM campaigns
+        GROUP BY 1
+    )
+    SELECT
+        (SELECT row_to_json(levels) FROM levels) AS levels,
+        (SELECT max(date) FROM beach_current_state) AS latest_date,
+        (SELECT coalesce(sum(active_alerts), 0) FROM beach_current_state) AS active_alerts,
+        (SELECT count(*) FROM beaches) AS monitored_beaches,
+        (SELECT coalesce(json_agg(priority), '[]') FROM priority) AS priority_beaches,
+        (SELECT coalesce(json_agg(recent_alerts), '[]') FROM recent_alerts) AS alerts,
+        (SELECT coalesce(json_agg(beach_list), '[]') FROM beach_list) AS beaches,
+        (SELECT json_build_object(
+            'by_status', coalesce(json_object_agg(status, n), '{}'),
+            'due_today', coalesce(sum(due) FILTER (WHERE status <> 'completed'), 0),
+            'overdue', coalesce(sum(late) FILTER (WHERE status <> 'completed'), 0)
+        ) FROM task_counts) AS tasks,
+        (SELECT json_build_object(
+            'by_status', coalesce(json_object_agg(status, n), '{}'),
+            'running', coalesce(sum(running) FILTER (WHERE status <> 'completed'), 0)
+        ) FROM campaign_counts) AS campaigns
+"""
+
+DASHBOARD_SQL = {
+    "current": text(CURRENT_RISK_CTES + COMMON_SQL),
+    "dated": text(DATED_RISK_CTES + COMMON_SQL),
+}
+
+EMPTY_LEVELS = {"total_beaches": 0, "high_risk": 0, "medium_risk": 0, "low_risk": 0, "no_risk": 0}
+
+
+@cached("risk", "alerts", "beaches", "tasks", "campaigns")
+def get_dashboard(
+    db: Session,
+    target_date: Optional[date] = None,
+    priority_limit: int = 5,
+    alert_limit: int = 5,
+    beach_limit: int = 8,
+    min_risk_level: int = 2
+) -> dict:
+    """
+    Get every dashboard KPI with one statement. Without target_date risk
+    comes from each beach's latest known state, so the page is populated
+    even before today's data is ingested; "date" is then the newest risk date.
+    """
+    row = db.execute(DASHBOARD_SQL["dated" if target_date else "current"], {
+        "target_date": target_date,
+        "today": target_date or date.today(),
+        "min_risk_level": min_risk_level,
+        "priority_limit": priority_limit,
+        "alert_limit": alert_limit,
+        "beach_limit": beach_limit
+    }).mappings().one()
+
+    risk_date = target_date or row["latest_date"]
+    return {
+        "date": str(risk_date) if risk_date else None,
+        "risk": {**EMPTY_LEVELS, **(row["levels"] or {})},
+        "active_alerts": row["active_alerts"],
+        "monitored_beaches": row["monitored_beaches"],
+        "priority_beaches": row["priority_beaches"],
+        "alerts": row["alerts"],
+        "beaches": row["beaches"],
+        "tasks": row["tasks"],
+        "campaigns": row["campaigns"]
+    }
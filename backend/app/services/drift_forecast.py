@@ -0,0 +1,396 @@
+"""
+Drift forecast: advect sargassum particles on surface current and wind
+fields and count how many strand at each beach on each of the next days.
+
+Particles are plain NumPy arrays and every time step is a handful of
+vectorized gathers, so a million particles over a week takes seconds.
+
+Current and wind fields are "drift_field" SatLayers pointing at a .npz file:
+
+    u, v              surface current in m/s, (rows, cols) or (frames, rows, cols)
+    wind_u, wind_v    optional 10 m wind in m/s, same shape
+
+georeferenced by metadata_json like a risk raster (origin_lat, origin_lon,
+pixel_size or pixel_height / pixel_width) plus "frame_hours" (default 24)
+between frames. Without a field layer a steady synthetic westward current
+and trade wind is used. Particles are seeded from a "density_map" layer,
+proportionally to its pixel values, or in a band upwind of the beaches.
+"""
+import math
+import time
+from datetime import date, timedelta
+from typing import Optional, Tuple
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.beach import Beach
+from ..models.beach_risk_forecast import BeachRiskForecast
+from ..models.sat_layer import SatLayer
+from .cache import mark_changed
+from .ai_context import precompute_risk_context
+from .raster_sampling import RasterError, resolve_raster_path, open_raster
+from .risk_scoring import risk_levels_from_raw
+
+METERS_PER_DEGREE = 111320.0
+
+# Share of the particles per beach (particles / beach count) stranding at one
+# beach in a day that gives raw ~0.63
+ARRIVAL_SCALE = 0.1
+
+# Confidence of the first forecast day and its loss per extra day
+BASE_CONFIDENCE = 0.9
+CONFIDENCE_DECAY = 0.08
+MIN_CONFIDENCE = 0.3
+
+# Synthetic seeding band east of the beaches, in degrees
+SEED_BAND_OFFSET = 0.2
+SEED_BAND_WIDTH = 2.5
+SEED_BAND_MARGIN = 0.5
+
+FORECAST_SEED = 20240301
+INSERT_BATCH_SIZE = 5000
+
+
+class DriftField:
+    """
+    Velocity frames on a regular lat/lon grid, current plus windage * wind.
+    """
+
+    def __init__(self, u: np.ndarray, v: np.ndarray, origin_lat: float, origin_lon: float,
+                 pixel_height: float, pixel_width: float, frame_hours: float = 24.0):
+        if u.ndim == 2:
+            u, v = u[None], v[None]
+        # Flattened per frame so a step is a single 1-D gather
+        self.u = np.nan_to_num(u.astype(np.float32)).reshape(len(u), -1)
+        self.v = np.nan_to_num(v.astype(np.float32)).reshape(len(v), -1)
+        self.rows, self.cols = u.shape[1], u.shape[2]
+        self.origin_lat = origin_lat
+        self.origin_lon = origin_lon
+        self.inv_height = 1.0 / pixel_height
+        self.inv_width = 1.0 / pixel_width
+        self.frame_hours = frame_hours
+
+    def cells(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Flat cell index of every particle and a mask of those inside the grid.
+        """
+        rows = np.floor((self.origin_lat - lat) * self.inv_height).astype(np.int32)
+        cols = np.floor((lon - self.origin_lon) * self.inv_width).astype(np.int32)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        return np.where(inside, rows * self.cols + cols, 0), inside
+
+    def frame(self, hours: float) -> int:
+        return min(int(hours // self.frame_hours), len(self.u) - 1)
+
+
+class CaptureGrid:
+    """
+    Grid of cells within the capture radius of a beach, holding the index of
+    the nearest beach (or -1), so stranding is one lookup per particle.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, capture_km: float):
+        radius = capture_km * 1000.0
+        self.cell_height = capture_km * 500.0 / METERS_PER_DEGREE
+        cos_lat = math.cos(math.radians(float(np.mean(latitudes)))) if len(latitudes) else 1.0
+        self.cell_width = self.cell_height / max(cos_lat, 0.1)
+        reach = int(math.ceil(radius / (self.cell_height * METERS_PER_DEGREE)))
+
+        self.lat0 = float(latitudes.min()) - (reach + 1) * self.cell_height if len(latitudes) else 0.0
+        self.lon0 = float(longitudes.min()) - (reach + 1) * self.cell_width if len(longitudes) else 0.0
+        self.rows = int((latitudes.max() - self.lat0) / self.cell_height) + reach + 2 if len(latitudes) else 1
+        self.cols = int((longitudes.max() - self.lon0) / self.cell_width) + reach + 2 if len(longitudes) else 1
+        self.beach = np.full(self.rows * self.cols, -1, dtype=np.int32)
+        if not len(latitudes):
+            return
+
+        # Every (beach, nearby cell) pair, then the nearest beach per cell
+        beach_rows = ((latitudes - self.lat0) / self.cell_height).astype(np.int64)
+        beach_cols = ((longitudes - self.lon0) / self.cell_width).astype(np.int64)
+        offsets = np.arange(-reach, reach + 1)
+        cell_rows = (beach_rows[:, None, None] + offsets[None, :, None]).repeat(len(offsets), axis=2)
+        cell_cols = (beach_cols[:, None, None] + offsets[None, None, :]).repeat(len(offsets), axis=1)
+        center_lat = self.lat0 + (cell_rows + 0.5) * self.cell_height
+        center_lon = self.lon0 + (cell_cols + 0.5) * self.cell_width
+        distance = METERS_PER_DEGREE * np.hypot(
+            center_lat - latitudes[:, None, None],
+            (center_lon - longitudes[:, None, None]) * cos_lat
+        )
+        owner = np.broadcast_to(np.arange(len(latitudes))[:, None, None], distance.shape)
+        within = distance <= radius
+        within |= (cell_rows == beach_rows[:, None, None]) & (cell_cols == beach_cols[:, None, None])
+
+        flat = (cell_rows * self.cols + cell_cols)[within]
+        distance, owner = distance[within], owner[within]
+        order = np.lexsort((distance, flat))
+        flat, owner = flat[order], owner[order]
+        first = np.r_[True, flat[1:] != flat[:-1]]
+        self.beach[flat[first]] = owner[first]
+
+    def beaches_at(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        rows = np.floor((lat - self.lat0) * (1.0 / self.cell_height)).astype(np.int32)
+        cols = np.floor((lon - self.lon0) * (1.0 / self.cell_width)).astype(np.int32)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        return np.where(inside, self.beach[np.where(inside, rows * self.cols + cols, 0)], -1)
+
+
+def _georeference(metadata: dict) -> Tuple[float, float, float, float]:
+    try:
+        origin_lat = float(metadata["origin_lat"])
+        origin_lon = float(metadata["origin_lon"])
+    except KeyError as e:
+        raise RasterError(f"Missing georeference in metadata_json: {e.args[0]}")
+    pixel_height = float(metadata.get("pixel_height", metadata.get("pixel_size", 0)))
+    pixel_width = float(metadata.get("pixel_width", metadata.get("pixel_size", 0)))
+    if pixel_height <= 0 or pixel_width <= 0:
+        raise RasterError("metadata_json needs a positive pixel_size")
+    return origin_lat, origin_lon, pixel_height, pixel_width
+
+
+def load_drift_field(layer: SatLayer, windage: float) -> DriftField:
+    """
+    Load a drift_field layer, adding windage * wind to the current.
+    """
+    metadata = layer.metadata_json or {}
+    origin_lat, origin_lon, pixel_height, pixel_width = _georeference(metadata)
+    with np.load(resolve_raster_path(layer.url_or_path)) as arrays:
+        if "u" not in arrays or "v" not in arrays:
+            raise RasterError("Drift fields need u and v arrays")
+        u, v = arrays["u"].astype(np.float32), arrays["v"].astype(np.float32)
+        if "wind_u" in arrays and "wind_v" in arrays:
+            u = u + windage * arrays["wind_u"].astype(np.float32)
+            v = v + windage * arrays["wind_v"].astype(np.float32)
+    if u.shape != v.shape or u.ndim not in (2, 3):
+        raise RasterError("Drift field arrays must share a (rows, cols) or (frames, rows, cols) shape")
+    return DriftField(u, v, origin_lat, origin_lon, pixel_height, pixel_width,
+                      float(metadata.get("frame_hours", 24)))
+
+
+def synthetic_drift_field(latitudes: np.ndarray, longitudes: np.ndarray, windage: float) -> DriftField:
+    """
+    Steady westward current with gentle meanders plus an easterly trade wind,
+    covering the beaches and the synthetic seeding band.
+    """
+    pixel = 0.1
+    lat_max = float(latitudes.max()) + 3.0
+    lat_min = float(latitudes.min()) - 3.0
+    lon_min = float(longitudes.min()) - 3.0
+    lon_max = float(longitudes.max()) + SEED_BAND_OFFSET + SEED_BAND_WIDTH + 3.0
+    lat = lat_max - (np.arange(int((lat_max - lat_min) / pixel)) + 0.5) * pixel
+    lon = lon_min + (np.arange(int((lon_max - lon_min) / pixel)) + 0.5) * pixel
+    lat, lon = np.meshgrid(lat, lon, indexing="ij")
+
+    u = -0.25 + 0.08 * np.sin(2 * np.pi * lat / 3.0)
+    v = 0.05 * np.cos(2 * np.pi * lon / 4.0)
+    wind_u, wind_v = -6.0, 1.0
+    return DriftField(u + windage * wind_u, v + windage * wind_v, lat_max, lon_min, pixel, pixel)
+
+
+def seed_from_layer(layer: SatLayer, particles: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draw particle positions with probability proportional to pixel value.
+    """
+    metadata = layer.metadata_json or {}
+    origin_lat, origin_lon, pixel_height, pixel_width = _georeference(metadata)
+    raster = open_raster(resolve_raster_path(layer.url_or_path), metadata)
+    weights = np.asarray(raster, dtype=np.float64).ravel()
+    if metadata.get("nodata") is not None:
+        weights = np.where(weights == metadata["nodata"], 0.0, weights)
+    cdf = np.cumsum(np.clip(np.nan_to_num(weights), 0.0, None))
+    if not len(cdf) or cdf[-1] <= 0:
+        raise RasterError(f"Layer {layer.id} has no positive density to seed from")
+
+    cells = np.searchsorted(cdf, rng.random(particles) * cdf[-1], side="right")
+    rows, cols = np.divmod(cells, raster.shape[1])
+    lat = origin_lat - (rows + rng.random(particles)) * pixel_height
+    lon = origin_lon + (cols + rng.random(particles)) * pixel_width
+    return lat.astype(np.float32), lon.astype(np.float32)
+
+
+def seed_upwind_band(latitudes: np.ndarray, longitudes: np.ndarray, particles: int,
+                     rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spread particles uniformly over a band east of the easternmost beach.
+    """
+    lat = rng.uniform(latitudes.min() - SEED_BAND_MARGIN, latitudes.max() + SEED_BAND_MARGIN, particles)
+    lon_start = longitudes.max() + SEED_BAND_OFFSET
+    lon = rng.uniform(lon_start, lon_start + SEED_BAND_WIDTH, particles)
+    return lat.astype(np.float32), lon.astype(np.float32)
+
+
+def advect_particles(
+    field: DriftField,
+    capture: CaptureGrid,
+    lat: np.ndarray,
+    lon: np.ndarray,
+    beach_count: int,
+    horizon_days: int,
+    step_hours: float,
+    diffusivity: float,
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, int]:
+    """
+    Euler-integrate particles for horizon_days with a random-walk diffusion
+    term. Particles entering a beach's capture cells strand there and are
+    dropped, as are particles leaving the field.
+    Returns stranded counts per (day, beach) and the number of lost particles.
+    """
+    arrivals = np.zeros((horizon_days, beach_count), dtype=np.int64)
+    dt = step_hours * 3600.0
+    sigma = np.float32(math.sqrt(2.0 * diffusivity * dt) / METERS_PER_DEGREE) if diffusivity > 0 else None
+    scale = np.float32(dt / METERS_PER_DEGREE)
+    steps_per_day = max(int(round(24.0 / step_hours)), 1)
+    lost = 0
+
+    for step in range(horizon_days * steps_per_day):
+        if not len(lat):
+            break
+        cells, inside = field.cells(lat, lon)
+        frame = field.frame(step * step_hours)
+        inv_cos = 1.0 / np.cos(np.radians(lat))
+        dlat = field.v[frame][cells] * scale
+        dlon = field.u[frame][cells] * scale
+        if sigma is not None:
+            dlat += rng.standard_normal(len(lat), dtype=np.float32) * sigma
+            dlon += rng.standard_normal(len(lat), dtype=np.float32) * sigma
+        dlon *= inv_cos
+        lat += dlat
+        lon += dlon
+
+        stranded_at = capture.beaches_at(lat, lon)
+        stranded = stranded_at >= 0
+        arrivals[step // steps_per_day] += np.bincount(stranded_at[stranded], minlength=beach_count)
+
+        keep = inside & ~stranded
+        lost += int(np.count_nonzero(~inside & ~stranded))
+        if not keep.all():
+            lat, lon = lat[keep], lon[keep]
+
+    return arrivals, lost
+
+
+def scores_from_arrivals(arrivals: np.ndarray, particles: int) -> dict:
+    """
+    Turn stranded counts per (day, beach) into raw values, levels and
+    confidences; confidence falls with the horizon. Counts are scaled by the
+    particles per beach, so the levels do not saturate as either grows.
+    """
+    per_beach = particles / max(arrivals.shape[1], 1)
+    raw = 1.0 - np.exp(-arrivals / max(per_beach * ARRIVAL_SCALE, 1e-9))
+    horizons = np.arange(1, arrivals.shape[0] + 1)
+    confidence = np.maximum(BASE_CONFIDENCE - CONFIDENCE_DECAY * (horizons - 1), MIN_CONFIDENCE)
+    return {
+        "raw_value": np.round(raw, 4),
+        "risk_level": risk_levels_from_raw(raw),
+        "confidence": np.round(np.broadcast_to(confidence[:, None], raw.shape), 2)
+    }
+
+
+def _latest_layer(db: Session, data_type: str, issued_on: date) -> Optional[SatLayer]:
+    return db.query(SatLayer).filter(
+        SatLayer.data_type == data_type,
+        SatLayer.date <= issued_on
+    ).order_by(SatLayer.date.desc(), SatLayer.id.desc()).first()
+
+
+def _get_layer(db: Session, layer_id: int, data_type: str) -> SatLayer:
+    layer = db.query(SatLayer).filter(SatLayer.id == layer_id).first()
+    if not layer:
+        raise RasterError(f"Satellite layer {layer_id} not found")
+    if layer.data_type != data_type:
+        raise RasterError(f"Layer {layer_id} is not a {data_type}")
+    return layer
+
+
+def run_drift_forecast(
+    db: Session,
+    issued_on: Optional[date] = None,
+    horizon_days: Optional[int] = None,
+    particles: Optional[int] = None,
+    field_layer_id: Optional[int] = None,
+    seed_layer_id: Optional[int] = None,
+    seed: int = FORECAST_SEED
+) -> dict:
+    """
+    Run a drift forecast issued on issued_on (default today) and replace that
+    issue's BeachRiskForecast rows. Without layer ids the newest drift_field
+    and density_map layers up to issued_on are used, falling back to the
+    synthetic field and seeding band.
+    """
+    started = time.perf_counter()
+    issued_on = issued_on or date.today()
+    horizon_days = horizon_days or settings.FORECAST_HORIZON_DAYS
+    particles = particles or settings.FORECAST_PARTICLES
+    rng = np.random.default_rng(seed)
+
+    beaches = db.query(Beach.id, Beach.latitude, Beach.longitude).order_by(Beach.id).all()
+    if not beaches:
+        return {"issued_on": str(issued_on), "beaches_forecast": 0, "rows_written": 0}
+    beach_ids = np.array([b.id for b in beaches], dtype=np.int64)
+    latitudes = np.array([b.latitude for b in beaches], dtype=np.float64)
+    longitudes = np.array([b.longitude for b in beaches], dtype=np.float64)
+
+    step = time.perf_counter()
+    field_layer = _get_layer(db, field_layer_id, "drift_field") if field_layer_id \
+        else _latest_layer(db, "drift_field", issued_on)
+    seed_layer = _get_layer(db, seed_layer_id, "density_map") if seed_layer_id \
+        else _latest_layer(db, "density_map", issued_on)
+    field = load_drift_field(field_layer, settings.FORECAST_WINDAGE) if field_layer \
+        else synthetic_drift_field(latitudes, longitudes, settings.FORECAST_WINDAGE)
+    lat, lon = seed_from_layer(seed_layer, particles, rng) if seed_layer \
+        else seed_upwind_band(latitudes, longitudes, particles, rng)
+    capture = CaptureGrid(latitudes, longitudes, settings.FORECAST_CAPTURE_KM)
+    setup_ms = round((time.perf_counter() - step) * 1000, 2)
+
+    step = time.perf_counter()
+    arrivals, lost = advect_particles(
+        field, capture, lat, lon, len(beaches), horizon_days,
+        settings.FORECAST_STEP_HOURS, settings.FORECAST_DIFFUSIVITY, rng
+    )
+    advect_ms = round((time.perf_counter() - step) * 1000, 2)
+
+    step = time.perf_counter()
+    scores = scores_from_arrivals(arrivals, particles)
+    rows = [
+        {
+            "issued_on": issued_on,
+            "horizon": horizon + 1,
+            "beach_id": int(beach_ids[i]),
+            "date": issued_on + timedelta(days=horizon + 1),
+            "risk_level": int(scores["risk_level"][horizon, i]),
+            "raw_value": float(scores["raw_value"][horizon, i]),
+            "confidence": float(scores["confidence"][horizon, i]),
+            "particle_count": int(arrivals[horizon, i]),
+            "source": f"FORECAST_D+{horizon + 1}"
+        }
+        for horizon in range(horizon_days)
+        for i in range(len(beaches))
+    ]
+    db.query(BeachRiskForecast).filter(BeachRiskForecast.issued_on == issued_on).delete(synchronize_session=False)
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.execute(insert(BeachRiskForecast), rows[start:start + INSERT_BATCH_SIZE])
+    mark_changed(db, "risk")
+    db.commit()
+    precompute_risk_context(db)
+    write_ms = round((time.perf_counter() - step) * 1000, 2)
+
+    stranded = int(arrivals.sum())
+    return {
+        "issued_on": str(issued_on),
+        "horizon_days": horizon_days,
+        "particles": particles,
+        "particles_stranded": stranded,
+        "particles_lost": lost,
+        "field_layer_id": field_layer.id if field_layer else None,
+        "seed_layer_id": seed_layer.id if seed_layer else None,
+        "beaches_forecast": len(beaches),
+        "rows_written": len(rows),
+        "high_risk_by_horizon": [int(n) for n in (scores["risk_level"] == 3).sum(axis=1)],
+        "timings": {
+            "setup_ms": setup_ms,
+            "advect_ms": advect_ms,
+            "write_ms": write_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    }
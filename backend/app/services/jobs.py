@@ -0,0 +1,246 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal
+from ..models.job import Job
+from .risk_ingestion import (
+    update_beach_risk_for_date,
+    bulk_update_beach_risk_for_date,
+    simulate_historical_data
+)
+from .backfill import run_backfill
+from .raster_sampling import ingest_sat_layer
+from .partitions import maintain_risk_partitions
+from .drift_forecast import run_drift_forecast
+
+logger = logging.getLogger(__name__)
+
+# job_type -> handler(db, params, report_progress) returning a JSON-serializable result
+JOB_HANDLERS: Dict[str, Callable[[Session, dict, Callable[[float], None]], dict]] = {}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_heartbeat_stop: Optional[threading.Event] = None
+
+# Identifies this process as the owner of the jobs it runs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def register_job(job_type: str):
+    """
+    Decorator registering a handler for a job type.
+    """
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _set_progress(job_id: int, fraction: float) -> None:
+    # Progress goes through its own short session so it is visible
+    # immediately and never mixes with the handler's transaction
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(
+            {Job.progress: max(0.0, min(1.0, fraction)), Job.heartbeat_at: _now()}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _progress_counter(report_progress: Callable[[float], None]) -> Callable[[int, int], None]:
+    """
+    Adapt report_progress to the (done, total) callbacks of the services.
+    """
+    return lambda done, total: report_progress(done / total if total else 1.0)
+
+
+def _run_job(job_id: int) -> None:
+    """
+    Execute a queued job on a worker thread.
+    """
+    db = SessionLocal()
+    try:
+        # Claim the job atomically; another process may have resubmitted it too
+        claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update(
+            {Job.status: "running", Job.started_at: _now(), Job.worker_id: WORKER_ID, Job.heartbeat_at: _now()}
+        )
+        db.commit()
+        if not claimed:
+            return
+        job = db.query(Job).filter(Job.id == job_id).first()
+        handler = JOB_HANDLERS.get(job.job_type)
+        
+        work_db = SessionLocal()
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job type: {job.job_type}")
+            result = handler(work_db, job.params or {}, lambda fraction: _set_progress(job_id, fraction))
+            job.status = "succeeded"
+            job.progress = 1.0
+            job.result = result
+        except Exception as e:
+            work_db.rollback()
+            logger.exception("Job %s (%s) failed", job_id, job.job_type)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            work_db.close()
+        
+        job.finished_at = _now()
+        db.commit()
+    finally:
+        db.close()
+
+
+def enqueue_job(db: Session, job_type: str, params: Optional[dict] = None) -> Job:
+    """
+    Persist a job and hand it to the worker pool.
+    Returns immediately with the queued Job.
+    """
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    
+    job = Job(job_type=job_type, status="queued", params=params or {}, progress=0.0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _submit(job.id)
+    return job
+
+
+def _submit(job_id: int) -> None:
+    global _executor, _heartbeat_stop
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix="job")
+    if _heartbeat_stop is None:
+        _heartbeat_stop = threading.Event()
+        threading.Thread(target=_heartbeat, args=(_heartbeat_stop,), name="job-heartbeat", daemon=True).start()
+    _executor.submit(_run_job, job_id)
+
+
+def _heartbeat(stop: threading.Event) -> None:
+    """
+    Refresh heartbeat_at on this process's running jobs until stopped.
+    """
+    while not stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.worker_id == WORKER_ID, Job.status == "running").update(
+                {Job.heartbeat_at: _now()}
+            )
+            db.commit()
+        except Exception:
+            logger.exception("Could not refresh job heartbeats")
+        finally:
+            db.close()
+
+
+def fail_abandoned_jobs(db: Session) -> int:
+    """
+    Mark failed the running jobs whose owner stopped sending heartbeats,
+    i.e. whose process died. Jobs of live processes are left alone.
+    """
+    cutoff = _now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    failed = db.query(Job).filter(
+        Job.status == "running",
+        Job.heartbeat_at.is_(None) | (Job.heartbeat_at < cutoff)
+    ).update(
+        {Job.status: "failed", Job.error: "Interrupted: its worker stopped responding", Job.finished_at: _now()},
+        synchronize_session=False
+    )
+    db.commit()
+    return failed
+
+
+def start_job_runner() -> None:
+    """
+    Start the in-process worker pool.
+    Running jobs whose worker has gone away are marked failed; queued jobs are resubmitted.
+    """
+    db = SessionLocal()
+    try:
+        fail_abandoned_jobs(db)
+        queued_ids = [row[0] for row in db.query(Job.id).filter(Job.status == "queued").order_by(Job.id).all()]
+    finally:
+        db.close()
+    
+    for job_id in queued_ids:
+        _submit(job_id)
+
+
+def stop_job_runner() -> None:
+    """
+    Stop accepting work; running jobs finish, queued ones are picked up on next start.
+    """
+    global _executor, _heartbeat_stop
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _heartbeat_stop is not None:
+        _heartbeat_stop.set()
+        _heartbeat_stop = None
+
+
+@register_job("simulate_ingestion")
+def _simulate_ingestion_job(db: Session, params: dict, report_progress: Callable[[float], None]) -> dict:
+    return simulate_historical_data(
+        db,
+        params.get("days", 14),
+        bulk=params.get("bulk", False),
+        progress=_progress_counter(report_progress)
+    )
+
+
+@register_job("update_today")
+def _update_today_job(db: Session, params: dict, report_progress: Callable[[float], None]) -> dict:
+    update_for_date = bulk_update_beach_risk_for_date if params.get("bulk") else update_beach_risk_for_date
+    return update_for_date(db, date.today(), progress=_progress_counter(report_progress))
+
+
+@register_job("backfill")
+def _backfill_job(db: Session, params: dict, report_progress: Callable[[float], None]) -> dict:
+    return run_backfill(
+        db,
+        date.fromisoformat(params["start_date"]),
+        date.fromisoformat(params["end_date"]),
+        chunk_days=params.get("chunk_days"),
+        progress=_progress_counter(report_progress)
+    )
+
+
+@register_job("sat_layer_ingest")
+def _sat_layer_ingest_job(db: Session, params: dict, report_progress: Callable[[float], None]) -> dict:
+    return ingest_sat_layer(db, params["layer_id"])
+
+
+@register_job("risk_partition_maintenance")
+def _risk_partition_maintenance_job(db: Session, params: dict, report_progress: Callable[[float], None]) -> dict:
+    return maintain_risk_partitions(
+        db,
+        months_ahead=params.get("months_ahead"),
+        retention_months=params.get("retention_months"),
+        retention_action=params.get("retention_action")
+    )
+
+
+@register_job("drift_forecast")
+def _drift_forecast_job(db: Session, params: dict, report_progress: Callable[[float], None]) -> dict:
+    return run_drift_forecast(
+        db,
+        horizon_days=params.get("horizon_days"),
+        particles=params.get("particles"),
+        field_layer_id=params.get("field_layer_id"),
+        seed_layer_id=params.get("seed_layer_id")
+    )
@@ -0,0 +1,230 @@
+"""
+Chat model backends for the AI assistant.
+
+A provider has `async complete(messages, max_tokens, temperature) -> str`,
+`stream(...)`, an async iterator of reply pieces, and `async close()`.
+Provider failures are raised as AIProviderError, classified once here
+(retryable or not, provider-wide outage or not) so callers never inspect
+error strings. Rate limits, retries and the circuit breaker live in
+ai_client, around whichever provider AI_PROVIDER selects:
+
+- "openai": the OpenAI API over a keep-alive connection pool
+- "local": a deterministic stand-in that answers from the prompt itself,
+  with configurable latency and failure rate, for tests and benchmarks
+"""
+import asyncio
+import logging
+import random
+from typing import AsyncIterator, List, Optional
+import httpx
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AIUnavailable(Exception):
+    """
+    The model cannot answer right now; callers fall back to rule-based replies.
+    """
+
+
+class AIBusy(AIUnavailable):
+    """
+    This process's own limits refused the call: no free slot or no rate-limit token.
+    """
+
+
+class AICircuitOpen(AIUnavailable):
+    """
+    Recent provider failures opened the circuit breaker; no call was made.
+    """
+
+
+class AIProviderError(AIUnavailable):
+    """
+    The provider failed the call. retryable errors may succeed if tried
+    again shortly; outage errors count towards opening the circuit breaker.
+    """
+
+    def __init__(self, message: str, retryable: bool = False, outage: bool = True,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.outage = outage
+        self.retry_after = retry_after
+
+
+class AIRateLimited(AIProviderError):
+    """
+    The provider asked us to slow down (HTTP 429).
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, retryable=True, outage=True, retry_after=retry_after)
+
+
+def _retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def openai_error(error: Exception) -> Exception:
+    """
+    Map an openai library exception to an AIProviderError; anything else
+    is returned unchanged.
+    """
+    import openai
+
+    if isinstance(error, openai.APITimeoutError):
+        return AIProviderError("The AI request timed out", retryable=True)
+    if isinstance(error, openai.APIConnectionError):
+        return AIProviderError("Could not reach the AI provider", retryable=True)
+    if isinstance(error, openai.RateLimitError):
+        if error.code == "insufficient_quota":
+            return AIProviderError("The AI provider quota is exhausted")
+        return AIRateLimited("The AI provider is rate limiting requests", _retry_after(error.response))
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        if status >= 500 or status in (408, 409):
+            return AIProviderError(f"The AI provider returned HTTP {status}", retryable=True,
+                                   retry_after=_retry_after(error.response))
+        if status in (401, 403):
+            return AIProviderError(f"The AI provider rejected our credentials (HTTP {status})")
+        # A problem with this request only, e.g. an oversized prompt
+        return AIProviderError(f"The AI provider rejected the request (HTTP {status}): {error.message}",
+                               outage=False)
+    return error
+
+
+class OpenAIProvider:
+    """
+    OpenAI chat completions on one AsyncOpenAI client over a keep-alive
+    httpx pool sized to AI_MAX_CONCURRENCY. The library's own retries are
+    off; ai_client retries with backoff instead.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.AI_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.AI_MAX_CONCURRENCY,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(settings.AI_REQUEST_TIMEOUT, connect=settings.AI_CONNECT_TIMEOUT)
+        )
+        self.model = model
+        self._client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url or None,
+            http_client=http_client,
+            max_retries=0
+        )
+
+    async def complete(self, messages: List[dict], max_tokens: int, temperature: float) -> str:
+        try:
+            response = await self._client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+        except Exception as e:
+            raise openai_error(e) from e
+        return response.choices[0].message.content
+
+    async def stream(self, messages: List[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        stream = None
+        try:
+            stream = await self._client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise openai_error(e) from e
+        finally:
+            if stream is not None:
+                await stream.close()
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+class LocalProvider:
+    """
+    Deterministic stand-in: replies with the question and the risk summary
+    lines from the prompt, after `latency` seconds, streaming one word every
+    `token_delay` seconds. A `failure_rate` fraction of calls, drawn from a
+    generator seeded with `seed`, fail as retryable outages.
+    """
+
+    name = "local"
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def reply_for(messages: List[dict]) -> str:
+        question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        reply = f"Local model reply to: {question}"
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        if "Risk Summary:" in system:
+            summary = system.split("Risk Summary:", 1)[1].strip().split("\n\n", 1)[0]
+            reply += f"\n\nCurrent risk summary:\n{summary}"
+        return reply
+
+    async def _start(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise AIProviderError("Local provider failure", retryable=True)
+
+    async def complete(self, messages: List[dict], max_tokens: int, temperature: float) -> str:
+        await self._start()
+        return self.reply_for(messages)
+
+    async def stream(self, messages: List[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        await self._start()
+        for i, word in enumerate(self.reply_for(messages).split(" ")):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield word if i == 0 else f" {word}"
+
+    async def close(self) -> None:
+        pass
+
+
+def create_provider(name: str):
+    """
+    Build the provider for AI_PROVIDER, or None when it is not usable here
+    (OpenAI without OPENAI_API_KEY or the openai library).
+    """
+    if name == "local":
+        return LocalProvider(
+            latency=settings.AI_LOCAL_LATENCY,
+            token_delay=settings.AI_LOCAL_TOKEN_DELAY,
+            failure_rate=settings.AI_LOCAL_FAILURE_RATE
+        )
+    if name == "openai":
+        if not settings.OPENAI_API_KEY:
+            return None
+        try:
+            return OpenAIProvider(settings.OPENAI_API_KEY, settings.OPENAI_MODEL, settings.OPENAI_BASE_URL)
+        except ImportError:
+            logger.warning("openai is not installed; the AI assistant will use its fallback responses")
+            return None
+    raise ValueError(f"Unsupported AI_PROVIDER: {name}")
@@ -0,0 +1,299 @@
+"""
+GeoJSON map layer with server-side clustering.
+
+Beach positions are projected to Web Mercator and grouped, for every zoom
+level up to CLUSTER_MAX_ZOOM, into square cells of CLUSTER_CELLS_PER_TILE
+per tile side. Cells at zoom z+1 nest exactly inside cells at zoom z, so the
+levels form a hierarchy that is built once per version of the beaches and
+only re-aggregated for risk per date. Above CLUSTER_MAX_ZOOM every beach is
+its own feature.
+
+Features are grouped by the XYZ tile holding them and each
+(date, zoom, tile) is cached until beach or risk data changes, so panning
+the map only computes tiles it has not seen.
+"""
+import math
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from ..models.beach import Beach
+from ..models.beach_daily_risk import BeachDailyRisk
+from ..models.beach_current_state import BeachCurrentState
+from .cache import query_cache
+
+CLUSTER_MAX_ZOOM = 12
+# Cells per tile side: 4 cells of 64px on a 256px tile
+CLUSTER_CELLS_PER_TILE = 4
+MAX_ZOOM = 22
+
+MAX_MERCATOR_LAT = 85.05112878
+
+COORDINATE_DIGITS = 5
+
+
+def project(latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Web Mercator x, y in [0, 1), y growing southwards as in XYZ tiles.
+    """
+    lat = np.radians(np.clip(latitudes, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0.0)), np.clip(y, 0.0, np.nextafter(1.0, 0.0))
+
+
+def tile_range(bbox: Tuple[float, float, float, float], zoom: int) -> Tuple[range, range]:
+    """
+    XYZ tile columns and rows covering a min_lon,min_lat,max_lon,max_lat box.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    xs, ys = project(np.array([max_lat, min_lat]), np.array([min_lon, max_lon]))
+    scale = 2 ** zoom
+    return (
+        range(int(xs[0] * scale), int(xs[1] * scale) + 1),
+        range(int(ys[0] * scale), int(ys[1] * scale) + 1)
+    )
+
+
+class ZoomLevel:
+    """
+    Clusters at one zoom: per-beach cluster index plus per-cluster arrays.
+    """
+
+    def __init__(self, zoom: int, inverse: np.ndarray, first: np.ndarray, counts: np.ndarray,
+                 latitudes: np.ndarray, longitudes: np.ndarray, tile_x: np.ndarray, tile_y: np.ndarray):
+        self.zoom = zoom
+        self.inverse = inverse
+        self.first = first
+        self.counts = counts
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.expansion_zoom = np.full(len(counts), zoom + 1, dtype=np.int16)
+        self.tiles: Dict[Tuple[int, int], np.ndarray] = {}
+        if len(counts):
+            keys = tile_x.astype(np.int64) << 32 | tile_y.astype(np.int64)
+            order = np.argsort(keys, kind="stable")
+            unique_keys, starts = np.unique(keys[order], return_index=True)
+            for key, members in zip(unique_keys, np.split(order, starts[1:])):
+                self.tiles[(int(key >> 32), int(key & 0xFFFFFFFF))] = members
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def tiles_in(self, columns: range, rows: range) -> List[Tuple[int, int]]:
+        if len(columns) * len(rows) > len(self.tiles):
+            return sorted(
+                tile for tile in self.tiles
+                if columns.start <= tile[0] < columns.stop and rows.start <= tile[1] < rows.stop
+            )
+        return [(x, y) for x in columns for y in rows if (x, y) in self.tiles]
+
+
+class ClusterHierarchy:
+    """
+    Per-zoom clusters of every beach, levels 0 through CLUSTER_MAX_ZOOM
+    plus one unclustered level above it.
+    """
+
+    def __init__(self, rows: List[tuple], version: int, max_zoom: int = CLUSTER_MAX_ZOOM):
+        self.version = version
+        self.max_zoom = max_zoom
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.properties = [
+            {"name": name, "island": island, "tourism_importance": importance}
+            for _, name, island, _, _, importance in rows
+        ]
+        latitudes = np.array([row[3] for row in rows], dtype=np.float64)
+        longitudes = np.array([row[4] for row in rows], dtype=np.float64)
+        self.positions = {int(beach_id): i for i, beach_id in enumerate(self.ids)}
+
+        x, y = project(latitudes, longitudes)
+        self.levels: List[ZoomLevel] = []
+        for zoom in range(max_zoom + 2):
+            self.levels.append(self._build_level(zoom, x, y, latitudes, longitudes))
+
+        # A cluster expands at the first deeper zoom where it has more than one child
+        for zoom in range(max_zoom - 1, -1, -1):
+            level, child = self.levels[zoom], self.levels[zoom + 1]
+            if not len(level):
+                continue
+            pairs = np.unique(level.inverse.astype(np.int64) << 32 | child.inverse)
+            children = np.bincount((pairs >> 32).astype(np.int64), minlength=len(level))
+            only_child = child.inverse[level.first]
+            level.expansion_zoom = np.where(
+                children > 1, zoom + 1, child.expansion_zoom[only_child]
+            ).astype(np.int16)
+
+    def _build_level(self, zoom: int, x: np.ndarray, y: np.ndarray,
+                     latitudes: np.ndarray, longitudes: np.ndarray) -> ZoomLevel:
+        if zoom > self.max_zoom:
+            # Unclustered: every beach is its own feature
+            count = len(self.ids)
+            return ZoomLevel(
+                zoom, np.arange(count), np.arange(count), np.ones(count, dtype=np.int64),
+                latitudes, longitudes,
+                (x * 2 ** zoom).astype(np.int64), (y * 2 ** zoom).astype(np.int64)
+            )
+        scale = 2 ** zoom * CLUSTER_CELLS_PER_TILE
+        cell_x = (x * scale).astype(np.int64)
+        cell_y = (y * scale).astype(np.int64)
+        keys = cell_x << 32 | cell_y
+        unique_keys, first, inverse, counts = np.unique(
+            keys, return_index=True, return_inverse=True, return_counts=True
+        )
+        inverse = inverse.reshape(-1)
+        return ZoomLevel(
+            zoom, inverse, first, counts,
+            np.bincount(inverse, weights=latitudes, minlength=len(counts)) / counts,
+            np.bincount(inverse, weights=longitudes, minlength=len(counts)) / counts,
+            (unique_keys >> 32) // CLUSTER_CELLS_PER_TILE,
+            (unique_keys & 0xFFFFFFFF) // CLUSTER_CELLS_PER_TILE
+        )
+
+    def level_for(self, zoom: int) -> ZoomLevel:
+        return self.levels[min(zoom, self.max_zoom + 1)]
+
+
+_hierarchy: Optional[ClusterHierarchy] = None
+_hierarchy_lock = threading.Lock()
+
+
+def get_hierarchy(db: Session) -> ClusterHierarchy:
+    """
+    The cluster hierarchy for the current beaches, rebuilt when they change.
+    """
+    global _hierarchy
+    version = query_cache.versions(("beaches",))[0]
+    with _hierarchy_lock:
+        if _hierarchy is None or _hierarchy.version != version:
+            rows = db.query(
+                Beach.id, Beach.name, Beach.island, Beach.latitude, Beach.longitude, Beach.tourism_importance
+            ).order_by(Beach.id).all()
+            _hierarchy = ClusterHierarchy(rows, version)
+        return _hierarchy
+
+
+def _beach_risk_levels(db: Session, hierarchy: ClusterHierarchy, target_date: Optional[date]) -> np.ndarray:
+    """
+    Risk level per hierarchy beach on a date, or its latest known level
+    without one; -1 where there is none.
+    """
+    def compute():
+        levels = np.full(len(hierarchy.ids), -1, dtype=np.int16)
+        if target_date is None:
+            rows = db.query(BeachCurrentState.beach_id, BeachCurrentState.risk_level).filter(
+                BeachCurrentState.risk_level.isnot(None)
+            ).all()
+        else:
+            rows = db.query(BeachDailyRisk.beach_id, BeachDailyRisk.risk_level).filter(
+                BeachDailyRisk.date == target_date
+            ).all()
+        for beach_id, risk_level in rows:
+            position = hierarchy.positions.get(beach_id)
+            if position is not None:
+                levels[position] = risk_level
+        return levels
+
+    return query_cache.get_or_compute(
+        f"map:levels:{hierarchy.version}:{target_date}", ("risk", "beaches"), compute
+    )
+
+
+def _cluster_risk(db: Session, hierarchy: ClusterHierarchy, target_date: Optional[date], level: ZoomLevel) -> tuple:
+    """
+    Per-cluster (max risk level, high-risk count, medium-risk count) at one zoom.
+    """
+    def compute():
+        levels = _beach_risk_levels(db, hierarchy, target_date)
+        highest = np.full(len(level), -1, dtype=np.int16)
+        np.maximum.at(highest, level.inverse, levels)
+        high = np.bincount(level.inverse, weights=levels >= 3, minlength=len(level)).astype(np.int64)
+        medium = np.bincount(level.inverse, weights=levels == 2, minlength=len(level)).astype(np.int64)
+        return highest, high, medium
+
+    return query_cache.get_or_compute(
+        f"map:clusters:{hierarchy.version}:{target_date}:{level.zoom}", ("risk", "beaches"), compute
+    )
+
+
+def _point_feature(hierarchy: ClusterHierarchy, position: int, risk_level: int, lat: float, lon: float) -> dict:
+    beach_id = int(hierarchy.ids[position])
+    return {
+        "type": "Feature",
+        "id": beach_id,
+        "geometry": {"type": "Point", "coordinates": [round(lon, COORDINATE_DIGITS), round(lat, COORDINATE_DIGITS)]},
+        "properties": {
+            "beach_id": beach_id,
+            **hierarchy.properties[position],
+            "risk_level": risk_level if risk_level >= 0 else None
+        }
+    }
+
+
+def tile_features(db: Session, hierarchy: ClusterHierarchy, target_date: Optional[date], zoom: int,
+                  tile: Tuple[int, int]) -> List[dict]:
+    """
+    Features of one tile, cached per (date, zoom, tile) until beaches or
+    risk change. A None date means each beach's latest known risk.
+    """
+    level = hierarchy.level_for(zoom)
+
+    def compute():
+        highest, high, medium = _cluster_risk(db, hierarchy, target_date, level)
+        features = []
+        for cluster in level.tiles.get(tile, ()):
+            lat, lon = float(level.latitudes[cluster]), float(level.longitudes[cluster])
+            if level.counts[cluster] == 1:
+                features.append(_point_feature(hierarchy, int(level.first[cluster]), int(highest[cluster]), lat, lon))
+                continue
+            features.append({
+                "type": "Feature",
+                "id": f"{level.zoom}-{cluster}",
+                "geometry": {"type": "Point", "coordinates": [round(lon, COORDINATE_DIGITS), round(lat, COORDINATE_DIGITS)]},
+                "properties": {
+                    "cluster": True,
+                    "point_count": int(level.counts[cluster]),
+                    "max_risk_level": int(highest[cluster]) if highest[cluster] >= 0 else None,
+                    "high_risk": int(high[cluster]),
+                    "medium_risk": int(medium[cluster]),
+                    "expansion_zoom": int(level.expansion_zoom[cluster])
+                }
+            })
+        return features
+
+    return query_cache.get_or_compute(
+        f"map:tile:{hierarchy.version}:{target_date}:{level.zoom}:{tile[0]}/{tile[1]}", ("risk", "beaches"), compute
+    )
+
+
+def get_map_features(
+    db: Session,
+    target_date: Optional[date],
+    zoom: int,
+    bbox: Optional[Tuple[float, float, float, float]] = None
+) -> dict:
+    """
+    GeoJSON FeatureCollection of beaches or clusters at a zoom, from every
+    tile overlapping bbox (the whole layer without one). Features come whole
+    tiles at a time, so some may fall slightly outside bbox. Without a date
+    risk is each beach's latest known level from beach_current_state.
+    """
+    hierarchy = get_hierarchy(db)
+    level = hierarchy.level_for(zoom)
+    if bbox is None:
+        tiles = sorted(level.tiles)
+    else:
+        columns, rows = tile_range(bbox, level.zoom)
+        tiles = level.tiles_in(columns, rows)
+
+    features = []
+    for tile in tiles:
+        features.extend(tile_features(db, hierarchy, target_date, zoom, tile))
+    return {
+        "type": "FeatureCollection",
+        "date": str(target_date) if target_date else None,
+        "zoom": zoom,
+        "clustered": zoom <= hierarchy.max_zoom,
+        "features": features
+    }
@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are ordered by (sort key, id) and a cursor encodes the last row of a
+page, so fetching the next page is an index seek to that position instead of
+an OFFSET scan: page N costs the same as page 1, and rows inserted while a
+client pages through never shift later pages. Rows with a NULL sort key come
+after all others.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class CursorError(ValueError):
+    pass
+
+
+def _cursor_tag(sort_column, descending: bool) -> str:
+    return f"{sort_column.class_.__tablename__}.{sort_column.key}.{'desc' if descending else 'asc'}"
+
+
+def encode_cursor(tag: str, value: Any, last_id: int) -> str:
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    payload = json.dumps([tag, value, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, tag: str, sort_column) -> Tuple[Any, int]:
+    """
+    Return (sort value, id) from a cursor issued for the same listing.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_tag, value, last_id = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError):
+        raise CursorError("Invalid cursor")
+    if cursor_tag != tag or not isinstance(last_id, int):
+        raise CursorError("Cursor does not belong to this listing")
+
+    if value is not None:
+        python_type = sort_column.type.python_type
+        try:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            else:
+                value = python_type(value)
+        except (TypeError, ValueError):
+            raise CursorError("Invalid cursor")
+    return value, last_id
+
+
+def _after(column, value, descending: bool):
+    return column < value if descending else column > value
+
+
+def _ordered(column, descending: bool):
+    return column.desc() if descending else column.asc()
+
+
+def keyset_paginate(
+    query: Query,
+    sort_column,
+    id_column,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return one page of query ordered by (sort_column, id_column) and the
+    cursor for the next page, or None on the last page. Rows may be
+    entities or tuples whose first element is the entity being paged.
+
+    Each page is at most two index range scans on (sort key, id): the
+    non-null keys after the cursor, then, once those run out, the NULL keys.
+    """
+    tag = _cursor_tag(sort_column, descending)
+    nullable = sort_column.expression.nullable and sort_column is not id_column
+    value, last_id = decode_cursor(cursor, tag, sort_column) if cursor else (None, None)
+
+    rows = []
+    if not cursor or value is not None:
+        keyed = query.filter(sort_column.isnot(None)) if nullable else query
+        if cursor:
+            position = tuple_(sort_column, id_column) if sort_column is not id_column else id_column
+            start = tuple_(value, last_id) if sort_column is not id_column else last_id
+            keyed = keyed.filter(_after(position, start, descending))
+        rows = keyed.order_by(_ordered(sort_column, descending), _ordered(id_column, descending)).limit(limit + 1).all()
+
+    if nullable and len(rows) <= limit:
+        tail = query.filter(sort_column.is_(None))
+        if cursor and value is None:
+            tail = tail.filter(_after(id_column, last_id, descending))
+        rows += tail.order_by(_ordered(id_column, descending)).limit(limit + 1 - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0] if isinstance(rows[-1], Row) else rows[-1]
+        next_cursor = encode_cursor(tag, getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,287 @@
+"""
+Monthly range partitions of beach_daily_risks.
+
+Each partition is named beach_daily_risks_pYYYY_MM and holds
+[first day of the month, first day of the next month). Write paths call
+ensure_risk_partitions for the dates they are about to write; the
+maintenance job keeps a few months ahead and retires months past retention.
+Detached partitions are renamed beach_daily_risks_archived_YYYY_MM, so a
+later write to that month gets a fresh partition.
+
+Each process remembers which months exist. Another process may drop or
+detach them (the maintain-partitions command), so a write that fails for
+lack of a partition makes this process look again on its next write.
+Creation is serialized across processes with a transaction-level advisory
+lock.
+
+Databases created by init_db before partitioning keep an unpartitioned
+table until migration 008 converts it; until then partition management is
+skipped with an error in the log.
+"""
+import logging
+import re
+import threading
+from datetime import date, timedelta
+from typing import List, Optional, Set
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from ..config import settings
+from .cache import mark_changed
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "beach_daily_risks"
+
+RETENTION_ACTIONS = ("detach", "drop")
+
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+UNPARTITIONED_MESSAGE = (
+    f"{PARENT_TABLE} is not partitioned; run `alembic upgrade 008` (or head) to convert it. "
+    "Partition management is disabled until then."
+)
+
+
+class PartitionError(Exception):
+    """
+    A partition cannot be created or retired because of a conflicting table.
+    """
+
+
+# Months known to have a committed partition in this process
+_known_months: Optional[Set[date]] = None
+_known_lock = threading.Lock()
+# Whether PARENT_TABLE is partitioned, once checked
+_partitioned: Optional[bool] = None
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(start_date: date, end_date: date) -> List[date]:
+    """
+    First days of every month overlapping [start_date, end_date].
+    """
+    months = []
+    month = month_start(start_date)
+    while month <= end_date:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def archived_name(month: date) -> str:
+    return f"{PARENT_TABLE}_archived_{month.year:04d}_{month.month:02d}"
+
+
+def _standalone_tables(db: Session, names: List[str]) -> Set[str]:
+    """
+    Those of names that exist as tables but are not attached partitions.
+    """
+    return set(db.execute(text("""
+        SELECT relname FROM pg_class
+        WHERE relname = ANY(:names) AND relkind IN ('r', 'p') AND NOT relispartition
+          AND pg_table_is_visible(oid)
+    """), {"names": names}).scalars())
+
+
+def is_partitioned(db: Session) -> bool:
+    return bool(db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {"table": PARENT_TABLE}).scalar())
+
+
+def existing_partition_months(db: Session) -> Set[date]:
+    """
+    Months that currently have an attached partition.
+    """
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE}).scalars()
+    months = set()
+    for name in rows:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.add(date(int(match.group(1)), int(match.group(2)), 1))
+    return months
+
+
+def ensure_risk_partitions(db: Session, start_date: date, end_date: date) -> List[str]:
+    """
+    Create the monthly partitions missing for [start_date, end_date] inside
+    the caller's transaction, so they commit or roll back with its writes.
+    Months already known to exist cost no queries. Returns created names;
+    nothing is created while the table is unpartitioned.
+    """
+    global _known_months, _partitioned
+    with _known_lock:
+        if _partitioned is None:
+            _partitioned = is_partitioned(db)
+            if not _partitioned:
+                logger.error(UNPARTITIONED_MESSAGE)
+        if not _partitioned:
+            return []
+        if _known_months is None:
+            _known_months = existing_partition_months(db)
+        known = set(_known_months)
+
+    needed = [month for month in months_between(start_date, end_date) if month not in known]
+    if not needed:
+        return []
+
+    # Another process may be creating the same months; CREATE TABLE IF NOT
+    # EXISTS alone races, so creators take turns and look again once in
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"{PARENT_TABLE}:partitions"})
+    existing = existing_partition_months(db)
+    missing = [month for month in needed if month not in existing]
+    if missing:
+        # e.g. a partition detached before detaching renamed them
+        conflicts = _standalone_tables(db, [partition_name(month) for month in missing])
+        if conflicts:
+            raise PartitionError(
+                f"{', '.join(sorted(conflicts))} exists but is not attached to {PARENT_TABLE}; "
+                f"rename it, or re-attach it with ALTER TABLE {PARENT_TABLE} ATTACH PARTITION"
+            )
+    created = []
+    for month in missing:
+        # DDL takes no bind parameters; the bounds are formatted dates
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        created.append(partition_name(month))
+
+    db.info.setdefault("risk_partition_months", set()).update(needed)
+    if created:
+        mark_changed(db, "risk")
+    return created
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed_partitions(session):
+    months = session.info.pop("risk_partition_months", None)
+    if months and _known_months is not None:
+        with _known_lock:
+            _known_months.update(months)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_partitions(session):
+    session.info.pop("risk_partition_months", None)
+
+
+@event.listens_for(Engine, "handle_error")
+def _forget_known_months_on_missing_partition(context):
+    # Another process retired a month this one still thought existed
+    global _known_months
+    if f'no partition of relation "{PARENT_TABLE}"' in str(context.original_exception):
+        with _known_lock:
+            _known_months = None
+
+
+def ensure_future_partitions(db: Session, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Create partitions from the current month through months_ahead months out. Does not commit.
+    """
+    if months_ahead is None:
+        months_ahead = settings.RISK_PARTITION_MONTHS_AHEAD
+    current = month_start(date.today())
+    return ensure_risk_partitions(db, current, add_months(current, months_ahead + 1) - timedelta(days=1))
+
+
+def list_risk_partitions(db: Session) -> List[dict]:
+    """
+    Attached partitions, oldest first, with planner row estimates.
+    """
+    estimates = dict(db.execute(text("""
+        SELECT child.relname, child.reltuples::bigint
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE}).all())
+    return [
+        {
+            "name": partition_name(month),
+            "start_date": str(month),
+            "end_date": str(add_months(month, 1) - timedelta(days=1)),
+            "estimated_rows": max(int(estimates.get(partition_name(month), 0)), 0)
+        }
+        for month in sorted(existing_partition_months(db))
+    ]
+
+
+def maintain_risk_partitions(
+    db: Session,
+    months_ahead: Optional[int] = None,
+    retention_months: Optional[int] = None,
+    retention_action: Optional[str] = None
+) -> dict:
+    """
+    Create partitions ahead of time and retire those past retention.
+
+    Partitions whose whole month ended more than retention_months months
+    before the current month are detached (kept as standalone tables named
+    by archived_name) or dropped. retention_months=0 keeps all history.
+    daily_risk_summary rows are kept for retired months.
+    """
+    global _known_months
+    if not is_partitioned(db):
+        raise PartitionError(UNPARTITIONED_MESSAGE)
+    if retention_months is None:
+        retention_months = settings.RISK_RETENTION_MONTHS
+    retention_action = retention_action or settings.RISK_RETENTION_ACTION
+    if retention_action not in RETENTION_ACTIONS:
+        raise ValueError(f"retention_action must be one of {', '.join(RETENTION_ACTIONS)}")
+
+    created = ensure_future_partitions(db, months_ahead)
+
+    retired = []
+    if retention_months > 0:
+        cutoff = add_months(month_start(date.today()), -retention_months)
+        for month in sorted(existing_partition_months(db)):
+            if add_months(month, 1) > cutoff:
+                break
+            name = partition_name(month)
+            if retention_action == "drop":
+                db.execute(text(f"DROP TABLE {name}"))
+            else:
+                if _standalone_tables(db, [archived_name(month)]):
+                    raise PartitionError(
+                        f"Cannot detach {name}: {archived_name(month)} already exists; "
+                        "drop or rename the older archive first"
+                    )
+                db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                db.execute(text(f"ALTER TABLE {name} RENAME TO {archived_name(month)}"))
+            retired.append(name)
+        if retired:
+            mark_changed(db, "risk")
+
+    db.commit()
+    if retired:
+        # Retired months must be recreated if they are ever written again
+        with _known_lock:
+            _known_months = None
+
+    return {
+        "partitions_created": created,
+        "partitions_retired": retired,
+        "retention_months": retention_months,
+        "retention_action": retention_action,
+        "partitions": len(existing_partition_months(db))
+    }
@@ -0,0 +1,202 @@
+"""
+Risk rasters are single-band grids in a regular lat/lon projection, described
+by SatLayer.metadata_json:
+
+    {
+        "format": "npy",            # "npy" or "raw"; inferred from the extension if omitted
+        "dtype": "float32",         # raw only
+        "shape": [rows, cols],      # raw only
+        "header_bytes": 0,          # raw only, bytes to skip before the grid
+        "origin_lat": 27.0,         # latitude of the top edge of row 0
+        "origin_lon": -90.0,        # longitude of the left edge of column 0
+        "pixel_size": 0.01,         # degrees, or pixel_height / pixel_width
+        "nodata": -9999,            # optional
+        "value_scale": 1.0,         # optional, raw value = pixel * scale + offset
+        "value_offset": 0.0,        # optional
+        "window": 1                 # optional, half-size of the sampling window in pixels
+    }
+"""
+import os
+import time
+from typing import Dict, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.beach import Beach
+from ..models.sat_layer import SatLayer
+from .risk_scoring import risk_levels_from_raw
+from .risk_ingestion import write_scored_rows, get_active_alert_beach_ids
+
+
+class RasterError(ValueError):
+    pass
+
+
+def resolve_raster_path(url_or_path: str) -> str:
+    """
+    Resolve a layer path; relative paths are taken from SAT_DATA_DIR.
+    The resolved file, symlinks followed, must lie inside SAT_DATA_DIR.
+    """
+    if not url_or_path:
+        raise RasterError("Layer has no url_or_path")
+    if "://" in url_or_path:
+        raise RasterError("Only local raster files can be sampled")
+    data_dir = os.path.realpath(settings.SAT_DATA_DIR)
+    path = os.path.realpath(os.path.join(data_dir, url_or_path))
+    if os.path.commonpath([data_dir, path]) != data_dir:
+        raise RasterError("Raster files must be inside SAT_DATA_DIR")
+    return path
+
+
+def open_raster(path: str, metadata: dict) -> np.ndarray:
+    """
+    Open a raster memory-mapped; no pixel data is read until it is indexed.
+    """
+    raster_format = metadata.get("format") or ("npy" if path.endswith(".npy") else "raw")
+    if raster_format == "npy":
+        raster = np.load(path, mmap_mode="r")
+    elif raster_format == "raw":
+        if "shape" not in metadata:
+            raise RasterError("Raw rasters need a shape in metadata_json")
+        raster = np.memmap(
+            path,
+            dtype=np.dtype(metadata.get("dtype", "float32")),
+            mode="r",
+            offset=int(metadata.get("header_bytes", 0)),
+            shape=tuple(metadata["shape"])
+        )
+    else:
+        raise RasterError(f"Unsupported raster format: {raster_format}")
+
+    if raster.ndim != 2:
+        raise RasterError("Risk rasters must be two-dimensional")
+    return raster
+
+
+def latlon_to_pixel(latitudes: np.ndarray, longitudes: np.ndarray, metadata: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert coordinates to (row, col) pixel indices in one vectorized step.
+    """
+    try:
+        origin_lat = float(metadata["origin_lat"])
+        origin_lon = float(metadata["origin_lon"])
+    except KeyError as e:
+        raise RasterError(f"Missing georeference in metadata_json: {e.args[0]}")
+    pixel_height = float(metadata.get("pixel_height", metadata.get("pixel_size", 0)))
+    pixel_width = float(metadata.get("pixel_width", metadata.get("pixel_size", 0)))
+    if pixel_height <= 0 or pixel_width <= 0:
+        raise RasterError("metadata_json needs a positive pixel_size")
+
+    rows = np.floor((origin_lat - np.asarray(latitudes, dtype=np.float64)) / pixel_height).astype(np.int64)
+    cols = np.floor((np.asarray(longitudes, dtype=np.float64) - origin_lon) / pixel_width).astype(np.int64)
+    return rows, cols
+
+
+def sample_windows(
+    raster: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    window: int = 1,
+    nodata=None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read a (2 * window + 1)^2 pixel window around every point with one gather.
+    Returns the max valid value per point (NaN if none) and the fraction of
+    valid pixels in each window. Only the touched pages of a memmap are read.
+    """
+    if not len(rows):
+        return np.zeros(0), np.zeros(0)
+
+    offsets = np.arange(-window, window + 1)
+    window_rows = rows[:, None, None] + offsets[None, :, None]
+    window_cols = cols[:, None, None] + offsets[None, None, :]
+    window_rows, window_cols = np.broadcast_arrays(window_rows, window_cols)
+
+    in_bounds = (
+        (window_rows >= 0) & (window_rows < raster.shape[0]) &
+        (window_cols >= 0) & (window_cols < raster.shape[1])
+    )
+    values = np.full(window_rows.shape, np.nan, dtype=np.float64)
+    values[in_bounds] = raster[window_rows[in_bounds], window_cols[in_bounds]]
+    if nodata is not None:
+        values[values == nodata] = np.nan
+
+    valid = np.isfinite(values)
+    valid_fraction = valid.reshape(len(rows), -1).mean(axis=1)
+    flat = np.where(valid, values, -np.inf).reshape(len(rows), -1)
+    sampled = flat.max(axis=1)
+    sampled[~np.isfinite(sampled)] = np.nan
+    return sampled, valid_fraction
+
+
+def sample_layer_for_beaches(layer: SatLayer, latitudes: np.ndarray, longitudes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Sample a risk raster at beach coordinates.
+    Returns aligned raw_value, risk_level and confidence arrays plus a
+    'valid' mask for beaches that had at least one usable pixel.
+    """
+    metadata = layer.metadata_json or {}
+    raster = open_raster(resolve_raster_path(layer.url_or_path), metadata)
+    rows, cols = latlon_to_pixel(latitudes, longitudes, metadata)
+    sampled, valid_fraction = sample_windows(
+        raster, rows, cols,
+        window=int(metadata.get("window", 1)),
+        nodata=metadata.get("nodata")
+    )
+
+    raw = sampled * float(metadata.get("value_scale", 1.0)) + float(metadata.get("value_offset", 0.0))
+    valid = np.isfinite(raw)
+    raw = np.clip(np.where(valid, raw, 0.0), 0.0, 1.0)
+    return {
+        "raw_value": np.round(raw, 4),
+        "risk_level": risk_levels_from_raw(raw),
+        "confidence": np.round(valid_fraction, 2),
+        "valid": valid
+    }
+
+
+def ingest_sat_layer(db: Session, layer_id: int) -> dict:
+    """
+    Sample a risk_raster SatLayer at every beach and upsert BeachDailyRisk
+    rows for the layer's date, with source set to the layer's source.
+    Beaches outside the raster or over nodata pixels are skipped.
+    """
+    started = time.perf_counter()
+    layer = db.query(SatLayer).filter(SatLayer.id == layer_id).first()
+    if not layer:
+        raise RasterError(f"Satellite layer {layer_id} not found")
+    if layer.data_type != "risk_raster":
+        raise RasterError(f"Layer {layer_id} is not a risk_raster")
+
+    beaches = db.query(Beach.id, Beach.name, Beach.latitude, Beach.longitude).all()
+    beach_ids = np.array([b.id for b in beaches], dtype=np.int64)
+    latitudes = np.array([b.latitude for b in beaches], dtype=np.float64)
+    longitudes = np.array([b.longitude for b in beaches], dtype=np.float64)
+
+    step = time.perf_counter()
+    scores = sample_layer_for_beaches(layer, latitudes, longitudes)
+    sample_ms = round((time.perf_counter() - step) * 1000, 2)
+
+    valid = scores.pop("valid")
+    scores = {key: values[valid] for key, values in scores.items()}
+    sampled_ids = beach_ids[valid]
+    dates = np.full(len(sampled_ids), np.datetime64(layer.date, "D"))
+
+    written, alerts_created = write_scored_rows(
+        db, sampled_ids, dates, scores, layer.source,
+        {b.id: b.name for b in beaches}, get_active_alert_beach_ids(db)
+    )
+    db.commit()
+
+    return {
+        "layer_id": layer.id,
+        "date": str(layer.date),
+        "source": layer.source,
+        "beaches_updated": written,
+        "beaches_skipped": int(len(beach_ids) - len(sampled_ids)),
+        "alerts_created": alerts_created,
+        "timings": {
+            "sample_ms": sample_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    }
@@ -0,0 +1,226 @@
+from datetime import date, timedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .cache import mark_changed
+from .current_state import refresh_current_state
+from .risk_trends import refresh_risk_trends
+from .partitions import add_months, month_start
+
+# Rollup table -> date_trunc unit; periods are calendar weeks (from Monday) and months
+ROLLUP_TABLES = {
+    "beach_risk_weekly": "week",
+    "beach_risk_monthly": "month",
+}
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def period_bounds(unit: str, start_date: date, end_date: date) -> tuple:
+    """
+    Half-open [first period start, day after the last period) covering the range.
+    """
+    if unit == "week":
+        return week_start(start_date), week_start(end_date) + timedelta(days=7)
+    return month_start(start_date), add_months(month_start(end_date), 1)
+
+
+def refresh_daily_summary(db: Session, start_date: date, end_date: date) -> None:
+    """
+    Recount daily_risk_summary rows for the dates in [start_date, end_date].
+    Only the touched dates are rescanned. Does not commit.
+    """
+    db.execute(text("""
+        INSERT INTO daily_risk_summary (date, total_beaches, no_risk, low_risk, medium_risk, high_risk, updated_at)
+        SELECT date,
+               count(*),
+               count(*) FILTER (WHERE risk_level = 0),
+               count(*) FILTER (WHERE risk_level = 1),
+               count(*) FILTER (WHERE risk_level = 2),
+               count(*) FILTER (WHERE risk_level = 3),
+               now()
+        FROM beach_daily_risks
+        WHERE date BETWEEN :start_date AND :end_date
+        GROUP BY date
+        ON CONFLICT (date) DO UPDATE SET
+            total_beaches = excluded.total_beaches,
+            no_risk = excluded.no_risk,
+            low_risk = excluded.low_risk,
+            medium_risk = excluded.medium_risk,
+            high_risk = excluded.high_risk,
+            updated_at = excluded.updated_at
+    """), {"start_date": start_date, "end_date": end_date})
+
+
+# Rollup state for the beaches and days selected by {where}; rows are
+# numbered latest day first within each period
+ROLLUP_REBUILD_SQL = """
+    INSERT INTO {table} (beach_id, period_start, days, max_risk_level, mean_risk_level, mean_raw_value,
+                         high_risk_days, sum_risk_level, sum_raw_value, raw_days, last_date,
+                         last_risk_level, last_raw_value, prev_max_risk_level, updated_at)
+    SELECT beach_id,
+           period_start,
+           count(*),
+           max(risk_level),
+           round(avg(risk_level), 2),
+           round(avg(raw_value), 4),
+           count(*) FILTER (WHERE risk_level >= 3),
+           sum(risk_level),
+           coalesce(sum(raw_value), 0),
+           count(raw_value),
+           max(date),
+           max(risk_level) FILTER (WHERE latest = 1),
+           max(raw_value) FILTER (WHERE latest = 1),
+           max(risk_level) FILTER (WHERE latest > 1),
+           now()
+    FROM (
+        SELECT beach_id, date_trunc('{unit}', date)::date AS period_start, date, risk_level, raw_value,
+               row_number() OVER (PARTITION BY beach_id, date_trunc('{unit}', date) ORDER BY date DESC) AS latest
+        FROM beach_daily_risks
+        WHERE date >= :period_start AND date < :period_end {where}
+    ) r
+    GROUP BY 1, 2
+    ON CONFLICT (beach_id, period_start) DO UPDATE SET
+        days = excluded.days,
+        max_risk_level = excluded.max_risk_level,
+        mean_risk_level = excluded.mean_risk_level,
+        mean_raw_value = excluded.mean_raw_value,
+        high_risk_days = excluded.high_risk_days,
+        sum_risk_level = excluded.sum_risk_level,
+        sum_raw_value = excluded.sum_raw_value,
+        raw_days = excluded.raw_days,
+        last_date = excluded.last_date,
+        last_risk_level = excluded.last_risk_level,
+        last_raw_value = excluded.last_raw_value,
+        prev_max_risk_level = excluded.prev_max_risk_level,
+        updated_at = excluded.updated_at
+"""
+
+# Beaches whose rollup already holds a later day of :day's period; folding
+# :day into them would double count, so they are rebuilt instead
+ROLLUP_STALE_SQL = """
+    SELECT t.beach_id
+    FROM {table} t
+    JOIN beach_daily_risks r ON r.beach_id = t.beach_id AND r.date = CAST(:day AS date)
+    WHERE t.period_start = CAST(:period_start AS date) AND t.last_date > CAST(:day AS date)
+"""
+
+# Fold :day into its period's row: a day after last_date is added, and
+# last_date itself is swapped for its new values
+ROLLUP_FOLD_SQL = """
+    WITH step AS (
+        SELECT r.beach_id, r.risk_level, r.raw_value,
+               t.last_date = CAST(:day AS date) AS same,
+               coalesce(t.days, 0) AS days,
+               coalesce(t.sum_risk_level, 0) AS sum_risk_level,
+               coalesce(t.high_risk_days, 0) AS high_risk_days,
+               coalesce(t.sum_raw_value, 0) AS sum_raw_value,
+               coalesce(t.raw_days, 0) AS raw_days,
+               t.max_risk_level, t.prev_max_risk_level, t.last_risk_level, t.last_raw_value
+        FROM beach_daily_risks r
+        LEFT JOIN {table} t ON t.beach_id = r.beach_id AND t.period_start = CAST(:period_start AS date)
+        WHERE r.date = CAST(:day AS date) AND (t.last_date IS NULL OR t.last_date <= CAST(:day AS date))
+    ),
+    folded AS (
+        SELECT beach_id, risk_level, raw_value,
+               CASE WHEN same THEN prev_max_risk_level ELSE max_risk_level END AS prev_max_risk_level,
+               days + CASE WHEN same THEN 0 ELSE 1 END AS days,
+               sum_risk_level + risk_level - CASE WHEN same THEN last_risk_level ELSE 0 END AS sum_risk_level,
+               high_risk_days + (risk_level >= 3)::int
+                   - CASE WHEN same THEN (last_risk_level >= 3)::int ELSE 0 END AS high_risk_days,
+               sum_raw_value + coalesce(raw_value, 0)
+                   - CASE WHEN same THEN coalesce(last_raw_value, 0) ELSE 0 END AS sum_raw_value,
+               raw_days + (raw_value IS NOT NULL)::int
+                   - CASE WHEN same THEN (last_raw_value IS NOT NULL)::int ELSE 0 END AS raw_days
+        FROM step
+    )
+    INSERT INTO {table} (beach_id, period_start, days, max_risk_level, mean_risk_level, mean_raw_value,
+                         high_risk_days, sum_risk_level, sum_raw_value, raw_days, last_date,
+                         last_risk_level, last_raw_value, prev_max_risk_level, updated_at)
+    SELECT beach_id,
+           CAST(:period_start AS date),
+           days,
+           greatest(prev_max_risk_level, risk_level),
+           round(sum_risk_level::numeric / days, 2),
+           CASE WHEN raw_days > 0 THEN round(sum_raw_value / raw_days, 4) END,
+           high_risk_days,
+           sum_risk_level,
+           sum_raw_value,
+           raw_days,
+           CAST(:day AS date),
+           risk_level,
+           raw_value,
+           prev_max_risk_level,
+           now()
+    FROM folded
+    ON CONFLICT (beach_id, period_start) DO UPDATE SET
+        days = excluded.days,
+        max_risk_level = excluded.max_risk_level,
+        mean_risk_level = excluded.mean_risk_level,
+        mean_raw_value = excluded.mean_raw_value,
+        high_risk_days = excluded.high_risk_days,
+        sum_risk_level = excluded.sum_risk_level,
+        sum_raw_value = excluded.sum_raw_value,
+        raw_days = excluded.raw_days,
+        last_date = excluded.last_date,
+        last_risk_level = excluded.last_risk_level,
+        last_raw_value = excluded.last_raw_value,
+        prev_max_risk_level = excluded.prev_max_risk_level,
+        updated_at = excluded.updated_at
+"""
+
+# Longest write folded in day by day; longer ones (backfills) recompute
+# the periods they overlap in one pass instead
+ROLLUP_FOLD_MAX_DAYS = 7
+
+
+def _period_start(unit: str, day: date) -> date:
+    return week_start(day) if unit == "week" else month_start(day)
+
+
+def refresh_risk_rollups(db: Session, start_date: date, end_date: date) -> None:
+    """
+    Bring the weekly and monthly rollups up to date after a write covering
+    [start_date, end_date]. Short writes are folded in day by day, oldest
+    first, touching only the beaches written that day, so a daily ingestion
+    costs O(beaches) rather than rescanning its week and month. Beaches
+    whose period already holds a later day are recomputed from history, as
+    are all periods of writes longer than ROLLUP_FOLD_MAX_DAYS.
+    Does not commit.
+    """
+    for table, unit in ROLLUP_TABLES.items():
+        period_start, period_end = period_bounds(unit, start_date, end_date)
+        if (end_date - start_date).days + 1 > ROLLUP_FOLD_MAX_DAYS:
+            db.execute(text(ROLLUP_REBUILD_SQL.format(table=table, unit=unit, where="")), {
+                "period_start": period_start, "period_end": period_end
+            })
+            continue
+
+        stale = set()
+        day = start_date
+        while day <= end_date:
+            params = {"day": day, "period_start": _period_start(unit, day)}
+            stale.update(db.execute(text(ROLLUP_STALE_SQL.format(table=table)), params).scalars())
+            db.execute(text(ROLLUP_FOLD_SQL.format(table=table)), params)
+            day += timedelta(days=1)
+        if stale:
+            db.execute(text(ROLLUP_REBUILD_SQL.format(
+                table=table, unit=unit, where="AND beach_id = ANY(:beach_ids)"
+            )), {"period_start": period_start, "period_end": period_end, "beach_ids": list(stale)})
+
+
+def refresh_risk_aggregates(db: Session, start_date: date, end_date: date) -> int:
+    """
+    Bring every table derived from beach_daily_risks up to date after a
+    write covering [start_date, end_date]. Runs inside the caller's
+    transaction so derived data commits atomically with the write, and
+    moves cached risk reads to a new version once it does.
+    Returns the number of trend alerts raised.
+    """
+    refresh_daily_summary(db, start_date, end_date)
+    refresh_risk_rollups(db, start_date, end_date)
+    refresh_current_state(db, start_date, end_date)
+    trend_alerts = refresh_risk_trends(db, start_date, end_date)
+    mark_changed(db, "risk")
+    return trend_alerts
@@ -1,12 +1,23 @@
 from datetime import date, timedelta
-from typing import List, Optional
+from decimal import Decimal
+from typing import Iterable, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
 from ..models.beach import Beach
 from ..models.beach_daily_risk import BeachDailyRisk
 from ..models.alert import Alert
+from ..models.daily_risk_summary import DailyRiskSummary
+from ..models.beach_risk_rollup import BeachRiskWeekly, BeachRiskMonthly
+from ..models.beach_risk_forecast import BeachRiskForecast
+from ..models.beach_risk_trend import BeachRiskTrend
+from ..config import settings
+from .cache import cached
+from .pagination import keyset_paginate
+from .partitions import months_between
+from .risk_aggregates import week_start
 
 
+@cached("risk", "beaches")
 def get_high_risk_beaches_for_date(db: Session, target_date: date, min_risk_level: int = 2) -> List[dict]:
     """
     Get beaches with risk >= min_risk_level for a given date.
@@ -32,80 +43,440 @@ def get_high_risk_beaches_for_date(db: Session, target_date: date, min_risk_leve
     ]
 
 
+def _latest_forecast_issue():
+    return select(func.max(BeachRiskForecast.issued_on)).scalar_subquery()
+
+
+@cached("risk", "beaches")
+def get_forecast_high_risk_beaches(db: Session, horizon: int, min_risk_level: int = 2) -> dict:
+    """
+    Get beaches forecast at risk >= min_risk_level horizon days after the
+    latest drift forecast was issued.
+    """
+    results = db.query(BeachRiskForecast, Beach).join(
+        Beach, BeachRiskForecast.beach_id == Beach.id
+    ).filter(
+        BeachRiskForecast.issued_on == _latest_forecast_issue(),
+        BeachRiskForecast.horizon == horizon,
+        BeachRiskForecast.risk_level >= min_risk_level
+    ).order_by(desc(BeachRiskForecast.risk_level), desc(BeachRiskForecast.raw_value)).all()
+    
+    beaches = [
+        {
+            "beach_id": forecast.beach_id,
+            "beach_name": beach.name,
+            "risk_level": forecast.risk_level,
+            "date": str(forecast.date),
+            "source": forecast.source,
+            "raw_value": float(forecast.raw_value) if forecast.raw_value else None,
+            "confidence": float(forecast.confidence) if forecast.confidence else None
+        }
+        for forecast, beach in results
+    ]
+    issued_on = results[0][0].issued_on if results else db.query(func.max(BeachRiskForecast.issued_on)).scalar()
+    return {
+        "issued_on": str(issued_on) if issued_on else None,
+        "date": str(issued_on + timedelta(days=horizon)) if issued_on else None,
+        "beaches": beaches
+    }
+
+
+@cached("risk")
+def get_beach_forecast(db: Session, beach_id: int, horizon: int) -> List[dict]:
+    """
+    Get a beach's latest drift forecast for days 1..horizon.
+    """
+    rows = db.query(BeachRiskForecast).filter(
+        BeachRiskForecast.issued_on == _latest_forecast_issue(),
+        BeachRiskForecast.beach_id == beach_id,
+        BeachRiskForecast.horizon <= horizon
+    ).order_by(BeachRiskForecast.horizon).all()
+    
+    return [
+        {
+            "date": row.date,
+            "risk_level": row.risk_level,
+            "source": row.source,
+            "horizon": row.horizon,
+            "confidence": float(row.confidence) if row.confidence is not None else None
+        }
+        for row in rows
+    ]
+
+
+def _trend_dict(trend: BeachRiskTrend) -> dict:
+    slope = float(trend.slope_7) if trend.slope_7 is not None else None
+    return {
+        "date": str(trend.date),
+        "risk_level": trend.risk_level,
+        "streak_days": trend.streak_days,
+        "avg_7": float(trend.avg_7) if trend.avg_7 is not None else None,
+        "avg_30": float(trend.avg_30) if trend.avg_30 is not None else None,
+        "slope_7": slope,
+        "persistent": trend.streak_days >= settings.PERSISTENT_RISK_DAYS,
+        "rising": slope is not None and slope >= settings.RISING_TREND_SLOPE
+                  and trend.n_7 >= settings.RISING_TREND_MIN_DAYS
+    }
+
+
+@cached("risk")
+def get_beach_trend(db: Session, beach_id: int) -> Optional[dict]:
+    """
+    Get a beach's rolling risk statistics, or None before any risk data.
+    """
+    trend = db.query(BeachRiskTrend).filter(BeachRiskTrend.beach_id == beach_id).first()
+    return _trend_dict(trend) if trend else None
+
+
+@cached("risk", "beaches")
+def get_risk_trends(
+    db: Session,
+    persistent_only: bool = False,
+    rising_only: bool = False,
+    limit: int = 50
+) -> List[dict]:
+    """
+    Get beaches' rolling risk statistics, steepest 7-day rise first.
+    """
+    query = db.query(BeachRiskTrend, Beach.name).join(Beach, BeachRiskTrend.beach_id == Beach.id)
+    if persistent_only:
+        query = query.filter(BeachRiskTrend.streak_days >= settings.PERSISTENT_RISK_DAYS)
+    if rising_only:
+        query = query.filter(
+            BeachRiskTrend.slope_7 >= settings.RISING_TREND_SLOPE,
+            BeachRiskTrend.n_7 >= settings.RISING_TREND_MIN_DAYS
+        )
+    rows = query.order_by(
+        BeachRiskTrend.slope_7.desc().nulls_last(),
+        BeachRiskTrend.streak_days.desc(),
+        BeachRiskTrend.beach_id
+    ).limit(limit).all()
+    
+    return [
+        {"beach_id": trend.beach_id, "beach_name": name, **_trend_dict(trend)}
+        for trend, name in rows
+    ]
+
+
+RESOLUTIONS = ("daily", "weekly", "monthly")
+
+# Longest span in days that "auto" serves at each finer resolution; beyond
+# the last one it uses monthly rollups
+AUTO_RESOLUTION_MAX_DAYS = (("daily", 180), ("weekly", 1500))
+
+ROLLUP_MODELS = {"weekly": BeachRiskWeekly, "monthly": BeachRiskMonthly}
+
+# Optional per-beach series for get_risk_timeseries_columns, besides risk_level.
+# For rollups risk_level is the period maximum and raw_value the period mean.
+TIMESERIES_FIELDS = {
+    "daily": ("raw_value", "confidence"),
+    "weekly": ("raw_value", "mean_risk_level", "high_risk_days"),
+    "monthly": ("raw_value", "mean_risk_level", "high_risk_days"),
+}
+
+
+def pick_resolution(start_date: date, end_date: date, resolution: str = "auto") -> str:
+    """
+    Resolve "auto" to the finest resolution that keeps the series short.
+    """
+    if resolution != "auto":
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be auto or one of {', '.join(RESOLUTIONS)}")
+        return resolution
+    
+    span = (end_date - start_date).days + 1
+    for candidate, max_days in AUTO_RESOLUTION_MAX_DAYS:
+        if span <= max_days:
+            return candidate
+    return "monthly"
+
+
+def first_period_start(start_date: date, resolution: str) -> date:
+    """
+    First day of the period at this resolution that contains start_date.
+    """
+    if resolution == "monthly":
+        return start_date.replace(day=1)
+    if resolution == "weekly":
+        return week_start(start_date)
+    return start_date
+
+
+def period_count(start_date: date, end_date: date, resolution: str) -> int:
+    """
+    Number of periods at this resolution that overlap the range, computed
+    without listing them.
+    """
+    if end_date < start_date:
+        return 0
+    if resolution == "monthly":
+        return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+    step = 7 if resolution == "weekly" else 1
+    return (end_date - first_period_start(start_date, resolution)).days // step + 1
+
+
+def period_starts(start_date: date, end_date: date, resolution: str) -> List[date]:
+    """
+    First day of every period at this resolution that overlaps the range.
+    """
+    if resolution == "monthly":
+        return months_between(start_date, end_date)
+    step = 7 if resolution == "weekly" else 1
+    first = first_period_start(start_date, resolution)
+    return [first + timedelta(days=i) for i in range(0, (end_date - first).days + 1, step)]
+
+
+def _series_columns(resolution: str) -> tuple:
+    """
+    (model, period column, risk_level column, {field: column}) for a resolution.
+    """
+    if resolution == "daily":
+        return BeachDailyRisk, BeachDailyRisk.date, BeachDailyRisk.risk_level, {
+            "raw_value": BeachDailyRisk.raw_value,
+            "confidence": BeachDailyRisk.confidence
+        }
+    model = ROLLUP_MODELS[resolution]
+    return model, model.period_start, model.max_risk_level, {
+        "raw_value": model.mean_raw_value,
+        "mean_risk_level": model.mean_risk_level,
+        "high_risk_days": model.high_risk_days
+    }
+
+
+def _number(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+@cached("risk")
 def get_beach_risk_timeseries(
     db: Session, 
     beach_id: int, 
     start_date: date, 
-    end_date: date
+    end_date: date,
+    resolution: str = "daily"
 ) -> List[dict]:
     """
     Get risk history for a beach between start and end date.
+    Weekly and monthly points come from the rollup tables and are dated by
+    period start; their risk_level is the highest level in the period.
     """
-    results = db.query(BeachDailyRisk).filter(
-        BeachDailyRisk.beach_id == beach_id,
-        BeachDailyRisk.date >= start_date,
-        BeachDailyRisk.date <= end_date
-    ).order_by(BeachDailyRisk.date).all()
+    if resolution == "daily":
+        results = db.query(BeachDailyRisk).filter(
+            BeachDailyRisk.beach_id == beach_id,
+            BeachDailyRisk.date >= start_date,
+            BeachDailyRisk.date <= end_date
+        ).order_by(BeachDailyRisk.date).all()
+        
+        return [
+            {
+                "date": str(r.date),
+                "risk_level": r.risk_level,
+                "source": r.source
+            }
+            for r in results
+        ]
+    
+    model = ROLLUP_MODELS[resolution]
+    results = db.query(model).filter(
+        model.beach_id == beach_id,
+        model.period_start >= first_period_start(start_date, resolution),
+        model.period_start <= end_date
+    ).order_by(model.period_start).all()
     
     return [
         {
-            "date": str(r.date),
-            "risk_level": r.risk_level,
-            "source": r.source
+            "date": str(r.period_start),
+            "risk_level": r.max_risk_level,
+            "mean_risk_level": _number(r.mean_risk_level),
+            "mean_raw_value": _number(r.mean_raw_value),
+            "high_risk_days": r.high_risk_days,
+            "days": r.days
         }
         for r in results
     ]
 
 
-def get_recent_alerts(db: Session, limit: int = 20, active_only: bool = True) -> List[dict]:
+@cached("risk")
+def get_risk_timeseries_columns(
+    db: Session,
+    beach_ids: List[int],
+    start_date: date,
+    end_date: date,
+    fields: Iterable[str] = (),
+    resolution: str = "daily"
+) -> dict:
+    """
+    Get risk history for many beaches in one query, laid out column-wise.
+    Every series is aligned with a shared, gap-free dates array (period
+    starts for weekly/monthly); periods without a row are null. fields
+    selects extra series from TIMESERIES_FIELDS[resolution].
+    """
+    model, period_column, level_column, field_columns = _series_columns(resolution)
+    fields = [f for f in TIMESERIES_FIELDS[resolution] if f in set(fields)]
+    dates = period_starts(start_date, end_date, resolution)
+    index = {d: i for i, d in enumerate(dates)}
+    
+    rows = db.query(model.beach_id, period_column, level_column, *(field_columns[f] for f in fields)).filter(
+        model.beach_id.in_(beach_ids),
+        period_column >= dates[0],
+        period_column <= end_date
+    ).all()
+    
+    series = {
+        beach_id: {key: [None] * len(dates) for key in ("risk_level", *fields)}
+        for beach_id in beach_ids
+    }
+    for beach_id, day, risk_level, *values in rows:
+        entry = series[beach_id]
+        i = index[day]
+        entry["risk_level"][i] = risk_level
+        for key, value in zip(fields, values):
+            entry[key][i] = _number(value)
+    
+    return {
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "resolution": resolution,
+        "dates": [str(d) for d in dates],
+        "series": [{"beach_id": beach_id, **series[beach_id]} for beach_id in beach_ids]
+    }
+
+
+def _alert_dict(alert: Alert, beach: Beach) -> dict:
+    return {
+        "id": alert.id,
+        "beach_id": alert.beach_id,
+        "beach_name": beach.name,
+        "alert_type": alert.alert_type,
+        "severity": alert.severity,
+        "message": alert.message,
+        "date_created": alert.date_created.isoformat() if alert.date_created else None,
+        "is_active": alert.is_active
+    }
+
+
+@cached("alerts", "beaches")
+def get_alerts_page(
+    db: Session,
+    limit: int = 20,
+    active_only: bool = True,
+    cursor: Optional[str] = None,
+    alert_type: Optional[str] = None,
+    beach_id: Optional[int] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None
+) -> dict:
     """
-    Get recent alerts, optionally filtered to active only.
+    Get one page of alerts, newest first, with the cursor for the next page.
+    Raises CursorError for a malformed cursor.
     """
     query = db.query(Alert, Beach).join(Beach, Alert.beach_id == Beach.id)
     
     if active_only:
         query = query.filter(Alert.is_active == True)
+    if alert_type:
+        query = query.filter(Alert.alert_type == alert_type)
+    if beach_id is not None:
+        query = query.filter(Alert.beach_id == beach_id)
+    if created_from:
+        query = query.filter(Alert.date_created >= created_from)
+    if created_to:
+        query = query.filter(Alert.date_created < created_to + timedelta(days=1))
     
-    results = query.order_by(desc(Alert.date_created)).limit(limit).all()
+    results, next_cursor = keyset_paginate(
+        query, Alert.date_created, Alert.id, limit=limit, cursor=cursor, descending=True
+    )
+    return {
+        "alerts": [_alert_dict(alert, beach) for alert, beach in results],
+        "next_cursor": next_cursor
+    }
+
+
+@cached("risk")
+def count_risk_levels(db: Session, target_date: date) -> dict:
+    """
+    Count beaches per risk level for a date with one GROUP BY query.
+    """
+    rows = db.query(BeachDailyRisk.risk_level, func.count()).filter(
+        BeachDailyRisk.date == target_date
+    ).group_by(BeachDailyRisk.risk_level).all()
     
-    return [
-        {
-            "id": alert.id,
-            "beach_id": alert.beach_id,
-            "beach_name": beach.name,
-            "alert_type": alert.alert_type,
-            "severity": alert.severity,
-            "message": alert.message,
-            "date_created": alert.date_created.isoformat() if alert.date_created else None,
-            "is_active": alert.is_active
-        }
-        for alert, beach in results
-    ]
+    counts = {level: count for level, count in rows}
+    return {
+        "total_beaches": sum(counts.values()),
+        "high_risk": counts.get(3, 0),
+        "medium_risk": counts.get(2, 0),
+        "low_risk": counts.get(1, 0),
+        "no_risk": counts.get(0, 0)
+    }
 
 
+@cached("risk", "alerts")
 def get_risk_summary(db: Session, target_date: Optional[date] = None) -> dict:
     """
     Get summary of risk levels for a date.
+    Reads the daily_risk_summary row maintained by ingestion together with
+    the active alert count in one statement; dates without a summary row
+    fall back to counting beach_daily_risks.
     """
     if not target_date:
         target_date = date.today()
     
-    risks = db.query(BeachDailyRisk).filter(
-        BeachDailyRisk.date == target_date
-    ).all()
+    active_alerts = select(func.count(Alert.id)).where(Alert.is_active == True).scalar_subquery()
+    row = db.query(DailyRiskSummary, active_alerts).filter(
+        DailyRiskSummary.date == target_date
+    ).first()
     
-    summary = {
+    if row:
+        stored, active_alert_count = row
+        counts = {
+            "total_beaches": stored.total_beaches,
+            "high_risk": stored.high_risk,
+            "medium_risk": stored.medium_risk,
+            "low_risk": stored.low_risk,
+            "no_risk": stored.no_risk
+        }
+    else:
+        counts = count_risk_levels(db, target_date)
+        active_alert_count = db.query(func.count(Alert.id)).filter(Alert.is_active == True).scalar()
+    
+    return {
         "date": str(target_date),
-        "total_beaches": len(risks),
-        "high_risk": sum(1 for r in risks if r.risk_level == 3),
-        "medium_risk": sum(1 for r in risks if r.risk_level == 2),
-        "low_risk": sum(1 for r in risks if r.risk_level == 1),
-        "no_risk": sum(1 for r in risks if r.risk_level == 0)
+        **counts,
+        "active_alerts": active_alert_count
     }
-    
-    # Get active alerts count
-    active_alerts = db.query(Alert).filter(Alert.is_active == True).count()
-    summary["active_alerts"] = active_alerts
-    
-    return summary
 
+
+@cached("risk", "alerts")
+def get_forecast_risk_summary(db: Session, horizon: int) -> dict:
+    """
+    Count beaches per forecast risk level horizon days after the latest
+    drift forecast was issued.
+    """
+    level = BeachRiskForecast.risk_level
+    active_alerts = select(func.count(Alert.id)).where(Alert.is_active == True).scalar_subquery()
+    row = db.query(
+        func.count(level),
+        func.count().filter(level == 0),
+        func.count().filter(level == 1),
+        func.count().filter(level == 2),
+        func.count().filter(level == 3),
+        func.max(BeachRiskForecast.issued_on),
+        active_alerts
+    ).filter(
+        BeachRiskForecast.issued_on == _latest_forecast_issue(),
+        BeachRiskForecast.horizon == horizon
+    ).one()
+    total, no_risk, low_risk, medium_risk, high_risk, issued_on, active_alert_count = row
+    
+    return {
+        "date": str(issued_on + timedelta(days=horizon)) if issued_on else None,
+        "issued_on": str(issued_on) if issued_on else None,
+        "horizon": horizon,
+        "total_beaches": total,
+        "high_risk": high_risk,
+        "medium_risk": medium_risk,
+        "low_risk": low_risk,
+        "no_risk": no_risk,
+        "active_alerts": active_alert_count
+    }
@@ -0,0 +1,292 @@
+import codecs
+import csv
+import io
+import json
+import time
+from datetime import date
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..models.beach import Beach
+from .risk_scoring import risk_levels_from_raw
+from .risk_ingestion import create_high_risk_alerts, get_active_alert_beach_ids
+from .spatial_index import beach_index
+from .risk_aggregates import refresh_risk_aggregates
+from .partitions import ensure_risk_partitions
+from .ai_context import precompute_risk_context
+
+IMPORT_BATCH_SIZE = 5000
+
+# Rows given as lat/lon are matched to the nearest beach within this distance
+MAX_MATCH_KM = 2.0
+
+# Only the first few row errors are kept in the stats
+MAX_REPORTED_ERRORS = 20
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+STAGING_COLUMNS = ("line_no", "beach_id", "date", "risk_level", "raw_value", "confidence", "source")
+
+
+class RiskImportError(ValueError):
+    pass
+
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Decode a stream of byte chunks into lines without buffering the whole body.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+class RowParser:
+    """
+    Turns one line at a time into a row dict.
+    CSV input needs a header line; quoted fields may not span lines.
+    """
+
+    def __init__(self, import_format: str):
+        if import_format not in IMPORT_FORMATS:
+            raise RiskImportError(f"Unsupported import format: {import_format}")
+        self.import_format = import_format
+        self.header: Optional[List[str]] = None
+        self.line_no = 0
+
+    def parse(self, line: str) -> Optional[dict]:
+        """
+        Return the row for a line, or None for headers and blank lines.
+        Malformed lines come back as {"_error": ...}.
+        """
+        self.line_no += 1
+        if not line.strip():
+            return None
+
+        if self.import_format == "ndjson":
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                return {"_line": self.line_no, "_error": f"invalid JSON: {e.msg}"}
+            if not isinstance(row, dict):
+                return {"_line": self.line_no, "_error": "expected a JSON object"}
+        else:
+            values = next(csv.reader([line]))
+            if self.header is None:
+                self.header = [v.strip() for v in values]
+                return None
+            row = dict(zip(self.header, values))
+
+        row["_line"] = self.line_no
+        return row
+
+    def parse_lines(self, lines: Iterable[str]) -> List[dict]:
+        """
+        Parse consecutive lines, dropping headers and blank lines.
+        """
+        return [row for row in map(self.parse, lines) if row is not None]
+
+
+def batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _integer(value, name: str) -> int:
+    """
+    Parse an integer field; JSON numbers must be integral rather than truncated.
+    """
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+class RiskImporter:
+    """
+    Validates row batches and loads them into beach_daily_risks through a
+    temporary staging table: COPY into staging, then one INSERT ... SELECT
+    ... ON CONFLICT merge. Each batch is its own transaction, so memory is
+    bounded by the batch size regardless of input size.
+    """
+
+    def __init__(self, db: Session, source: str = "IMPORT", max_match_km: float = MAX_MATCH_KM):
+        self.db = db
+        self.source = source
+        self.max_match_km = max_match_km
+        self.beach_names = {beach_id: name for beach_id, name in db.query(Beach.id, Beach.name).all()}
+        self.active_beach_ids = get_active_alert_beach_ids(db)
+        beach_index.ensure_loaded(db)
+        self.started = time.perf_counter()
+        self.stats = {
+            "rows_read": 0,
+            "rows_loaded": 0,
+            "rows_rejected": 0,
+            "batches": 0,
+            "alerts_created": 0,
+            "errors": []
+        }
+
+    def _reject(self, row: dict, message: str) -> None:
+        self.stats["rows_rejected"] += 1
+        if len(self.stats["errors"]) < MAX_REPORTED_ERRORS:
+            self.stats["errors"].append(f"line {row.get('_line')}: {message}")
+
+    def _resolve_beach(self, row: dict) -> int:
+        if not _blank(row.get("beach_id")):
+            beach_id = _integer(row["beach_id"], "beach_id")
+            if beach_id not in self.beach_names:
+                raise ValueError(f"unknown beach_id {beach_id}")
+            return beach_id
+        if _blank(row.get("latitude")) or _blank(row.get("longitude")):
+            raise ValueError("beach_id or latitude/longitude is required")
+        match = beach_index.nearest(float(row["latitude"]), float(row["longitude"]), self.max_match_km)
+        if not match:
+            raise ValueError(f"no beach within {self.max_match_km} km")
+        return match[0]
+
+    def validate_batch(self, rows: List[dict]) -> List[tuple]:
+        """
+        Return staging tuples for the valid rows of a batch; invalid rows are counted and skipped.
+        """
+        valid = []
+        for row in rows:
+            self.stats["rows_read"] += 1
+            if "_error" in row:
+                self._reject(row, row["_error"])
+                continue
+            try:
+                beach_id = self._resolve_beach(row)
+                row_date = date.fromisoformat(str(row.get("date", "")).strip())
+                raw_value = float(row["raw_value"])
+                if not 0 <= raw_value <= 1:
+                    raise ValueError("raw_value must be between 0 and 1")
+                confidence = None if _blank(row.get("confidence")) else float(row["confidence"])
+                if confidence is not None and not 0 <= confidence <= 1:
+                    raise ValueError("confidence must be between 0 and 1")
+                risk_level = None if _blank(row.get("risk_level")) else _integer(row["risk_level"], "risk_level")
+                if risk_level is not None and not 0 <= risk_level <= 3:
+                    raise ValueError("risk_level must be between 0 and 3")
+            except (KeyError, TypeError, ValueError) as e:
+                self._reject(row, str(e) if not isinstance(e, KeyError) else f"missing {e.args[0]}")
+                continue
+
+            source = self.source if _blank(row.get("source")) else str(row["source"]).strip()
+            valid.append([row["_line"], beach_id, row_date, risk_level, round(raw_value, 4),
+                          None if confidence is None else round(confidence, 2), source])
+
+        if valid:
+            # Derive missing risk levels from raw values in one vectorized pass
+            derived = risk_levels_from_raw(np.array([v[4] for v in valid]))
+            for v, level in zip(valid, derived.tolist()):
+                if v[3] is None:
+                    v[3] = level
+        return [tuple(v) for v in valid]
+
+    def _copy_to_staging(self, rows: List[tuple]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+        buffer.seek(0)
+
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY risk_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def load_batch(self, rows: List[dict]) -> int:
+        """
+        Validate, stage and merge one batch, then commit.
+        """
+        valid = self.validate_batch(rows)
+        self.stats["batches"] += 1
+        if not valid:
+            return 0
+
+        self.db.execute(text("""
+            CREATE TEMP TABLE IF NOT EXISTS risk_import_staging (
+                line_no integer,
+                beach_id integer,
+                date date,
+                risk_level integer,
+                raw_value numeric(10, 4),
+                confidence numeric(3, 2),
+                source varchar
+            ) ON COMMIT DELETE ROWS
+        """))
+        self._copy_to_staging(valid)
+        ensure_risk_partitions(self.db, min(v[2] for v in valid), max(v[2] for v in valid))
+        # The last line wins when a batch repeats a (beach_id, date)
+        self.db.execute(text("""
+            INSERT INTO beach_daily_risks (beach_id, date, risk_level, raw_value, confidence, source)
+            SELECT DISTINCT ON (beach_id, date) beach_id, date, risk_level, raw_value, confidence, source
+            FROM risk_import_staging
+            ORDER BY beach_id, date, line_no DESC
+            ON CONFLICT (beach_id, date) DO UPDATE SET
+                risk_level = excluded.risk_level,
+                raw_value = excluded.raw_value,
+                confidence = excluded.confidence,
+                source = excluded.source
+        """))
+
+        candidates = [(v[1], v[2]) for v in valid if v[3] >= 3]
+        self.stats["alerts_created"] += create_high_risk_alerts(
+            self.db, candidates, self.beach_names, self.active_beach_ids
+        )
+        self.stats["alerts_created"] += refresh_risk_aggregates(
+            self.db, min(v[2] for v in valid), max(v[2] for v in valid)
+        )
+        self.db.commit()
+
+        self.stats["rows_loaded"] += len(valid)
+        return len(valid)
+
+    def finish(self) -> dict:
+        if self.stats["rows_loaded"]:
+            precompute_risk_context(self.db)
+        self.stats["duration_ms"] = round((time.perf_counter() - self.started) * 1000, 2)
+        return self.stats
+
+
+def import_risk_lines(
+    db: Session,
+    lines: Iterable[str],
+    import_format: str,
+    source: str = "IMPORT",
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> dict:
+    """
+    Stream lines of CSV or NDJSON observations into beach_daily_risks.
+    Lines are parsed lazily and loaded batch by batch.
+    """
+    parser = RowParser(import_format)
+    importer = RiskImporter(db, source=source)
+    rows = (row for row in map(parser.parse, lines) if row is not None)
+    for batch in batched(rows, batch_size):
+        importer.load_batch(batch)
+    return importer.finish()
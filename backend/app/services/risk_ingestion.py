@@ -1,11 +1,28 @@
-import random
+import time
 from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Set
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from ..models.beach import Beach
 from ..models.beach_daily_risk import BeachDailyRisk
 from ..models.alert import Alert
+from .risk_scoring import score_risk_batch, score_risk_grid, SYNTHETIC_SOURCE
+from .spatial_index import beach_index
+from .risk_aggregates import refresh_risk_aggregates
+from .cache import mark_changed
+from .current_state import mark_alerts_changed
+from .partitions import ensure_risk_partitions
+from .ai_context import precompute_risk_context
 
 
+# Rows per INSERT ... ON CONFLICT statement in the bulk path
+UPSERT_BATCH_SIZE = 5000
+
+# Beaches written through the ORM between progress reports
+PROGRESS_EVERY_BEACHES = 500
+
 # Sample beaches to seed if none exist
 SAMPLE_BEACHES = [
     {"name": "Kingstown Beach", "island": "St. Vincent", "latitude": 13.1561, "longitude": -61.2278, "tourism_importance": 4},
@@ -30,71 +47,86 @@ def seed_beaches_if_empty(db: Session) -> int:
     if existing > 0:
         return 0
     
-    created = 0
-    for beach_data in SAMPLE_BEACHES:
-        beach = Beach(**beach_data)
-        db.add(beach)
-        created += 1
-    
+    beaches = [Beach(**beach_data) for beach_data in SAMPLE_BEACHES]
+    db.add_all(beaches)
     db.commit()
-    return created
+    
+    for beach in beaches:
+        beach_index.upsert(beach.id, beach.latitude, beach.longitude)
+    return len(beaches)
 
 
 def generate_synthetic_risk(beach_id: int, target_date: date) -> dict:
     """
-    Generate synthetic risk data for a beach.
-    In production, this would fetch from satellite APIs.
+    Generate synthetic risk data for a single beach.
+    Thin wrapper around score_risk_batch; prefer the batch API for many beaches.
     """
-    # Simple heuristic: random risk with some beaches having higher tendency
-    base_risk = random.random()
-    
-    # Some beaches have naturally higher risk (simulate based on ID)
-    if beach_id % 3 == 0:
-        base_risk += 0.2
-    
-    # Seasonal factor (higher in summer months)
-    month = target_date.month
-    if month in [6, 7, 8, 9]:
-        base_risk += 0.15
-    
-    base_risk = min(base_risk, 1.0)
-    
-    # Convert to risk level
-    if base_risk < 0.25:
-        risk_level = 0  # none
-    elif base_risk < 0.5:
-        risk_level = 1  # low
-    elif base_risk < 0.75:
-        risk_level = 2  # medium
-    else:
-        risk_level = 3  # high
-    
+    scores = score_risk_batch([beach_id], [target_date])
     return {
-        "risk_level": risk_level,
-        "raw_value": round(base_risk, 4),
-        "confidence": round(0.7 + random.random() * 0.3, 2),
-        "source": "SYNTHETIC_MVP"
+        "risk_level": int(scores["risk_level"][0]),
+        "raw_value": float(scores["raw_value"][0]),
+        "confidence": float(scores["confidence"][0]),
+        "source": SYNTHETIC_SOURCE
     }
 
 
-def update_beach_risk_for_date(db: Session, target_date: date) -> dict:
+def risk_rows_from_scores(
+    beach_ids: Sequence[int],
+    dates: Sequence[date],
+    scores: Dict[str, np.ndarray],
+    source: str
+) -> List[dict]:
     """
-    Update risk data for all beaches for a given date.
-    For MVP, generates synthetic data.
+    Turn aligned score arrays into BeachDailyRisk row dicts.
+    """
+    return [
+        {
+            "beach_id": beach_id,
+            "date": row_date,
+            "risk_level": risk_level,
+            "raw_value": raw_value,
+            "confidence": confidence,
+            "source": source
+        }
+        for beach_id, row_date, risk_level, raw_value, confidence in zip(
+            np.asarray(beach_ids).tolist(),
+            np.asarray(dates, dtype="datetime64[D]").tolist(),
+            scores["risk_level"].tolist(),
+            scores["raw_value"].tolist(),
+            scores["confidence"].tolist()
+        )
+    ]
+
+
+def _apply_scores(
+    db: Session,
+    beaches: List[Beach],
+    target_date: date,
+    scores: Dict[str, np.ndarray],
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Write one day of scores through the ORM, one beach at a time.
+    progress, if given, is called with (beaches done, beaches total) every
+    PROGRESS_EVERY_BEACHES beaches.
     """
-    beaches = db.query(Beach).all()
-    
     updated = 0
     alerts_created = 0
+    ensure_risk_partitions(db, target_date, target_date)
     
-    for beach in beaches:
+    for i, beach in enumerate(beaches):
         # Check if risk already exists for this date
         existing = db.query(BeachDailyRisk).filter(
             BeachDailyRisk.beach_id == beach.id,
             BeachDailyRisk.date == target_date
         ).first()
         
-        risk_data = generate_synthetic_risk(beach.id, target_date)
+        risk_data = {
+            "risk_level": int(scores["risk_level"][i]),
+            "raw_value": float(scores["raw_value"][i]),
+            "confidence": float(scores["confidence"][i]),
+            "source": SYNTHETIC_SOURCE
+        }
         
         if existing:
             # Update existing
@@ -115,6 +147,8 @@ def update_beach_risk_for_date(db: Session, target_date: date) -> dict:
             db.add(new_risk)
         
         updated += 1
+        if progress and updated % PROGRESS_EVERY_BEACHES == 0:
+            progress(updated, len(beaches))
         
         # Create alert for high risk
         if risk_data["risk_level"] >= 3:
@@ -136,6 +170,8 @@ def update_beach_risk_for_date(db: Session, target_date: date) -> dict:
                 db.add(alert)
                 alerts_created += 1
     
+    db.flush()
+    alerts_created += refresh_risk_aggregates(db, target_date, target_date)
     db.commit()
     
     return {
@@ -145,23 +181,226 @@ def update_beach_risk_for_date(db: Session, target_date: date) -> dict:
     }
 
 
-def simulate_historical_data(db: Session, days: int = 14) -> dict:
+def update_beach_risk_for_date(
+    db: Session,
+    target_date: date,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Update risk data for all beaches for a given date.
+    For MVP, generates synthetic data.
+    """
+    beaches = db.query(Beach).all()
+    scores = score_risk_batch([beach.id for beach in beaches], [target_date] * len(beaches))
+    result = _apply_scores(db, beaches, target_date, scores, progress)
+    precompute_risk_context(db)
+    return result
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def get_active_alert_beach_ids(db: Session, alert_type: str = "HIGH_RISK") -> Set[int]:
+    """
+    Get ids of beaches that already have an active alert of the given type.
+    """
+    rows = db.query(Alert.beach_id).filter(
+        Alert.alert_type == alert_type,
+        Alert.is_active == True
+    ).distinct().all()
+    return {row[0] for row in rows}
+
+
+def upsert_risk_rows(
+    db: Session,
+    rows: List[dict],
+    progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Insert or update BeachDailyRisk rows keyed on (beach_id, date).
+    Writes in batches of UPSERT_BATCH_SIZE rows per statement, creating
+    any monthly partitions the rows need first. progress, if given, is
+    called with (rows written, rows total) after each batch. Does not commit.
+    """
+    if rows:
+        ensure_risk_partitions(db, min(r["date"] for r in rows), max(r["date"] for r in rows))
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(BeachDailyRisk).values(rows[start:start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BeachDailyRisk.beach_id, BeachDailyRisk.date],
+            set_={
+                "risk_level": stmt.excluded.risk_level,
+                "raw_value": stmt.excluded.raw_value,
+                "confidence": stmt.excluded.confidence,
+                "source": stmt.excluded.source,
+            }
+        )
+        db.execute(stmt)
+        if progress:
+            progress(min(start + UPSERT_BATCH_SIZE, len(rows)), len(rows))
+    return len(rows)
+
+
+def create_high_risk_alerts(
+    db: Session,
+    candidates: List[tuple],
+    beach_names: Dict[int, str],
+    active_beach_ids: Set[int]
+) -> int:
+    """
+    Create HIGH_RISK alerts in one batched insert.
+    candidates is a list of (beach_id, date) pairs in processing order; beaches
+    in active_beach_ids are skipped and each beach gets at most one new alert.
+    active_beach_ids is updated in place. Does not commit.
+    """
+    new_alerts = []
+    for beach_id, target_date in candidates:
+        if beach_id in active_beach_ids:
+            continue
+        active_beach_ids.add(beach_id)
+        new_alerts.append({
+            "beach_id": beach_id,
+            "alert_type": "HIGH_RISK",
+            "severity": 3,
+            "message": f"High sargassum risk detected at {beach_names.get(beach_id)} on {target_date}",
+            "is_active": True
+        })
+    
+    if new_alerts:
+        db.execute(insert(Alert), new_alerts)
+        mark_changed(db, "alerts")
+        mark_alerts_changed(db, [alert["beach_id"] for alert in new_alerts])
+    return len(new_alerts)
+
+
+def write_scored_rows(
+    db: Session,
+    beach_ids: np.ndarray,
+    dates: np.ndarray,
+    scores: Dict[str, np.ndarray],
+    source: str,
+    beach_names: Dict[int, str],
+    active_beach_ids: Set[int],
+    progress: Optional[Callable[[int, int], None]] = None
+) -> tuple:
+    """
+    Upsert scored rows, raise HIGH_RISK alerts for them and refresh the
+    derived risk tables, which may raise trend alerts too. progress is
+    passed on to upsert_risk_rows.
+    Returns (rows_written, alerts_created). Does not commit.
+    """
+    rows = risk_rows_from_scores(beach_ids, dates, scores, source)
+    written = upsert_risk_rows(db, rows, progress)
+    if not written:
+        return 0, 0
+    
+    high = np.flatnonzero(scores["risk_level"] >= 3)
+    candidates = list(zip(
+        np.asarray(beach_ids)[high].tolist(),
+        np.asarray(dates, dtype="datetime64[D]")[high].tolist()
+    ))
+    alerts_created = create_high_risk_alerts(db, candidates, beach_names, active_beach_ids)
+    
+    days = np.asarray(dates, dtype="datetime64[D]")
+    alerts_created += refresh_risk_aggregates(db, days.min().tolist(), days.max().tolist())
+    return written, alerts_created
+
+
+def bulk_update_beach_risk_for_date(
+    db: Session,
+    target_date: date,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Set-based variant of update_beach_risk_for_date.
+    Loads beaches and active alerts once, upserts the whole day with
+    INSERT ... ON CONFLICT DO UPDATE and creates alerts in a single batch.
+    progress, if given, is called with (rows written, rows total) per batch.
+    Requires the (beach_id, date) unique constraint (migration 003).
+    """
+    started = time.perf_counter()
+    timings = {}
+    
+    step = time.perf_counter()
+    beaches = db.query(Beach.id, Beach.name).all()
+    beach_names = {beach_id: name for beach_id, name in beaches}
+    active_beach_ids = get_active_alert_beach_ids(db)
+    timings["load_ms"] = _elapsed_ms(step)
+    
+    step = time.perf_counter()
+    beach_ids = np.fromiter(beach_names.keys(), dtype=np.int64, count=len(beach_names))
+    dates = np.full(len(beach_ids), np.datetime64(target_date, "D"))
+    scores = score_risk_batch(beach_ids, dates)
+    timings["score_ms"] = _elapsed_ms(step)
+    
+    step = time.perf_counter()
+    updated, alerts_created = write_scored_rows(
+        db, beach_ids, dates, scores, SYNTHETIC_SOURCE, beach_names, active_beach_ids, progress
+    )
+    timings["write_ms"] = _elapsed_ms(step)
+    
+    step = time.perf_counter()
+    db.commit()
+    timings["commit_ms"] = _elapsed_ms(step)
+    
+    step = time.perf_counter()
+    precompute_risk_context(db)
+    timings["context_ms"] = _elapsed_ms(step)
+    timings["total_ms"] = _elapsed_ms(started)
+    
+    return {
+        "date": str(target_date),
+        "beaches_updated": updated,
+        "alerts_created": alerts_created,
+        "timings": timings
+    }
+
+
+def simulate_historical_data(
+    db: Session,
+    days: int = 14,
+    bulk: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
     """
     Generate synthetic historical risk data for the past N days.
     Also seeds beaches if none exist.
+    With bulk=True the range goes through the chunked, resumable backfill
+    engine; otherwise all days are scored in one batch and written day by
+    day through the ORM. progress, if given, is called with (days done,
+    days total), or the backfill's (chunks done, chunks total).
     """
     # First, ensure we have beaches
     beaches_created = seed_beaches_if_empty(db)
     
     today = date.today()
+    
+    if bulk:
+        from .backfill import run_backfill
+        result = run_backfill(db, today - timedelta(days=days - 1), today, progress=progress)
+        return {
+            "days_processed": days,
+            "beaches_created": beaches_created,
+            **result
+        }
+    
+    beaches = db.query(Beach).all()
+    dates = [today - timedelta(days=i) for i in range(days)]
+    scores = score_risk_grid([beach.id for beach in beaches], dates)
+    
     total_updated = 0
     total_alerts = 0
     
-    for i in range(days):
-        target_date = today - timedelta(days=i)
-        result = update_beach_risk_for_date(db, target_date)
+    n = len(beaches)
+    for i, target_date in enumerate(dates):
+        day_scores = {key: scores[key][i * n:(i + 1) * n] for key in ("risk_level", "raw_value", "confidence")}
+        result = _apply_scores(db, beaches, target_date, day_scores)
         total_updated += result["beaches_updated"]
         total_alerts += result["alerts_created"]
+        if progress:
+            progress(i + 1, len(dates))
+    precompute_risk_context(db)
     
     return {
         "days_processed": days,
@@ -0,0 +1,256 @@
+"""
+beach_risk_trends: rolling per-beach risk statistics and the alerts they raise.
+
+Each ingested day advances every beach whose state ends the day before with
+one UPDATE that adds the new day and drops the days leaving the 7- and
+30-day windows; re-ingesting the latest day swaps its value in place. A day
+therefore costs O(beaches) whatever the history length. Beaches the
+incremental step cannot reach (first day, a gap, or an older day rewritten
+inside their window) are rebuilt from the last STREAK_LOOKBACK_DAYS of
+history instead.
+
+After the refresh, beaches whose streak reaches PERSISTENT_RISK_DAYS or
+whose 7-day slope reaches RISING_TREND_SLOPE get a PERSISTENT_RISK or
+RISING_TREND alert unless one is already active.
+"""
+from datetime import date, timedelta
+from typing import Set
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..config import settings
+from .cache import mark_changed
+from .current_state import mark_alerts_changed
+
+# Days of history a rebuild reads; longer streaks are only kept by the
+# incremental step
+STREAK_LOOKBACK_DAYS = 90
+
+# Day number used for the slope sums
+DAY_ZERO = "DATE '2000-01-01'"
+
+# Add :day to states ending the day before, dropping the days that leave the
+# windows, or replace :day's old value in states that already end on it
+ADVANCE_SQL = text(f"""
+    WITH step AS (
+        SELECT t.beach_id, r.risk_level, r.date - {DAY_ZERO} AS x,
+               CASE WHEN t.date < r.date THEN out_7.risk_level ELSE t.risk_level END AS out_7,
+               CASE WHEN t.date < r.date THEN out_30.risk_level ELSE t.risk_level END AS out_30,
+               CASE WHEN t.date < r.date THEN out_7.date ELSE t.date END - {DAY_ZERO} AS out_x,
+               CASE WHEN t.date < r.date THEN t.streak_days ELSE t.prev_streak_days END AS prior_streak
+        FROM beach_risk_trends t
+        JOIN beach_daily_risks r ON r.beach_id = t.beach_id AND r.date = CAST(:day AS date)
+        LEFT JOIN beach_daily_risks out_7
+            ON out_7.beach_id = t.beach_id AND out_7.date = CAST(:day AS date) - 7
+        LEFT JOIN beach_daily_risks out_30
+            ON out_30.beach_id = t.beach_id AND out_30.date = CAST(:day AS date) - 30
+        WHERE t.date IN (CAST(:day AS date) - 1, CAST(:day AS date))
+    )
+    UPDATE beach_risk_trends t SET
+        date = CAST(:day AS date),
+        risk_level = s.risk_level,
+        streak_days = CASE WHEN s.risk_level >= :level THEN s.prior_streak + 1 ELSE 0 END,
+        prev_streak_days = s.prior_streak,
+        n_7 = t.n_7 + 1 - (s.out_7 IS NOT NULL)::int,
+        sum_7 = t.sum_7 + s.risk_level - coalesce(s.out_7, 0),
+        sum_x_7 = t.sum_x_7 + s.x - coalesce(s.out_x, 0),
+        sum_xx_7 = t.sum_xx_7 + s.x::bigint * s.x - coalesce(s.out_x::bigint * s.out_x, 0),
+        sum_xy_7 = t.sum_xy_7 + s.x::bigint * s.risk_level - coalesce(s.out_x::bigint * s.out_7, 0),
+        n_30 = t.n_30 + 1 - (s.out_30 IS NOT NULL)::int,
+        sum_30 = t.sum_30 + s.risk_level - coalesce(s.out_30, 0),
+        updated_at = now()
+    FROM step s
+    WHERE t.beach_id = s.beach_id
+    RETURNING t.beach_id
+""")
+
+# Recompute the state of the beaches in {targets} (beach_id, as_of) from
+# history; {bounds} is a constant date range covering every lookback so
+# only the partitions it needs are planned
+REBUILD_SQL = f"""
+    WITH targets AS ({{targets}}),
+    history AS (
+        SELECT r.beach_id, t.as_of, r.date, r.risk_level, r.date - {DAY_ZERO} AS x
+        FROM targets t
+        JOIN beach_daily_risks r
+            ON r.beach_id = t.beach_id AND r.date BETWEEN t.as_of - {STREAK_LOOKBACK_DAYS - 1} AND t.as_of
+        WHERE {{bounds}}
+    ),
+    windows AS (
+        SELECT beach_id, as_of,
+               max(risk_level) FILTER (WHERE date = as_of) AS risk_level,
+               count(*) FILTER (WHERE date > as_of - 7) AS n_7,
+               coalesce(sum(risk_level) FILTER (WHERE date > as_of - 7), 0) AS sum_7,
+               coalesce(sum(x) FILTER (WHERE date > as_of - 7), 0) AS sum_x_7,
+               coalesce(sum(x::bigint * x) FILTER (WHERE date > as_of - 7), 0) AS sum_xx_7,
+               coalesce(sum(x::bigint * risk_level) FILTER (WHERE date > as_of - 7), 0) AS sum_xy_7,
+               count(*) FILTER (WHERE date > as_of - 30) AS n_30,
+               coalesce(sum(risk_level) FILTER (WHERE date > as_of - 30), 0) AS sum_30
+        FROM history
+        GROUP BY beach_id, as_of
+    ),
+    islands AS (
+        -- Runs of consecutive qualifying days share date - row_number()
+        SELECT beach_id, as_of, date,
+               date - (row_number() OVER (PARTITION BY beach_id ORDER BY date))::int AS island
+        FROM history
+        WHERE risk_level >= :level
+    ),
+    runs AS (
+        SELECT beach_id, as_of, count(*) AS days, max(date) AS last_day
+        FROM islands
+        GROUP BY beach_id, as_of, island
+    ),
+    streaks AS (
+        -- The run ending on as_of, and the one ending the day before
+        SELECT beach_id,
+               max(days) FILTER (WHERE last_day = as_of) AS streak_days,
+               coalesce(max(days - 1) FILTER (WHERE last_day = as_of),
+                        max(days) FILTER (WHERE last_day = as_of - 1)) AS prev_streak_days
+        FROM runs
+        GROUP BY beach_id
+    )
+    INSERT INTO beach_risk_trends (beach_id, date, risk_level, streak_days, prev_streak_days, n_7, sum_7,
+                                   sum_x_7, sum_xx_7, sum_xy_7, n_30, sum_30, updated_at)
+    SELECT w.beach_id, w.as_of, w.risk_level, coalesce(s.streak_days, 0), coalesce(s.prev_streak_days, 0),
+           w.n_7, w.sum_7, w.sum_x_7, w.sum_xx_7, w.sum_xy_7, w.n_30, w.sum_30, now()
+    FROM windows w
+    LEFT JOIN streaks s ON s.beach_id = w.beach_id
+    WHERE w.risk_level IS NOT NULL
+    ON CONFLICT (beach_id) DO UPDATE SET
+        date = excluded.date,
+        risk_level = excluded.risk_level,
+        streak_days = excluded.streak_days,
+        prev_streak_days = excluded.prev_streak_days,
+        n_7 = excluded.n_7,
+        sum_7 = excluded.sum_7,
+        sum_x_7 = excluded.sum_x_7,
+        sum_xx_7 = excluded.sum_xx_7,
+        sum_xy_7 = excluded.sum_xy_7,
+        n_30 = excluded.n_30,
+        sum_30 = excluded.sum_30,
+        updated_at = excluded.updated_at
+    RETURNING beach_id
+"""
+
+# Beaches with a row on :day that the incremental step cannot advance to it
+REBUILD_DAY_SQL = text(REBUILD_SQL.format(
+    targets="""
+        SELECT r.beach_id, r.date AS as_of
+        FROM beach_daily_risks r
+        LEFT JOIN beach_risk_trends t ON t.beach_id = r.beach_id
+        WHERE r.date = CAST(:day AS date)
+          AND (t.date IS NULL OR t.date < CAST(:day AS date) - 1)
+    """,
+    bounds=f"r.date BETWEEN CAST(:day AS date) - {STREAK_LOOKBACK_DAYS - 1} AND CAST(:day AS date)"
+))
+
+# Beaches whose state already ran past the write's first day, so the write
+# changed days inside their windows that the incremental step cannot reach
+STALE_STATE_SQL = text(f"""
+    SELECT beach_id FROM beach_risk_trends
+    WHERE date > CAST(:start_date AS date)
+      AND date - {STREAK_LOOKBACK_DAYS - 1} <= CAST(:end_date AS date)
+""")
+
+# Recompute :beach_ids as of their state dates, which lie between
+# :first_date and :last_date
+REBUILD_STALE_SQL = text(REBUILD_SQL.format(
+    targets="""
+        SELECT beach_id, date AS as_of
+        FROM beach_risk_trends
+        WHERE beach_id = ANY(:beach_ids)
+    """,
+    bounds=f"r.date BETWEEN CAST(:first_date AS date) - {STREAK_LOOKBACK_DAYS - 1} AND CAST(:last_date AS date)"
+))
+
+REBUILD_ALL_SQL = text(REBUILD_SQL.format(
+    targets="SELECT beach_id, max(date) AS as_of FROM beach_daily_risks GROUP BY beach_id",
+    bounds="true"
+))
+
+# Raise alert_type for matching beaches in :beach_ids without an active one
+TREND_ALERT_SQL = """
+    INSERT INTO alerts (beach_id, alert_type, severity, message, is_active)
+    SELECT t.beach_id, '{alert_type}', {severity}, {message}, true
+    FROM beach_risk_trends t
+    JOIN beaches b ON b.id = t.beach_id
+    WHERE t.beach_id = ANY(:beach_ids) AND {condition}
+      AND NOT EXISTS (
+          SELECT 1 FROM alerts a
+          WHERE a.is_active AND a.alert_type = '{alert_type}' AND a.beach_id = t.beach_id
+      )
+    RETURNING beach_id
+"""
+
+PERSISTENT_ALERT_SQL = text(TREND_ALERT_SQL.format(
+    alert_type="PERSISTENT_RISK",
+    severity="CASE WHEN t.risk_level >= 3 THEN 3 ELSE 2 END",
+    message="format('Sargassum risk at %s has been level %s or higher for %s days (through %s)', "
+            "b.name, :level, t.streak_days, t.date)",
+    condition="t.streak_days >= :persistent_days"
+))
+
+RISING_ALERT_SQL = text(TREND_ALERT_SQL.format(
+    alert_type="RISING_TREND",
+    severity="2",
+    message="format('Sargassum risk at %s is rising by %s levels/day over the last 7 days (through %s)', "
+            "b.name, t.slope_7, t.date)",
+    condition="t.slope_7 >= :rising_slope AND t.n_7 >= :rising_min_days"
+))
+
+
+def create_trend_alerts(db: Session, beach_ids: Set[int]) -> int:
+    """
+    Raise PERSISTENT_RISK and RISING_TREND alerts for the given beaches'
+    current trend state. Returns the number created. Does not commit.
+    """
+    if not beach_ids:
+        return 0
+    params = {
+        "beach_ids": sorted(beach_ids),
+        "level": settings.PERSISTENT_RISK_LEVEL,
+        "persistent_days": settings.PERSISTENT_RISK_DAYS,
+        "rising_slope": settings.RISING_TREND_SLOPE,
+        "rising_min_days": settings.RISING_TREND_MIN_DAYS
+    }
+    alerted = db.execute(PERSISTENT_ALERT_SQL, params).scalars().all()
+    alerted += db.execute(RISING_ALERT_SQL, params).scalars().all()
+    if alerted:
+        mark_changed(db, "alerts")
+        mark_alerts_changed(db, alerted)
+    return len(alerted)
+
+
+def refresh_risk_trends(db: Session, start_date: date, end_date: date) -> int:
+    """
+    Fold the days in [start_date, end_date] into beach_risk_trends, oldest
+    first, then raise trend alerts for the beaches that moved. Returns the
+    number of alerts created. Does not commit.
+    """
+    level = settings.PERSISTENT_RISK_LEVEL
+    stale = db.execute(STALE_STATE_SQL, {"start_date": start_date, "end_date": end_date}).scalars().all()
+    touched = set()
+    day = start_date
+    while day <= end_date:
+        params = {"day": day, "level": level}
+        touched.update(db.execute(ADVANCE_SQL, params).scalars())
+        touched.update(db.execute(REBUILD_DAY_SQL, params).scalars())
+        day += timedelta(days=1)
+    if stale:
+        # Rebuilt as of where their state ends now, after the loop above
+        first_date, last_date = db.execute(text("""
+            SELECT min(date), max(date) FROM beach_risk_trends WHERE beach_id = ANY(:beach_ids)
+        """), {"beach_ids": stale}).one()
+        touched.update(db.execute(REBUILD_STALE_SQL, {
+            "beach_ids": stale, "first_date": first_date, "last_date": last_date, "level": level
+        }).scalars())
+    return create_trend_alerts(db, touched)
+
+
+def rebuild_risk_trends(db: Session) -> int:
+    """
+    Recompute every beach's trend state from history, e.g. after changing
+    PERSISTENT_RISK_LEVEL. Returns the number of rows. Does not commit.
+    """
+    db.execute(text("DELETE FROM beach_risk_trends"))
+    return len(db.execute(REBUILD_ALL_SQL, {"level": settings.PERSISTENT_RISK_LEVEL}).scalars().all())
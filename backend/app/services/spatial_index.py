@@ -0,0 +1,197 @@
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from ..models.beach import Beach
+from .cache import query_cache
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat: float, lon: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distance from one point to many, in kilometres.
+    """
+    lat1 = math.radians(lat)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class BeachSpatialIndex:
+    """
+    In-memory uniform grid over beach latitude/longitude.
+    Buckets beaches into cell_size-degree cells so point, radius and bbox
+    lookups only touch nearby cells instead of every beach. ensure_loaded
+    rebuilds it whenever the "beaches" cache family has a new version, so
+    beaches written by other processes show up too.
+    """
+
+    def __init__(self, cell_size: float = 0.1):
+        self.cell_size = cell_size
+        self._lock = threading.RLock()
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._positions: Dict[int, Tuple[float, float]] = {}
+        self._loaded = False
+        self._beaches_version = None  # "beaches" family version the index was loaded at
+        self.version = 0  # bumped on every change, for derived caches
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Reload the index from the beaches table.
+        """
+        # Read before querying, so a write committing meanwhile forces another rebuild
+        beaches_version = query_cache.versions(("beaches",))[0]
+        rows = db.query(Beach.id, Beach.latitude, Beach.longitude).all()
+        with self._lock:
+            self._cells = {}
+            self._positions = {}
+            for beach_id, lat, lon in rows:
+                self._insert(beach_id, lat, lon)
+            self._loaded = True
+            self._beaches_version = beaches_version
+            self.version += 1
+        return len(rows)
+
+    def ensure_loaded(self, db: Session) -> None:
+        """
+        Load the index, or reload it if beaches changed since it was loaded.
+        """
+        if not self._loaded or self._beaches_version != query_cache.versions(("beaches",))[0]:
+            self.rebuild(db)
+
+    def _insert(self, beach_id: int, lat: float, lon: float) -> None:
+        self._positions[beach_id] = (lat, lon)
+        self._cells.setdefault(self._cell(lat, lon), set()).add(beach_id)
+
+    def _discard(self, beach_id: int) -> None:
+        position = self._positions.pop(beach_id, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(beach_id)
+            if not members:
+                del self._cells[cell]
+
+    def upsert(self, beach_id: int, lat: float, lon: float) -> None:
+        """
+        Add a beach or move it to new coordinates.
+        """
+        with self._lock:
+            self._discard(beach_id)
+            self._insert(beach_id, lat, lon)
+            self.version += 1
+
+    def remove(self, beach_id: int) -> None:
+        with self._lock:
+            self._discard(beach_id)
+            self.version += 1
+
+    def position(self, beach_id: int) -> Optional[Tuple[float, float]]:
+        return self._positions.get(beach_id)
+
+    def items(self) -> List[Tuple[int, float, float]]:
+        """
+        Snapshot of (beach_id, latitude, longitude) for every indexed beach.
+        """
+        with self._lock:
+            return [(beach_id, lat, lon) for beach_id, (lat, lon) in self._positions.items()]
+
+    def _ids_in_cells(self, row_range: range, col_range: range) -> List[int]:
+        ids = []
+        cols = list(col_range)
+        if len(cols) * len(row_range) > len(self._cells):
+            # Range covers more cells than are populated: scan populated cells instead
+            rows = set(row_range)
+            for (row, col), members in self._cells.items():
+                if row in rows and cols[0] <= col <= cols[-1]:
+                    ids.extend(members)
+            return ids
+        for row in row_range:
+            for col in cols:
+                members = self._cells.get((row, col))
+                if members:
+                    ids.extend(members)
+        return ids
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> List[int]:
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        min_row, min_col = self._cell(lat - dlat, lon - dlon)
+        max_row, max_col = self._cell(lat + dlat, lon + dlon)
+        return self._ids_in_cells(range(min_row, max_row + 1), range(min_col, max_col + 1))
+
+    def nearby(self, lat: float, lon: float, radius_km: float, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Beaches within radius_km of a point as (beach_id, distance_km), nearest first.
+        """
+        with self._lock:
+            candidates = self._candidates(lat, lon, radius_km)
+            if not candidates:
+                return []
+            positions = np.array([self._positions[c] for c in candidates], dtype=np.float64)
+
+        distances = haversine_km(lat, lon, positions[:, 0], positions[:, 1])
+        inside = np.flatnonzero(distances <= radius_km)
+        order = inside[np.argsort(distances[inside], kind="stable")]
+        if limit is not None:
+            order = order[:limit]
+        return [(candidates[i], float(distances[i])) for i in order]
+
+    def nearest(self, lat: float, lon: float, max_km: float) -> Optional[Tuple[int, float]]:
+        """
+        Closest beach within max_km, or None.
+        """
+        radius = min(max_km, self.cell_size * KM_PER_DEGREE_LAT)
+        while True:
+            found = self.nearby(lat, lon, radius, limit=1)
+            if found or radius >= max_km:
+                return found[0] if found else None
+            radius = min(radius * 2, max_km)
+
+    def within_bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> List[int]:
+        """
+        Ids of beaches inside a lon/lat bounding box (edges inclusive).
+        """
+        with self._lock:
+            min_row, min_col = self._cell(min_lat, min_lon)
+            max_row, max_col = self._cell(max_lat, max_lon)
+            candidates = self._ids_in_cells(range(min_row, max_row + 1), range(min_col, max_col + 1))
+            return [
+                beach_id for beach_id in candidates
+                if min_lat <= self._positions[beach_id][0] <= max_lat
+                and min_lon <= self._positions[beach_id][1] <= max_lon
+            ]
+
+
+# Process-wide index, kept in sync by the beach write paths
+beach_index = BeachSpatialIndex()
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse "min_lon,min_lat,max_lon,max_lat" into floats.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError("bbox minimums must not exceed maximums")
+    return min_lon, min_lat, max_lon, max_lat
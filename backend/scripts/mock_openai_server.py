@@ -0,0 +1,119 @@
+"""
+Local stand-in for the OpenAI chat completions API, for exercising the AI
+assistant's client pool, concurrency limit and timeouts without the real
+service.
+
+    python scripts/mock_openai_server.py --port 8099 --delay 1.5
+    OPENAI_API_KEY=test OPENAI_BASE_URL=http://localhost:8099/v1 uvicorn app.main:app
+
+Every completion waits --delay seconds and echoes the last user message.
+With "stream": true the echo is sent as server-sent event chunks, one word
+every --token-delay seconds after the initial delay. --fail-rate answers
+that fraction of requests with --fail-status instead, to exercise retries
+and the circuit breaker.
+GET /stats reports requests served, the most in flight at once and how many
+distinct client connections were used.
+"""
+import argparse
+import asyncio
+import time
+import json
+import random
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Mock OpenAI")
+state = {"delay": 0.5, "token_delay": 0.05, "fail_rate": 0.0, "fail_status": 503, "failed": 0, "requests": 0, "in_flight": 0, "max_in_flight": 0, "connections": set()}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    state["requests"] += 1
+    state["in_flight"] += 1
+    state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+    state["connections"].add(f"{request.client.host}:{request.client.port}")
+    try:
+        await asyncio.sleep(state["delay"])
+    finally:
+        state["in_flight"] -= 1
+
+    if random.random() < state["fail_rate"]:
+        state["failed"] += 1
+        return JSONResponse(
+            {"error": {"message": "Mock failure", "type": "server_error", "code": None}},
+            status_code=state["fail_status"]
+        )
+
+    prompt = next((m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+    content = f"Mock answer to: {prompt}"
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(body, content), media_type="text/event-stream")
+    return {
+        "id": f"chatcmpl-mock-{state['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": len(content.split())}
+    }
+
+
+async def stream_completion(body: dict, content: str):
+    state["in_flight"] += 1
+    try:
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": f"chatcmpl-mock-{state['requests']}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else f" {word}"},
+                    "finish_reason": None
+                }]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(state["token_delay"])
+        yield "data: [DONE]\n\n"
+    finally:
+        state["in_flight"] -= 1
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "requests": state["requests"],
+        "failed": state["failed"],
+        "in_flight": state["in_flight"],
+        "max_in_flight": state["max_in_flight"],
+        "connections": len(state["connections"])
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds per completion")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="Seconds between streamed words")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=503, help="HTTP status of failed requests")
+    args = parser.parse_args(argv)
+
+    state["delay"] = args.delay
+    state["token_delay"] = args.token_delay
+    state["fail_rate"] = args.fail_rate
+    state["fail_status"] = args.fail_status
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-import { MapContainer, TileLayer, CircleMarker, Popup } from 'react-leaflet';
+import { useCallback, useEffect, useState } from 'react';
+import { MapContainer, TileLayer, CircleMarker, Popup, Tooltip, useMap, useMapEvents } from 'react-leaflet';
+import { fetchMapFeatures } from '../lib/api';
 import 'leaflet/dist/leaflet.css';
 
-// Sample beaches data as fallback
+// Sample beaches shown when the map layer cannot be loaded
 const sampleBeaches = [
   { id: 1, name: 'Kingstown Beach', latitude: 13.1561, longitude: -61.2278, island: 'St. Vincent', tourism_importance: 4 },
   { id: 2, name: 'Villa Beach', latitude: 13.1474, longitude: -61.1982, island: 'St. Vincent', tourism_importance: 5 },
@@ -33,16 +35,146 @@ function getRiskLabel(riskLevel) {
   }
 }
 
-export default function MapView({ beaches = [], riskData = {}, onBeachSelect }) {
-  // Use beaches from props, or fallback to sample data
-  const displayBeaches = beaches && beaches.length > 0 ? beaches : sampleBeaches;
+const sampleFeatures = sampleBeaches.map(beach => ({
+  type: 'Feature',
+  id: beach.id,
+  geometry: { type: 'Point', coordinates: [beach.longitude, beach.latitude] },
+  properties: { beach_id: beach.id, ...beach, risk_level: null },
+}));
 
-  const handleMarkerClick = (beach) => {
-    if (onBeachSelect) {
-      onBeachSelect(beach);
+function toBeach(feature) {
+  const [longitude, latitude] = feature.geometry.coordinates;
+  return { id: feature.properties.beach_id, latitude, longitude, ...feature.properties };
+}
+
+function clusterRadius(count) {
+  return Math.min(12 + Math.log2(count) * 3, 32);
+}
+
+// Reloads the server-side layer for the visible bbox and zoom after every pan or zoom
+function BeachLayer({ date, refreshKey, onBeachSelect }) {
+  const map = useMap();
+  const [features, setFeatures] = useState(null);
+
+  const load = useCallback(async () => {
+    const bounds = map.getBounds();
+    const bbox = [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+      .map(value => value.toFixed(4));
+    try {
+      const collection = await fetchMapFeatures(bbox, map.getZoom(), date);
+      setFeatures(collection.features);
+    } catch (error) {
+      console.error('Failed to load map layer:', error);
+      setFeatures(current => current ?? sampleFeatures);
     }
-  };
+  }, [map, date, refreshKey]);
+
+  useEffect(() => {
+    load();
+  }, [load]);
 
+  useMapEvents({ moveend: load });
+
+  if (features === null) {
+    return null;
+  }
+
+  return features.map((feature) => {
+    const [longitude, latitude] = feature.geometry.coordinates;
+
+    if (feature.properties.cluster) {
+      const { point_count, max_risk_level, high_risk, medium_risk, expansion_zoom } = feature.properties;
+      const color = getRiskColor(max_risk_level);
+      return (
+        <CircleMarker
+          key={feature.id}
+          center={[latitude, longitude]}
+          radius={clusterRadius(point_count)}
+          fillColor={color}
+          fillOpacity={0.6}
+          color={color}
+          weight={2}
+          eventHandlers={{
+            click: () => map.setView([latitude, longitude], expansion_zoom)
+          }}
+        >
+          <Tooltip direction="center" permanent className="cluster-label">
+            {point_count}
+          </Tooltip>
+          <Popup>
+            <div className="min-w-[160px] text-xs space-y-1">
+              <h3 className="font-bold text-base mb-1">{point_count} beaches</h3>
+              <div className="flex justify-between">
+                <span className="text-slate-400">High Risk:</span>
+                <span>{high_risk}</span>
+              </div>
+              <div className="flex justify-between">
+                <span className="text-slate-400">Medium Risk:</span>
+                <span>{medium_risk}</span>
+              </div>
+            </div>
+          </Popup>
+        </CircleMarker>
+      );
+    }
+
+    const beach = toBeach(feature);
+    const riskLevel = beach.risk_level;
+    const color = getRiskColor(riskLevel);
+
+    return (
+      <CircleMarker
+        key={feature.id}
+        center={[latitude, longitude]}
+        radius={12}
+        fillColor={color}
+        fillOpacity={0.8}
+        color={color}
+        weight={2}
+        eventHandlers={{
+          click: () => onBeachSelect && onBeachSelect(beach)
+        }}
+      >
+        <Popup>
+          <div className="min-w-[180px]">
+            <h3 className="font-bold text-base mb-1">{beach.name}</h3>
+            <p className="text-sm text-slate-300 mb-2">{beach.island}</p>
+            
+            <div className="flex items-center gap-2 mb-2">
+              <span className="text-xs text-slate-400">Risk:</span>
+              <span 
+                className="px-2 py-0.5 rounded text-xs font-medium"
+                style={{ 
+                  backgroundColor: `${color}33`,
+                  color: color
+                }}
+              >
+                {getRiskLabel(riskLevel)}
+              </span>
+            </div>
+            
+            <div className="text-xs space-y-1">
+              <div className="flex justify-between">
+                <span className="text-slate-400">Tourism Priority:</span>
+                <span>{beach.tourism_importance}/5</span>
+              </div>
+              <div className="flex justify-between">
+                <span className="text-slate-400">Lat:</span>
+                <span>{beach.latitude?.toFixed(4)}</span>
+              </div>
+              <div className="flex justify-between">
+                <span className="text-slate-400">Lng:</span>
+                <span>{beach.longitude?.toFixed(4)}</span>
+              </div>
+            </div>
+          </div>
+        </Popup>
+      </CircleMarker>
+    );
+  });
+}
+
+export default function MapView({ date = null, refreshKey = null, onBeachSelect }) {
   return (
     <MapContainer
       center={[13.15, -61.20]}
@@ -55,60 +187,7 @@ export default function MapView({ beaches = [], riskData = {}, onBeachSelect })
         url="https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png"
       />
 
-      {displayBeaches.map((beach) => {
-        const riskLevel = riskData[beach.id] ?? null;
-        const color = getRiskColor(riskLevel);
-        
-        return (
-          <CircleMarker
-            key={beach.id}
-            center={[beach.latitude, beach.longitude]}
-            radius={12}
-            fillColor={color}
-            fillOpacity={0.8}
-            color={color}
-            weight={2}
-            eventHandlers={{
-              click: () => handleMarkerClick(beach)
-            }}
-          >
-            <Popup>
-              <div className="min-w-[180px]">
-                <h3 className="font-bold text-base mb-1">{beach.name}</h3>
-                <p className="text-sm text-slate-300 mb-2">{beach.island}</p>
-                
-                <div className="flex items-center gap-2 mb-2">
-                  <span className="text-xs text-slate-400">Risk:</span>
-                  <span 
-                    className="px-2 py-0.5 rounded text-xs font-medium"
-                    style={{ 
-                      backgroundColor: `${color}33`,
-                      color: color
-                    }}
-                  >
-                    {getRiskLabel(riskLevel)}
-                  </span>
-                </div>
-                
-                <div className="text-xs space-y-1">
-                  <div className="flex justify-between">
-                    <span className="text-slate-400">Tourism Priority:</span>
-                    <span>{beach.tourism_importance}/5</span>
-                  </div>
-                  <div className="flex justify-between">
-                    <span className="text-slate-400">Lat:</span>
-                    <span>{beach.latitude?.toFixed(4)}</span>
-                  </div>
-                  <div className="flex justify-between">
-                    <span className="text-slate-400">Lng:</span>
-                    <span>{beach.longitude?.toFixed(4)}</span>
-                  </div>
-                </div>
-              </div>
-            </Popup>
-          </CircleMarker>
-        );
-      })}
+      <BeachLayer date={date} refreshKey={refreshKey} onBeachSelect={onBeachSelect} />
     </MapContainer>
   );
 }
@@ -48,9 +48,23 @@ async function fetchAPI(endpoint, options = {}) {
   return response.json();
 }
 
+// List endpoints return { items, next_cursor }; follow the cursor to the end
+async function fetchAllPages(endpoint, pageSize = 500) {
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const items = [];
+  let cursor = null;
+  do {
+    const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+    const page = await fetchAPI(`${endpoint}${separator}limit=${pageSize}${cursorParam}`);
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return items;
+}
+
 // Beaches API
 export async function fetchBeaches() {
-  return fetchAPI('/api/beaches');
+  return fetchAllPages('/api/beaches');
 }
 
 export async function fetchBeach(id) {
@@ -79,7 +93,7 @@ export async function deleteBeach(id) {
 
 // Campaigns API
 export async function fetchCampaigns() {
-  return fetchAPI('/api/campaigns');
+  return fetchAllPages('/api/campaigns');
 }
 
 export async function fetchCampaign(id) {
@@ -108,7 +122,7 @@ export async function deleteCampaign(id) {
 
 // Tasks API
 export async function fetchTasks() {
-  return fetchAPI('/api/tasks');
+  return fetchAllPages('/api/tasks');
 }
 
 export async function fetchTask(id) {
@@ -143,6 +157,61 @@ export async function sendChatMessage(message) {
   });
 }
 
+// Streams the reply as server-sent events, calling onDelta with each piece
+// as it arrives; resolves with the full reply
+export async function streamChatMessage(message, onDelta) {
+  const response = await fetch(`${getApiBaseUrl()}/api/ai/chat/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+    },
+    body: JSON.stringify({ message }),
+  });
+
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({ detail: 'An error occurred' }));
+    throw new Error(error.detail || `HTTP error! status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let reply = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line; keep any partial event buffered
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+    for (const event of events) {
+      const lines = event.split('\n');
+      if (lines.includes('event: done')) return reply;
+      const data = lines.find(line => line.startsWith('data: '));
+      if (!data) continue;
+      const { delta } = JSON.parse(data.slice(6));
+      reply += delta;
+      onDelta(delta);
+    }
+  }
+  return reply;
+}
+
+// Map API
+export async function fetchMapFeatures(bbox, zoom, date = null) {
+  let params = `?bbox=${bbox.join(',')}&zoom=${zoom}`;
+  if (date) params += `&date=${date}`;
+  return fetchAPI(`/api/map/beaches.geojson${params}`);
+}
+
+// Dashboard API
+export async function fetchDashboard(date = null) {
+  const params = date ? `?target_date=${date}` : '';
+  return fetchAPI(`/api/dashboard${params}`);
+}
+
 // Risk API
 export async function fetchRiskSummary(date = null) {
   const params = date ? `?target_date=${date}` : '';
@@ -162,8 +231,17 @@ export async function fetchBeachRiskHistory(beachId, startDate = null, endDate =
   return fetchAPI(`/api/risk/beach/${beachId}${params}`);
 }
 
-export async function fetchAlerts(limit = 20, activeOnly = true) {
-  return fetchAPI(`/api/alerts?limit=${limit}&active_only=${activeOnly}`);
+export async function fetchRiskTimeseries(beachIds, startDate = null, endDate = null, include = [], resolution = 'auto') {
+  let params = `?beach_ids=${beachIds.join(',')}&resolution=${resolution}`;
+  if (startDate) params += `&start=${startDate}`;
+  if (endDate) params += `&end=${endDate}`;
+  if (include.length) params += `&include=${include.join(',')}`;
+  return fetchAPI(`/api/risk/timeseries${params}`);
+}
+
+export async function fetchAlerts(limit = 20, activeOnly = true, cursor = null) {
+  const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+  return fetchAPI(`/api/alerts?limit=${limit}&active_only=${activeOnly}${cursorParam}`);
 }
 
 export async function simulateRiskIngestion(days = 14) {
@@ -171,3 +249,26 @@ export async function simulateRiskIngestion(days = 14) {
     method: 'POST',
   });
 }
+
+// Jobs API
+export async function fetchJob(id) {
+  return fetchAPI(`/api/jobs/${id}`);
+}
+
+export async function fetchJobs(limit = 20) {
+  return fetchAPI(`/api/jobs?limit=${limit}`);
+}
+
+export async function waitForJob(id, intervalMs = 1000) {
+  // Poll a background job until it finishes
+  while (true) {
+    const job = await fetchJob(id);
+    if (job.status === 'succeeded') {
+      return job;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Job failed');
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+}
@@ -1,5 +1,5 @@
 import { useState, useRef, useEffect } from 'react';
-import { sendChatMessage } from '../lib/api';
+import { streamChatMessage } from '../lib/api';
 
 export default function AIAssistantPage() {
   const [messages, setMessages] = useState([
@@ -10,6 +10,7 @@ export default function AIAssistantPage() {
   ]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
+  const [streaming, setStreaming] = useState(false);
   const [showSidebar, setShowSidebar] = useState(false);
   const messagesEndRef = useRef(null);
 
@@ -30,17 +31,34 @@ export default function AIAssistantPage() {
     setMessages(prev => [...prev, { role: 'user', content: userMessage }]);
     setLoading(true);
 
+    // The reply is appended to one assistant message as it streams in
+    let received = false;
+    const appendDelta = (delta) => {
+      const first = !received;
+      received = true;
+      setStreaming(true);
+      setMessages(prev => {
+        if (first) return [...prev, { role: 'assistant', content: delta }];
+        const last = prev[prev.length - 1];
+        return [...prev.slice(0, -1), { ...last, content: last.content + delta }];
+      });
+    };
+
     try {
-      const response = await sendChatMessage(userMessage);
-      setMessages(prev => [...prev, { role: 'assistant', content: response.assistant }]);
+      await streamChatMessage(userMessage, appendDelta);
     } catch (error) {
       console.error('Chat error:', error);
-      setMessages(prev => [...prev, {
-        role: 'assistant',
-        content: 'Sorry, I encountered an error. Please make sure the backend API is running and try again.',
-      }]);
+      if (received) {
+        appendDelta('\n\n[The response was interrupted.]');
+      } else {
+        setMessages(prev => [...prev, {
+          role: 'assistant',
+          content: 'Sorry, I encountered an error. Please make sure the backend API is running and try again.',
+        }]);
+      }
     } finally {
       setLoading(false);
+      setStreaming(false);
     }
   };
 
@@ -94,7 +112,7 @@ export default function AIAssistantPage() {
               </div>
             ))}
 
-            {loading && (
+            {loading && !streaming && (
               <div className="flex justify-start">
                 <div className="bg-slate-700 p-3 md:p-4 rounded-2xl">
                   <div className="flex gap-2">
@@ -1,11 +1,12 @@
 import { useEffect, useState } from 'react';
-import { fetchBeaches, fetchRiskSummary, fetchHighRiskBeaches, fetchAlerts, simulateRiskIngestion } from '../lib/api';
+import { fetchDashboard, simulateRiskIngestion, waitForJob } from '../lib/api';
 
 export default function Dashboard() {
   const [beaches, setBeaches] = useState([]);
   const [riskSummary, setRiskSummary] = useState(null);
   const [highRiskBeaches, setHighRiskBeaches] = useState([]);
   const [alerts, setAlerts] = useState([]);
+  const [monitoredCount, setMonitoredCount] = useState(0);
   const [loading, setLoading] = useState(true);
   const [simulating, setSimulating] = useState(false);
   const [error, setError] = useState(null);
@@ -18,17 +19,14 @@ export default function Dashboard() {
     setLoading(true);
     setError(null);
     try {
-      const [beachData, riskData, highRisk, alertData] = await Promise.all([
-        fetchBeaches().catch(() => []),
-        fetchRiskSummary().catch(() => null),
-        fetchHighRiskBeaches(null, 2).catch(() => ({ beaches: [] })),
-        fetchAlerts(10).catch(() => ({ alerts: [] }))
-      ]);
+      // Every KPI comes from one request to keep first paint to a single round-trip
+      const dashboard = await fetchDashboard();
       
-      setBeaches(beachData.length > 0 ? beachData : sampleBeaches);
-      setRiskSummary(riskData);
-      setHighRiskBeaches(highRisk.beaches || []);
-      setAlerts(alertData.alerts || []);
+      setBeaches(dashboard.beaches.length > 0 ? dashboard.beaches : sampleBeaches);
+      setRiskSummary({ ...dashboard.risk, active_alerts: dashboard.active_alerts });
+      setHighRiskBeaches(dashboard.priority_beaches);
+      setAlerts(dashboard.alerts);
+      setMonitoredCount(dashboard.monitored_beaches);
     } catch (error) {
       console.error('Failed to load data:', error);
       setBeaches(sampleBeaches);
@@ -42,11 +40,10 @@ export default function Dashboard() {
     setError(null);
     try {
       console.log('Starting data simulation...');
-      const result = await simulateRiskIngestion(14);
-      console.log('Simulation result:', result);
+      const queued = await simulateRiskIngestion(14);
+      const job = await waitForJob(queued.job_id);
+      console.log('Simulation result:', job.result);
       
-      // Wait a moment then reload data
-      await new Promise(resolve => setTimeout(resolve, 500));
       await loadData();
     } catch (error) {
       console.error('Failed to simulate data:', error);
@@ -150,7 +147,7 @@ export default function Dashboard() {
             <div>
               <p className="text-xs md:text-sm text-slate-400">Monitored</p>
               <p className="text-2xl md:text-3xl font-bold text-emerald-400">
-                {riskSummary?.total_beaches || beaches.length}
+                {riskSummary?.total_beaches || monitoredCount || beaches.length}
               </p>
             </div>
             <div className="w-10 h-10 md:w-12 md:h-12 rounded-lg flex items-center justify-center text-xl md:text-2xl bg-emerald-500/20">
@@ -204,7 +201,7 @@ export default function Dashboard() {
         <div className="card">
           <div className="flex items-center justify-between mb-4">
             <h2 className="text-base md:text-lg font-semibold text-white">⚠️ Active Alerts</h2>
-            <span className="text-xs text-slate-400">{alerts.length} total</span>
+            <span className="text-xs text-slate-400">{riskSummary?.active_alerts || 0} total</span>
           </div>
           
           {loading ? (
@@ -1,6 +1,6 @@
 import dynamic from 'next/dynamic';
 import { useEffect, useState } from 'react';
-import { fetchBeaches, fetchHighRiskBeaches, fetchBeachRiskHistory } from '../lib/api';
+import { fetchRiskSummary, fetchBeachRiskHistory } from '../lib/api';
 
 const MapView = dynamic(() => import('../components/MapView'), {
   ssr: false,
@@ -15,8 +15,7 @@ const MapView = dynamic(() => import('../components/MapView'), {
 });
 
 export default function MapPage() {
-  const [beaches, setBeaches] = useState([]);
-  const [riskData, setRiskData] = useState({});
+  const [riskSummary, setRiskSummary] = useState(null);
   const [selectedBeach, setSelectedBeach] = useState(null);
   const [riskHistory, setRiskHistory] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -32,28 +31,13 @@ export default function MapPage() {
     setRefreshing(true);
     setError(null);
     try {
-      const [beachData, highRisk] = await Promise.all([
-        fetchBeaches().catch(err => {
-          console.error('Failed to fetch beaches:', err);
-          return [];
-        }),
-        fetchHighRiskBeaches(null, 0).catch(err => {
-          console.error('Failed to fetch risk data:', err);
-          return { beaches: [] };
-        })
-      ]);
-      
-      console.log('Loaded beaches:', beachData?.length || 0);
-      console.log('Loaded risk entries:', highRisk?.beaches?.length || 0);
-      
-      setBeaches(beachData || []);
-      
-      // Build risk lookup by beach_id
-      const riskLookup = {};
-      (highRisk.beaches || []).forEach(b => {
-        riskLookup[b.beach_id] = b.risk_level;
+      // Beaches and their risk come from the map layer itself; only the counts are loaded here
+      const summary = await fetchRiskSummary().catch(err => {
+        console.error('Failed to fetch risk summary:', err);
+        return null;
       });
-      setRiskData(riskLookup);
+      
+      setRiskSummary(summary);
       setLastUpdate(new Date().toLocaleTimeString());
     } catch (error) {
       console.error('Failed to load data:', error);
@@ -93,12 +77,12 @@ export default function MapPage() {
     }
   };
 
-  // Count risk levels
   const riskCounts = {
-    high: Object.values(riskData).filter(r => r === 3).length,
-    medium: Object.values(riskData).filter(r => r === 2).length,
-    low: Object.values(riskData).filter(r => r <= 1).length,
+    high: riskSummary?.high_risk || 0,
+    medium: riskSummary?.medium_risk || 0,
+    low: (riskSummary?.low_risk || 0) + (riskSummary?.no_risk || 0),
   };
+  const totalBeaches = riskSummary?.total_beaches || 0;
 
   return (
     <div className="space-y-4 md:space-y-6">
@@ -106,8 +90,8 @@ export default function MapPage() {
         <div>
           <h1 className="page-title">Beach Map</h1>
           <p className="page-subtitle">
-            {beaches.length > 0 
-              ? `Showing ${beaches.length} beaches` 
+            {totalBeaches > 0 
+              ? `Showing ${totalBeaches} beaches` 
               : 'View beaches and current risk levels'}
             {lastUpdate && <span className="text-xs ml-2">• Updated {lastUpdate}</span>}
           </p>
@@ -162,9 +146,7 @@ export default function MapPage() {
         <div className="lg:col-span-2 card p-0 overflow-hidden" style={{ height: '500px' }}>
           {!loading && (
             <MapView 
-              key={`map-${beaches.length}-${Object.keys(riskData).length}`}
-              beaches={beaches} 
-              riskData={riskData}
+              refreshKey={lastUpdate}
               onBeachSelect={handleBeachSelect}
             />
           )}
@@ -186,11 +168,11 @@ export default function MapPage() {
                 <span 
                   className="px-2 py-1 rounded text-xs font-medium"
                   style={{ 
-                    backgroundColor: `${getRiskColor(riskData[selectedBeach.id])}20`,
-                    color: getRiskColor(riskData[selectedBeach.id])
+                    backgroundColor: `${getRiskColor(selectedBeach.risk_level)}20`,
+                    color: getRiskColor(selectedBeach.risk_level)
                   }}
                 >
-                  {getRiskLabel(riskData[selectedBeach.id])}
+                  {getRiskLabel(selectedBeach.risk_level)}
                 </span>
               </div>
               
@@ -236,7 +218,7 @@ export default function MapPage() {
       {/* Stats */}
       <div className="grid grid-cols-2 md:grid-cols-4 gap-3 md:gap-4">
         <div className="card text-center">
-          <p className="text-2xl font-bold text-white">{beaches.length || '—'}</p>
+          <p className="text-2xl font-bold text-white">{totalBeaches || '—'}</p>
           <p className="text-xs md:text-sm text-slate-400 mt-1">Total Beaches</p>
         </div>
         <div className="card text-center">